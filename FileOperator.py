@@ -25,937 +25,6997 @@ import shutil
 #used for managing csv files
 import csv
 
+#used for matching item names against glob patterns
+import fnmatch
+
+#used for compiling glob patterns into a single expression
+import re
+
+#used for recognizing moves across devices
+import errno
+
+#used for guarding the state shared between moving threads
+import threading
+
+#used for running moves in a pool of threads
+import concurrent.futures
+
+#used for queueing the moves of each destination folder
+import collections
+
+#used for reading move plans in batches
+import itertools
+
+#used for splitting a move plan between processes
+import zlib
+
+#used for saving and loading move plans
+import json
+
+#used for normalizing file names when renaming
+import unicodedata
+
+#used for formatting modification times into file names
+import datetime
+
+#used for mapping large files into memory when reading lines
+import mmap
+
+#used for combining the results of processing a file in parallel
+import functools
+
+#used for keeping a watcher and its journal open together
+import contextlib
+
+#used for writing files through a temporary file
+import tempfile
+
+#used for keeping the permissions of replaced files and checking that a copy
+#left by an interrupted move is a regular file
+import stat
+
+#used for storing typed csv columns compactly
+import array
+
+#used for parsing ranges of csv files from memory
+import io
+
+#used for reading and writing compressed files
+import gzip
+import bz2
+import lzma
+
+#used for caching folder listings on disk
+import sqlite3
+import marshal
+
+#used for hashing files when finding duplicates
+import hashlib
+
+#used for running file operations from an event loop
+import asyncio
+
+#used for the structured results of the core functions
+import dataclasses
+
+#used for calling the Linux inotify API when watching folders
+import ctypes
+import ctypes.util
+
+#used for waiting on inotify events and decoding them
+import select
+import struct
+
+#used for finding the latency histogram bucket of a duration
+import bisect
+
+#used for the command line entry point
+import argparse
+import sys
+
+#used for recognizing folders modified while they were being cached
+import time
+
+
+
+#suffix of the temporary file a file is copied to when moved across devices
+PARTIAL_SUFFIX = ".fo-partial"
+
+#suffix of the temporary hard link that replaces a duplicate file
+LINK_SUFFIX = ".fo-link"
+
+#names of the temporary files `write_lines` writes before replacing a file
+#and `apply_renames` moves chained files to
+TEMPORARY_NAME_PATTERN = re.compile(r"\.(?:.+\.[a-z0-9_]{8}|fo-rename-[0-9]+-[0-9]+)\.tmp")
+
+#amount of bytes hashed from each end of a file when finding duplicates
+DUPLICATE_EDGE_SIZE = 64 * 1024
+
+#amount of threads shared by every aio_ function for their blocking calls
+AIO_MAX_WORKERS = 16
+
+#the inotify events a watched folder reacts to, the flags of the events the
+#watcher checks for, and the layout of the header of every event
+INOTIFY_CLOSE_WRITE = 0x00000008
+INOTIFY_MOVED_TO = 0x00000080
+INOTIFY_OVERFLOW = 0x00004000
+INOTIFY_IS_FOLDER = 0x40000000
+INOTIFY_EVENT = struct.Struct("iIII")
+
+#the upper bounds in seconds of the latency histograms of `Metrics`
+METRICS_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0,
+                   5.0, 10.0)
+
+#columns of a move plan saved as a csv file
+PLAN_HEADERS = ["source", "dest", "size", "category"]
+
+#amount of rows read at once when reading a csv file into columns
+CSV_BATCH_SIZE = 10000
+
+#the forms of integers and floats that can be stored in typed csv columns
+INT_PATTERN = re.compile(r"0|-?[1-9][0-9]*")
+FLOAT_PATTERN = re.compile(r"-?[0-9]+\.[0-9]+")
+
+#a quoted csv field, which like in `csv.reader` only starts at the start of a
+#field, with the rest of the field after its closing quote where a '"' is
+#just a character. The group is None when the closing quote is missing.
+QUOTED_FIELD_PATTERN = re.compile(rb'(?<![^,\r\n])"[^"]*(?:""[^"]*)*("[^,\r\n]*)?')
+
+#the first bytes of each compressed format, checked in order
+COMPRESSION_MAGIC = [(re.compile(rb"\x1f\x8b\x08"), "gzip"),
+                     (re.compile(rb"BZh[1-9]1AY&SY"), "bz2"),
+                     (re.compile(rb"\xfd7zXZ\x00"), "xz"),
+                     (re.compile(rb"\x28\xb5\x2f\xfd"), "zstd")]
+
+#the compressed format of each file extension
+COMPRESSION_EXTENSIONS = {".gz": "gzip", ".gzip": "gzip", ".bz2": "bz2",
+                          ".xz": "xz", ".zst": "zstd", ".zstd": "zstd"}
+
+#nanoseconds after being modified that a folder is listed again even if its
+#modification time is unchanged, covering coarse file system clocks
+CACHE_RACY_NS = 2 * 1000 * 1000 * 1000
+
+#amount of bytes read from the start of a file to recognize its content
+CONTENT_HEADER_SIZE = 512
+
+#the first bytes of each recognized type of content as regular expressions,
+#checked in order, and the extension the content belongs to
+CONTENT_SIGNATURES = [(rb"%PDF-", ".pdf"),
+                      (rb"\x89PNG\r\n\x1a\n", ".png"),
+                      (rb"\xff\xd8\xff", ".jpg"),
+                      (rb"GIF8[79]a", ".gif"),
+                      (rb"II\*\x00|MM\x00\*", ".tif"),
+                      (rb"BM.{4}\x00\x00\x00\x00", ".bmp"),
+                      (rb"RIFF.{4}WEBP", ".webp"),
+                      (rb"RIFF.{4}WAVE", ".wav"),
+                      (rb"RIFF.{4}AVI ", ".avi"),
+                      (rb".{4}ftypqt  ", ".mov"),
+                      (rb".{4}ftyp", ".mp4"),
+                      (rb"ID3|\xff[\xfb\xf3\xf2]", ".mp3"),
+                      (rb"OggS", ".ogg"),
+                      (rb"fLaC", ".flac"),
+                      (rb"PK\x03\x04|PK\x05\x06", ".zip"),
+                      (rb"\x1f\x8b\x08", ".gz"),
+                      (rb"BZh[1-9]1AY&SY", ".bz2"),
+                      (rb"\xfd7zXZ\x00", ".xz"),
+                      (rb"\x28\xb5\x2f\xfd", ".zst"),
+                      (rb"7z\xbc\xaf\x27\x1c", ".7z"),
+                      (rb"Rar!\x1a\x07", ".rar"),
+                      (rb".{257}ustar", ".tar"),
+                      (rb"SQLite format 3\x00", ".sqlite"),
+                      (rb"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", ".doc"),
+                      (rb"\x7fELF", ".elf"),
+                      (rb"MZ", ".exe"),
+                      (rb"\xca\xfe\xba\xbe", ".class"),
+                      (rb"\x00asm", ".wasm")]
+
+#every signature compiled into a single expression, where the number of the
+#group that matched is the position of the signature in the table
+CONTENT_PATTERN = re.compile(b"|".join(b"(" + signature + b")"
+                                       for signature, extension in CONTENT_SIGNATURES),
+                             re.DOTALL)
+
+#extensions whose files share the signature of another type of content
+CONTENT_ALIASES = {".zip": {".docx", ".xlsx", ".pptx", ".odt", ".ods", ".odp",
+                            ".jar", ".apk", ".epub", ".whl"},
+                   ".jpg": {".jpeg", ".jpe"},
+                   ".tif": {".tiff", ".dng", ".nef", ".cr2"},
+                   ".mp4": {".m4a", ".m4v", ".3gp", ".heic", ".avif"},
+                   ".ogg": {".oga", ".ogv", ".opus"},
+                   ".gz": {".tgz"},
+                   ".xz": {".txz"},
+                   ".doc": {".xls", ".ppt", ".msi", ".msg"},
+                   ".sqlite": {".db", ".sqlite3"},
+                   ".elf": {".so", ".o"},
+                   ".exe": {".dll", ".sys"}}
+
+#amount of files whose detected content is remembered
+CONTENT_CACHE_SIZE = 65536
+
+#the detected content of files by (device, inode, mtime, size), least
+#recently used first, shared by the detecting threads
+content_cache = collections.OrderedDict()
+content_cache_lock = threading.Lock()
+
+#the pool of threads shared by every aio_ function, created on first use
+aio_executor = None
+aio_executor_lock = threading.Lock()
+
+#the metrics being recorded, None while metrics are disabled
+metrics = None
+
+
+
+class FileOperatorError(Exception):
+    """Base class of the errors raised by the core functions of this module
+    (e.g., `get_items`, `make_bucket_folders`, `sort_folder`)"""
+
+
+
+
+class FolderNotFoundError(FileOperatorError, FileNotFoundError):
+    """Raised when a folder does not exist or is not a folder"""
+
+
+
+
+class FolderAccessError(FileOperatorError, PermissionError):
+    """Raised when a folder can not be accessed"""
+
+
+
+
+class FileNotReadableError(FileOperatorError, OSError):
+    """Raised when a file can not be opened for reading as UTF-8 text"""
+
+
+
+
+class BucketCreationError(FileOperatorError, OSError):
+    """Raised when a subfolder (bucket) can not be created"""
+
+
+
+
+class JournalError(FileOperatorError, OSError):
+    """Raised when the journal of a sort can not be opened or written"""
+
+
+
+
+@dataclasses.dataclass(slots = True)
+class Item:
+    """An item of a folder as found by `get_items`
+
+    Attributes:
+        name(str): The name of the item
+        path(str): The full path of the item
+        item_type(str): 'File', 'Folder' or 'Improper File'
+        extension(str | None): The lowercase extension of a file
+        category(str): The group the item belongs in (e.g., '.txt',
+            'No Extension', 'Folder'), see `get_item_category`
+    """
+
+    name: str
+    path: str
+    item_type: str
+    extension: str | None
+    category: str
+
+
+
+
+@dataclasses.dataclass(slots = True)
+class Bucket:
+    """A subfolder items of a category are sorted into, as created by
+    `make_bucket_folders`
+
+    Attributes:
+        name(str): The name of the bucket (e.g., 'TXT', 'DOT_H')
+        path(str): The full path of the bucket
+        category(str): The category of the items sorted into the bucket
+        items(list[str]): The names of the items of the category, or their
+            paths relative to the sorted folder when it was walked
+    """
+
+    name: str
+    path: str
+    category: str
+    items: list
+
+
+
+
+@dataclasses.dataclass(slots = True)
+class SortReport:
+    """The outcome of sorting a folder with `sort_folder`
+
+    Attributes:
+        moved(int): The amount of files moved into their bucket
+        skipped(int): The amount of files a journal recorded as already moved
+        failed(list[dict]): The result of every move that failed, as
+            described in `apply_move`
+        buckets(list[str]): The paths of the buckets files were moved into
+        duplicates(list[dict]): The result of every duplicate removed, as
+            described in `remove_duplicates`
+    """
+
+    moved: int = 0
+    skipped: int = 0
+    failed: list = dataclasses.field(default_factory = list)
+    buckets: list = dataclasses.field(default_factory = list)
+    duplicates: list = dataclasses.field(default_factory = list)
+
+
+
+
+class Metrics:
+    """Counts what the module's operations do while it is enabled with
+    `enable_metrics`: the system calls made, the bytes read and written and
+    the items processed, how long each phase of work took as a histogram
+    with the bounds in `METRICS_BUCKETS`, and the errors operations handle
+    internally instead of raising, by their phase and type.
+
+    The phases are 'listing' (listing folders), 'classify' (categorizing
+    items), 'mkdir' (creating buckets), 'move' (moving files), 'rename'
+    (renaming files), 'parse' (reading files and CSV files) and 'write'
+    (writing files). System calls are counted where the operations make
+    them, so calls made inside the standard library are only estimated.
+
+    Every snapshot is passed to each sink, which can be any callable taking
+    the snapshot dictionary, such as a `JsonLinesSink` or a
+    `PrometheusSink`. Snapshots are taken by `flush`, when the metrics are
+    disabled, and every flush_interval seconds while phases are recorded.
+
+    Usage:
+        metrics = enable_metrics([JsonLinesSink("metrics.jsonl")])
+        assign_folders(folder_path)
+        disable_metrics()
+    """
+
+    def __init__(self, sinks = None, flush_interval = None):
+
+        #the callables every snapshot is passed to
+        self.sinks = list(sinks or [])
+
+        #the seconds between automatic snapshots, None for only on flush
+        self.flush_interval = flush_interval
+        self.next_flush = (time.monotonic() + flush_interval
+                           if flush_interval else None)
+
+        #guards everything below, since operations record from many threads
+        self.lock = threading.Lock()
+
+        #the totals of every counter
+        self.counters = collections.Counter()
+
+        #the [bucket counts, total seconds] of every phase, the last bucket
+        #counts the durations above every bound
+        self.phases = {}
+
+        #the amount of errors by (phase, type of error)
+        self.errors = collections.Counter()
+
+    def count(self, name, amount = 1):
+        """Adds an amount to a counter ('syscalls', 'bytes_read',
+        'bytes_written' or 'items')"""
+
+        with self.lock:
+            self.counters[name] += amount
+
+    def observe(self, phase, seconds):
+        """Records how long one run of a phase took"""
+
+        index = bisect.bisect_left(METRICS_BUCKETS, seconds)
+
+        with self.lock:
+            histogram = self.phases.get(phase)
+            if histogram is None:
+                histogram = self.phases[phase] = [
+                    [0] * (len(METRICS_BUCKETS) + 1), 0.0]
+            histogram[0][index] += 1
+            histogram[1] += seconds
+
+            due = self.next_flush is not None and time.monotonic() >= self.next_flush
+            if due:
+                self.next_flush = time.monotonic() + self.flush_interval
+
+        if due:
+            self.flush()
+
+    def record_read(self, file_name, start, items):
+        """Records a whole file read and parsed in the 'parse' phase, which
+        started at the time.perf_counter() start, with the amount of items
+        (lines or rows) it held"""
+
+        self.observe("parse", time.perf_counter() - start)
+        self.count("items", items)
+
+        #the size of the file is read again only while metrics are enabled
+        try:
+            self.count("bytes_read", os.path.getsize(file_name))
+        except (OSError, TypeError):
+            pass
+
+    def error(self, phase, error):
+        """Records an error raised during a phase"""
+
+        with self.lock:
+            self.errors[(phase, type(error).__name__)] += 1
+
+    def snapshot(self):
+        """Gives the current values as a dictionary that can be written as
+        JSON, with the keys 'time', 'counters', 'phases' (the 'count', 'sum'
+        and cumulative 'buckets' of each phase, by upper bound) and 'errors'
+        (the amount of each type of error by phase)"""
+
+        with self.lock:
+            phases = {}
+            for phase, (counts, total) in self.phases.items():
+                cumulative = list(itertools.accumulate(counts))
+                bounds = [str(bound) for bound in METRICS_BUCKETS] + ["+Inf"]
+                phases[phase] = {"count": cumulative[-1], "sum": total,
+                                 "buckets": dict(zip(bounds, cumulative))}
+
+            errors = {}
+            for (phase, name), amount in self.errors.items():
+                errors.setdefault(phase, {})[name] = amount
+
+            return {"time": time.time(), "counters": dict(self.counters),
+                    "phases": phases, "errors": errors}
+
+    def flush(self):
+        """Passes a snapshot to every sink. Errors raised by a sink are
+        recorded in the 'sink' phase instead of being raised."""
+
+        snapshot = self.snapshot()
+
+        for sink in self.sinks:
+            try:
+                sink(snapshot)
+            except Exception as e:
+                self.error("sink", e)
+
+        return snapshot
+
+
+
+
+class JsonLinesSink:
+    """A metrics sink that appends every snapshot to a file as one line of
+    JSON
+
+    Usage:
+        enable_metrics([JsonLinesSink("metrics.jsonl")])
+    """
+
+    def __init__(self, file_name):
+
+        #the path to the file the snapshots are appended to
+        self.file_name = file_name
+
+    def __call__(self, snapshot):
+        with open(self.file_name, "a", encoding = "utf-8") as f:
+            f.write(json.dumps(snapshot) + "\n")
+
+
+
+
+class PrometheusSink:
+    """A metrics sink that writes the latest snapshot in the Prometheus text
+    format, for the textfile collector of the node exporter. The file is
+    replaced atomically, so it is never read half written.
+
+    Usage:
+        enable_metrics([PrometheusSink("/var/lib/node_exporter/fo.prom")])
+    """
+
+    def __init__(self, file_name, prefix = "fileoperator"):
+
+        #the path to the file and the prefix of every metric name
+        self.file_name = file_name
+        self.prefix = prefix
+
+    def __call__(self, snapshot):
+
+        prefix = self.prefix
+        lines = []
+
+        for name, amount in sorted(snapshot["counters"].items()):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {amount}")
+
+        if snapshot["phases"]:
+            lines.append(f"# TYPE {prefix}_phase_seconds histogram")
+        for phase, histogram in sorted(snapshot["phases"].items()):
+            for bound, amount in histogram["buckets"].items():
+                lines.append(f'{prefix}_phase_seconds_bucket{{phase="{phase}",'
+                             f'le="{bound}"}} {amount}')
+            lines.append(f'{prefix}_phase_seconds_sum{{phase="{phase}"}} '
+                         f'{histogram["sum"]}')
+            lines.append(f'{prefix}_phase_seconds_count{{phase="{phase}"}} '
+                         f'{histogram["count"]}')
+
+        if snapshot["errors"]:
+            lines.append(f"# TYPE {prefix}_errors_total counter")
+        for phase, errors in sorted(snapshot["errors"].items()):
+            for name, amount in sorted(errors.items()):
+                lines.append(f'{prefix}_errors_total{{phase="{phase}",'
+                             f'type="{name}"}} {amount}')
+
+        #written next to the file and renamed over it
+        partial_name = self.file_name + PARTIAL_SUFFIX
+        with open(partial_name, "w", encoding = "utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(partial_name, self.file_name)
+
+
+
+
+def enable_metrics(sinks = None, flush_interval = None):
+    """Starts recording metrics for every operation of the module into a new
+    `Metrics`. While metrics are disabled, which is the default, each
+    instrumented operation only checks a single global.
+
+    Args:
+        sinks (list[callable], optional): The sinks every snapshot is passed
+            to. Defaults to None for only recording.
+        flush_interval (float, optional): The seconds between automatic
+            snapshots. Defaults to None for only taking snapshots on flush
+            and when disabled.
+
+    Returns:
+        Metrics: The metrics being recorded
+
+    Raises:
+        None
+    """
+
+    global metrics
+
+    metrics = Metrics(sinks, flush_interval)
+    return metrics
+
+
+
+
+def disable_metrics():
+    """Stops recording metrics and passes a final snapshot to the sinks
+
+    Args:
+        None
+
+    Returns:
+        Metrics or None: The metrics that were being recorded, or None if
+            metrics were not enabled
+
+    Raises:
+        None
+    """
+
+    global metrics
+
+    recorder, metrics = metrics, None
+    if recorder is not None:
+        recorder.flush()
+
+    return recorder
+
+
+
+
+def record_error(phase, error):
+    """Records an error in the enabled metrics, if any, for the errors that
+    operations handle internally
+
+    Args:
+        phase (str): The phase the error was raised in
+        error (Exception): The error
+
+    Returns:
+        None
+
+    Raises:
+        None
+    """
+
+    if metrics is not None:
+        metrics.error(phase, error)
+
+
+
+
+def folder_error(folder_path, error):
+    """Turns the error raised when a folder could not be listed into the
+    matching typed error
+
+    Args:
+        folder_path(str): The path of the folder
+        error(OSError): The error raised
+
+    Returns:
+        OSError: A `FolderNotFoundError` or `FolderAccessError`, or error
+            itself for any other error
+
+    Raises:
+        None
+    """
+
+    if isinstance(error, (FileNotFoundError, NotADirectoryError)):
+        return FolderNotFoundError(errno.ENOENT, "Folder not found", folder_path)
+
+    if isinstance(error, PermissionError):
+        return FolderAccessError(errno.EACCES, "Folder could not be accessed",
+                                 folder_path)
+
+    return error
+
+
+
+
+def check_folder_path(folder_path):
+    """Checks that a path is an existing folder
+
+    Args:
+        folder_path(str): The path to check
+
+    Returns:
+        str: folder_path
+
+    Raises:
+        FolderNotFoundError: If folder_path is not an existing folder
+    """
+
+    if not os.path.isdir(folder_path):
+        raise FolderNotFoundError(errno.ENOENT, "Folder not found", folder_path)
+
+    return folder_path
+
+
+
+
+def check_file(file_name):
+    """Checks that a file exists and can be opened for reading as UTF-8 text
+
+    Args:
+        file_name(str): The path to check
+
+    Returns:
+        str: file_name
+
+    Raises:
+        FileNotReadableError: If the file could not be opened, with the
+            errno of the original error (e.g., ENOENT, EACCES)
+    """
+
+    try:
+        with open(file_name, "r", encoding="utf-8"):
+            return file_name
+    except OSError as e:
+        raise FileNotReadableError(e.errno, e.strerror, file_name)
+
+
+
+
+def get_items(folder_path, cache_file = None, detect_content = None,
+              category_rules = None):
+    """Lists and classifies all of the items with in a folder without any
+    console output
+
+    Args:
+        folder_path(str): The path of the folder
+        cache_file(str, optional): Passed to `scan_items`. Defaults to None.
+        detect_content(str, optional): "missing" or "all" to categorize files
+            by their content, see `detect_item_categories`. Defaults to None.
+        category_rules(CategoryRules, optional): The rules giving the
+            category of every item. Defaults to None for
+            `DEFAULT_CATEGORY_RULES`.
+
+    Returns:
+        list[Item]: Every item of the folder
+
+    Raises:
+        FolderNotFoundError: If the folder does not exist
+        FolderAccessError: If the folder can not be accessed
+        OSError: If the folder could not be listed for any other reason
+    """
+
+    try:
+        scanned = scan_items(folder_path, cache_file)
+    except OSError as e:
+        raise folder_error(folder_path, e)
+
+    #the path of every item starts with the same prefix, which is cheaper
+    #to add on than joining each path
+    prefix = os.path.join(folder_path, "")
+
+    get_category = (category_rules or DEFAULT_CATEGORY_RULES).get_category
+
+    #the categorizing is timed while metrics are enabled
+    recorder = metrics
+    if recorder is not None:
+        start = time.perf_counter()
+
+    items = [Item(name, prefix + name, item_type, extension,
+                  get_category(name, item_type, extension, prefix + name))
+             for name, item_type, extension in scanned]
+
+    #files are read to recognize their content if asked to
+    if detect_content:
+        records = detect_item_categories(((item.path, item.category, 0)
+                                          for item in items), detect_content)
+        for item, (path, category, size) in zip(items, records):
+            item.category = category
+
+    if recorder is not None:
+        recorder.observe("classify", time.perf_counter() - start)
+
+    return items
+
+
+
+
+def get_groups(folder_path, cache_file = None, detect_content = None,
+               category_rules = None):
+    """Groups the items of a folder by category without any console output
+
+    Args:
+        folder_path, cache_file, detect_content, category_rules (optional):
+            Passed to `get_items`.
+
+    Returns:
+        dict[str, list[Item]]: The items of every category, in the order the
+            categories were first found
+
+    Raises:
+        FolderNotFoundError: If the folder does not exist
+        FolderAccessError: If the folder can not be accessed
+        OSError: If the folder could not be listed for any other reason
+    """
+
+    groups = {}
+    for item in get_items(folder_path, cache_file, detect_content,
+                          category_rules):
+        groups.setdefault(item.category, []).append(item)
+
+    return groups
+
+
+
+
+def make_bucket_folders(folder_path, recursive = False, max_depth = None,
+                        follow_symlinks = False, exclude = None,
+                        detect_content = None, category_rules = None):
+    """Creates a subfolder (bucket) for every category of item in a folder,
+    other than folders, without any console output
+
+    Args:
+        folder_path(str): The path of the folder
+        recursive(bool, optional): Whether the items of every subfolder are
+            grouped as well using `walk_items`. Defaults to False.
+        max_depth, follow_symlinks, exclude (optional): Passed to
+            `walk_items` when recursive is True.
+        detect_content(str, optional): "missing" or "all" to group files by
+            their content. Defaults to None.
+        category_rules(CategoryRules, optional): The rules giving the
+            category and bucket of every item. Defaults to None for
+            `DEFAULT_CATEGORY_RULES`.
+
+    Returns:
+        list[Bucket]: Every bucket created or already existing
+
+    Raises:
+        FolderNotFoundError: If the folder does not exist
+        FolderAccessError: If the folder can not be accessed
+        BucketCreationError: If a bucket could not be created
+        OSError: If the folder could not be listed for any other reason
+    """
+
+    category_rules = category_rules or DEFAULT_CATEGORY_RULES
+
+    #the names (or relative paths) of the items of every category
+    if recursive:
+        grouped_items = {}
+        try:
+            for path, category, size in walk_items(folder_path, max_depth,
+                                                   follow_symlinks, exclude,
+                                                   detect_content,
+                                                   category_rules):
+                grouped_items.setdefault(category, []).append(
+                    os.path.relpath(path, folder_path))
+        except OSError as e:
+            raise folder_error(folder_path, e)
+    else:
+        grouped_items = {category: [item.name for item in items]
+                         for category, items in get_groups(
+                             folder_path, detect_content = detect_content,
+                             category_rules = category_rules).items()}
+
+    buckets = []
+
+    for category, items in grouped_items.items():
+
+        #folders are not sorted into buckets
+        name = category_rules.get_bucket(category)
+        if name is None:
+            continue
+
+        bucket_path = os.path.join(folder_path, name)
+        recorder = metrics
+        if recorder is not None:
+            start = time.perf_counter()
+        try:
+            os.makedirs(bucket_path, exist_ok = True)
+        except OSError as e:
+            raise BucketCreationError(e.errno, e.strerror, bucket_path)
+        if recorder is not None:
+            recorder.observe("mkdir", time.perf_counter() - start)
+            recorder.count("syscalls")
+
+        buckets.append(Bucket(name, bucket_path, category, items))
+
+    return buckets
+
+
+
+
+def sort_folder(folder_path, recursive = False, max_depth = None,
+                follow_symlinks = False, exclude = None, journal_file = None,
+                detect_content = None, duplicates = None, max_workers = None,
+                category_rules = None):
+    """Moves the files of a folder into categorized subfolders (buckets)
+    without any console output. The moves are planned by `iter_move_plan`
+    and made by `iter_apply_plan` while the folder is still being walked.
+
+    Args:
+        folder_path(str): The path of the folder
+        recursive, max_depth, follow_symlinks, exclude, detect_content,
+            category_rules (optional): Passed to `iter_move_plan`.
+        journal_file(str, optional): Passed to `iter_apply_plan`. Defaults
+            to None.
+        duplicates(str, optional): "hardlink" or "delete" to remove the
+            duplicate files of every bucket files were moved into, see
+            `remove_duplicates`. Defaults to None for keeping duplicates.
+        max_workers(int, optional): Passed to `iter_apply_plan`. Defaults to
+            None for moving one file at a time.
+
+    Returns:
+        SortReport: The outcome of every move and duplicate removal
+
+    Raises:
+        FolderNotFoundError: If the folder does not exist
+        FolderAccessError: If the folder can not be accessed
+        JournalError: If the journal could not be opened or written
+        OSError: If the folder could not be walked for any other reason
+    """
+
+    report = SortReport()
+
+    #the error that stopped the walk of the folder, if any, which is told
+    #apart from errors writing the journal
+    walk_errors = []
+
+    def iter_plan():
+        try:
+            yield from iter_move_plan(folder_path, recursive, max_depth,
+                                      follow_symlinks, exclude, detect_content,
+                                      category_rules)
+        except OSError as e:
+            walk_errors.append(e)
+            raise
+
+    #the buckets files were moved into, in the order they were first used
+    buckets = {}
+
+    try:
+        for result in iter_apply_plan(iter_plan(), max_workers = max_workers,
+                                      journal_file = journal_file):
+
+            if result["status"] == "moved":
+                report.moved += 1
+                buckets[os.path.dirname(result["dest"])] = None
+            elif result["status"] == "skipped":
+                report.skipped += 1
+            else:
+                report.failed.append(result)
+
+    except OSError as e:
+        if e in walk_errors:
+            raise folder_error(folder_path, e)
+        if journal_file is None:
+            raise
+        raise JournalError(e.errno, e.strerror, journal_file) from e
+
+    report.buckets = list(buckets)
+
+    #the files of every bucket that changed are compared for duplicates
+    if duplicates and report.buckets:
+        records = itertools.chain.from_iterable(walk_items(bucket, 0)
+                                                for bucket in report.buckets)
+        report.duplicates = remove_duplicates(find_duplicate_files(records),
+                                              duplicates)
+
+    return report
+
+
 
 
 def get_folder_path():
     """Prompts the user until a valid directory path is entered.
 
     Args:
-        None
+        None
+
+    Returns:
+        str or None: The validated, full path to an existing directory,
+                     or None if the user enters an empty string to exit.
+    Raises:
+        None: Handles invalid path errors internally by re-prompting.
+              (External interrupts like KeyboardInterrupt can still occur).
+    """
+
+    #Loop continuously, prompting the user for a folder path.
+    #The loop exits ONLY when a valid, existing directory path is entered
+    #and returned by the function, OR if the user enters nothing.
+    while True:
+
+        #retrieves the name of a folder path from the user removing trailing
+        #whitespace and surrounding quotes
+        folder_path = input("\n\tEnter the path for the folder or nothing to exit: ").strip().strip('"')
+
+        #in the case the user entered nothing
+        if not folder_path:
+            return None
+
+        #checks if the name entered is a folder path and exits the loop by
+        #returning it
+        try:
+            return check_folder_path(folder_path)
+
+        except FolderNotFoundError:
+            #informs the user of the error in finding the folder path
+            print(f"\n\tERROR: \"{folder_path}\" is not valid or existing path.")
+   
+
+
+
+def get_file(folder_path = ""):    
+    """Prompts the user to enter a filename and validates if it exists
+    and is readable. The filename can be relative to an optional base folder.
+
+    The function will continuously prompt the user until a valid, readable
+    file path is entered.
+
+    Args:
+        folder_path (str, optional): The base directory path to prepend to the
+            user-entered filename. Defaults to "" (meaning the filename
+            will be relative to the current working directory or an
+            absolute path if the user enters one).
+
+    Returns:
+        str or None: The full, validated path to an existing and readable file,
+            or None if the user enters an empty string to quit.
+    Raises:
+        None: Handles file access errors (FileNotFoundError, PermissionError,
+              IsADirectoryError, OSError, general Exception) internally by
+              printing an error message and re-prompting the user.
+              (External interrupts like KeyboardInterrupt can still occur
+              during the input() call).
+    """
+
+    #Loops continuously prompting user for a file.
+    #The loop exits only when a valid file name is entered
+    #and returned, OR if the user enters nothing.
+    while True:
+
+        #retrieves the file name from the user and deletes surrounding quotes
+        #and white space.
+        file_name = input("\n\tEnter the name of the file or nothing to exit: ").strip().strip('"')
+
+        #incase the user just presses enter
+        if not file_name:
+            return None
+
+        #connects the file to folder_path
+        file_name = os.path.join(folder_path, file_name)
+
+        #Attempts to validate the file by checking the typical file prone
+        #errors that might occur for file operations.
+        try:
+
+            #returns the file_name if no errors were generated
+            return check_file(file_name)
+
+        except FileNotReadableError as e:
+
+            if e.errno == errno.ENOENT:
+                #occurs if the name of the file does not exist
+                print("\tERROR - File could not be found")
+            elif e.errno in (errno.EACCES, errno.EPERM):
+                #occurs if the file is not allowed to be read
+                print("\tERROR - File could not be accessed")
+            else:
+                #other errors that might occur when opening a file
+                print("\tERROR - File could not be handled")
+
+
+
+
+def list_items(folder_path, cache_file = None):
+    """Lists out all the items with in a folder path to the console or prints
+    that operation could not be done due to a problem with processing
+
+    Args:
+        folder_path(str): An exisiting folder path
+        cache_file(str, optional): The path to a `ScanCache` the listing is
+            kept in. Defaults to None for not caching.
+
+    Returns:
+        None: Prints out the items with in the folder path to the console
+
+    Raises:
+        None
+
+    """
+
+    #Attempts to validate the folder by checking if a list of files can be
+    #generated from the name of the path 
+    try:
+        
+        #Generates a list of items and can raise an error if the folder does
+        #not exist, or an ambiguous error
+        if cache_file is None:
+            items = os.listdir(folder_path)
+        else:
+            items = [item[0] for item in scan_items(folder_path, cache_file)]
+
+        
+        if not items:
+
+            #incase the folder is empty
+            print(f"\n\t{folder_path} is empty")
+        else:
+            
+            #starting header for the items in the folder 
+            print(f"\n\t----- Contents of {folder_path} -----")
+
+            #prints out the name of each item in the folder with a single
+            #write to the console
+            print("\n".join(f"\t{item_name}" for item_name in items))
+
+            #ending header for the items in the folder
+            print(f"\n\t-----    End of {folder_path}   -----")
+
+    except FileNotFoundError:
+
+        #If the folder could not be found
+        print(f"\n\tFolder {folder_path} not found")
+    except Exception as e:
+
+        #If any other errors occured when opening the folder path
+        record_error("listing", e)
+        print(f"\n\tAn error {e} occurred")
+
+
+
+
+def get_item_type(folder_path, item_name):
+    """Determines the type of the item given based on its name and the path
+    to the folder that was given
+
+    Args:
+        folder_path(str): The path for the folder item_name resides in
+        item_name(str): The name of the item
+    Returns:
+        tuple[str, str | None]: A tuple where the first element is the item type
+            ('File', 'Folder', or 'Improper File') and the second element
+            is the lowercase file extension (e.g., '.txt') if it's a file
+            with an extension, otherwise None.
+    Raises:
+        None
+    """
+    
+    #Attempts to join, validate, and extract the extension from a item. If any
+    #errors are generated then the item gets labled as improper.
+    try:
+
+        #connects the name of item to the path of the folder
+        item_path = os.path.join(folder_path, item_name)
+
+        if os.path.isfile(item_path):
+
+            #if the item is a file
+            extension = os.path.splitext(item_path)
+
+            #returns the type as a file and the lowercased extension
+            return ("File", extension[1].lower())
+
+        elif os.path.isdir(item_path):
+            #if the item is a folder returns the type as a folder with
+            #no extension
+            return ("Folder", None)
+
+    except Exception as e:
+        #if the item is problematic returns the type as improper file with
+        #no extension
+        record_error("classify", e)
+        return ("Improper File", None)
+
+    #items that are neither a file nor a folder (broken links, sockets, etc.)
+    #are labeled as improper
+    return ("Improper File", None)
+
+
+
+
+def classify_entry(entry):
+    """Determines the type of an item from a directory entry generated by
+    `os.scandir`. Unlike `get_item_type` no path is joined and the cached
+    file type information of the entry is reused, so on most platforms no
+    extra stat system call is made for each item.
+
+    Args:
+        entry(os.DirEntry): An entry generated by `os.scandir`
+
+    Returns:
+        tuple[str, str | None]: A tuple where the first element is the item type
+            ('File', 'Folder', or 'Improper File') and the second element
+            is the lowercase file extension (e.g., '.txt') if it's a file
+            with an extension, otherwise None.
+
+    Raises:
+        None
+    """
+
+    #Attempts to validate the entry from its cached type. If any errors are
+    #generated then the item gets labled as improper.
+    try:
+
+        if entry.is_file():
+
+            #if the item is a file returns the type as a file and the
+            #lowercased extension
+            return ("File", os.path.splitext(entry.name)[1].lower())
+
+        elif entry.is_dir():
+
+            #if the item is a folder returns the type as a folder with
+            #no extension
+            return ("Folder", None)
+
+    except Exception as e:
+        #if the item is problematic it is labeled as improper below
+        record_error("classify", e)
+
+    #items that could not be classified are labeled as improper
+    return ("Improper File", None)
+
+
+
+
+def get_item_category(item_type, extension):
+    """Determines the group an item belongs in based on its type and extension
+
+    Args:
+        item_type(str): The type of the item ('File', 'Folder', or
+            'Improper File')
+        extension(str | None): The lowercase extension of the item
+
+    Returns:
+        str: The category of the item (e.g., 'Folder', '.txt',
+            'No Extension', 'Improper File')
+
+    Raises:
+        None
+    """
+
+    if not item_type == "File":
+        #incase the item type is not a file the category is that item's type
+        return item_type
+
+    elif extension and extension != ".":
+        #the category of a file with an extension is its extension
+        return extension
+
+    else:
+        #files without an extension (or ending in a bare ".") are grouped
+        #together
+        return "No Extension"
+
+
+
+
+def read_file_header(path, size = CONTENT_HEADER_SIZE):
+    """Reads the first bytes of a file with a single `os.pread` call, without
+    the buffering of a file object
+
+    Args:
+        path(str): The path of the file
+        size(int, optional): The amount of bytes to read. Defaults to
+            `CONTENT_HEADER_SIZE`.
+
+    Returns:
+        bytes: Up to size bytes from the start of the file
+
+    Raises:
+        OSError: If the file could not be opened or read
+    """
+
+    handle = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        #os.pread is not available on every platform, where a read of a
+        #newly opened file starts at the same place
+        if hasattr(os, "pread"):
+            return os.pread(handle, size, 0)
+        return os.read(handle, size)
+    finally:
+        os.close(handle)
+
+
+
+
+def match_content(header):
+    """Determines the type of a file from its first bytes with the compiled
+    `CONTENT_SIGNATURES` table. A header with no known signature that is
+    valid UTF-8 without any null bytes is taken to be text.
+
+    Args:
+        header(bytes): The first bytes of the file (see `read_file_header`)
+
+    Returns:
+        str or None: The lowercase extension the content belongs to (e.g.,
+            '.pdf', '.png', '.txt') or None if it is not recognized
+
+    Raises:
+        None
+    """
+
+    match = CONTENT_PATTERN.match(header)
+    if match:
+        return CONTENT_SIGNATURES[match.lastindex - 1][1]
+
+    #empty files have no content to recognize
+    if not header or b"\x00" in header:
+        return None
+
+    #the header may cut the last character of the text short
+    try:
+        header.decode("utf-8")
+    except UnicodeDecodeError as e:
+        if e.reason != "unexpected end of data" or e.start < len(header) - 3:
+            return None
+
+    return ".txt"
+
+
+
+
+def detect_content_type(path, stat_result = None):
+    """Determines the type of a file from its content with `match_content`.
+    Results are kept in a least recently used cache keyed by the device,
+    inode, modification time and size of the file, so a file is only read
+    again after it changes. Safe to call from several threads at once.
+
+    Args:
+        path(str): The path of the file
+        stat_result(os.stat_result, optional): The stat of the file if it
+            is already known. Defaults to None for calling `os.stat`.
+
+    Returns:
+        str or None: The lowercase extension the content belongs to, or None
+            if it is not recognized or the file could not be read
+
+    Raises:
+        None
+    """
+
+    try:
+        if stat_result is None:
+            stat_result = os.stat(path)
+        key = (stat_result.st_dev, stat_result.st_ino,
+               stat_result.st_mtime_ns, stat_result.st_size)
+
+        with content_cache_lock:
+            if key in content_cache:
+                content_cache.move_to_end(key)
+                return content_cache[key]
+
+        content = match_content(read_file_header(path))
+
+    except OSError:
+        return None
+
+    with content_cache_lock:
+        content_cache[key] = content
+
+        #forgets the least recently used file once the cache is full
+        if len(content_cache) > CONTENT_CACHE_SIZE:
+            content_cache.popitem(last = False)
+
+    return content
+
+
+
+
+def detect_item_categories(records, detect_content = "missing",
+                           max_workers = 16, batch_size = 1024):
+    """Replaces the categories of item records with the type of their content
+    found by `detect_content_type`. The files of each batch of records are
+    read in a pool of threads, so the time spent opening and reading them
+    overlaps. Records are yielded in the order they were given.
+
+    Args:
+        records(iterable[tuple[str, str, int]]): (path, category, size)
+            records such as the ones yielded by `walk_items`
+        detect_content(str, optional): "missing" to only detect the files in
+            the 'No Extension' category, or "all" to detect every file and
+            replace the extensions their content contradicts. Extensions
+            known to share a signature (e.g., '.docx' files are zip files)
+            are kept. Defaults to "missing".
+        max_workers(int, optional): The amount of threads. Defaults to 16.
+        batch_size(int, optional): The amount of records detected at once.
+            Defaults to 1024.
+
+    Yields:
+        tuple[str, str, int]: Each record with its category replaced when
+            the content of the file was recognized
+
+    Raises:
+        Exception: Any error raised by iterating over records
+    """
+
+    records = iter(records)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+
+        while True:
+            batch = list(itertools.islice(records, batch_size))
+            if not batch:
+                break
+
+            #the positions of the files in the batch that are detected
+            checked = [index for index, (path, category, size) in enumerate(batch)
+                       if is_content_checked(category, detect_content)]
+
+            detected = executor.map(detect_content_type,
+                                    [batch[index][0] for index in checked])
+
+            for index, content in zip(checked, detected):
+                path, category, size = batch[index]
+                batch[index] = (path, get_content_category(category, content),
+                                size)
+
+            yield from batch
+
+
+
+
+def is_content_checked(category, detect_content):
+    """Checks whether `detect_item_categories` reads the content of the files
+    of a category
+
+    Args:
+        category (str): The category of the file by its extension
+        detect_content (str): "missing" or "all", as in
+            `detect_item_categories`
+
+    Returns:
+        bool: True if the content of the file is read
+
+    Raises:
+        None
+    """
+
+    return category == "No Extension" or (
+        detect_content == "all" and category.startswith("."))
+
+
+
+
+def get_content_category(category, content):
+    """Gets the category of a file from its category by extension and the
+    type of its content found by `detect_content_type`
+
+    Args:
+        category (str): The category of the file by its extension
+        content (str or None): The type of its content, or None if it was
+            not recognized
+
+    Returns:
+        str: The category of the file
+
+    Raises:
+        None
+    """
+
+    if content is None:
+        return category
+
+    #files with an extension are only moved out of it when their content is
+    #a different, binary type
+    if category == "No Extension" or (
+            content != ".txt" and content != category and
+            category not in CONTENT_ALIASES.get(content, ())):
+        return content
+
+    return category
+
+
+
+
+def scan_items(folder_path, cache_file = None):
+    """Lists and classifies all of the items with in a folder in a single pass
+    over `os.scandir`. This is the shared engine behind `list_items_by_type`,
+    `group_items` and `create_bucket_folders`.
+
+    With a cache_file the listing is kept in a `ScanCache`, so a folder that
+    has not changed since it was last scanned is not listed again. The cache
+    only speeds scans up, so if it can not be used the folder is scanned
+    without it.
+
+    Args:
+        folder_path(str): The path of the folder
+        cache_file(str, optional): The path to the cache. Defaults to None
+            for not caching.
+
+    Returns:
+        list[tuple[str, str, str | None]]: A list of tuples where each tuple
+            holds the item name, the item type ('File', 'Folder', or
+            'Improper File') and the lowercase extension or None.
+
+    Raises:
+        FileNotFoundError: If the folder does not exist
+        PermissionError: If the folder can not be accessed
+        OSError: If the folder could not be listed for any other reason
+    """
+
+    #the listing is timed while metrics are enabled
+    recorder = metrics
+    if recorder is not None:
+        start = time.perf_counter()
+
+    if cache_file is not None:
+        try:
+            with ScanCache(cache_file) as cache:
+                items = cache.scan(folder_path)
+            if recorder is not None:
+                recorder.observe("listing", time.perf_counter() - start)
+                recorder.count("items", len(items))
+            return items
+        except sqlite3.Error as e:
+            record_error("listing", e)
+
+    #list of the names and types of every item in the folder
+    items = []
+
+    #the scandir iterator is closed once every entry has been read
+    with os.scandir(folder_path) as entries:
+
+        #classifies every entry using the type cached by scandir
+        for entry in entries:
+            item_type, extension = classify_entry(entry)
+            items.append((entry.name, item_type, extension))
+
+    if recorder is not None:
+        recorder.observe("listing", time.perf_counter() - start)
+        recorder.count("syscalls")
+        recorder.count("items", len(items))
+
+    return items
+
+
+
+
+class ScanCache:
+    """A persistent cache of folder listings stored in an SQLite database, so
+    repeated scans of folders that have not changed make no listing or stat
+    system calls. One cache file can hold any amount of folders.
+
+    The listing of each folder is stored whole as a single value, so a
+    folder that has not changed is served with one read and one decode and
+    no per-item work. A folder is only listed again when its modification
+    time, device or inode has changed, since adding, removing or renaming an
+    item always changes the modification time of its folder. It is then
+    listed like `scan_items` does, classifying each item from its d_type,
+    so only the items whose type is ambiguous (symbolic links, or file
+    systems without d_type) are stat'ed. Folders modified within
+    `CACHE_RACY_NS` of their last listing are always listed again, since a
+    change made in the same clock tick would not change their modification
+    time.
+
+    The first scan of a folder costs a listing plus a write to the cache,
+    and every scan costs opening the database. Large folders that rarely
+    change gain the most; small folders, and folders that change between
+    most scans, are faster without the cache (see `benchmark_scan_cache` in
+    FileOperatorBenchmark.py for the break-even point on a given machine).
+
+    Usage:
+        with ScanCache("folders.cache") as cache:
+            items = cache.scan(folder_path)
+    """
+
+    def __init__(self, file_name):
+
+        #the path to the cache
+        self.file_name = file_name
+
+        #waits for other processes writing to the same cache
+        self.connection = sqlite3.connect(file_name, timeout = 30)
+
+        #Lets readers work while another process writes, which is not
+        #supported on every file system
+        try:
+            self.connection.execute("PRAGMA journal_mode = WAL")
+        except sqlite3.Error:
+            pass
+
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS listings (path TEXT PRIMARY KEY, "
+                "dev INTEGER, ino INTEGER, mtime_ns INTEGER, scanned_ns INTEGER, "
+                "items BLOB)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def scan(self, folder_path):
+        """Lists and classifies all of the items with in a folder like
+        `scan_items`, using the cache when the folder has not changed
+
+        Args:
+            folder_path(str): The path of the folder
+
+        Returns:
+            list[tuple[str, str, str | None]]: The name, type and lowercase
+                extension (or None) of every item, in order of name
+
+        Raises:
+            FileNotFoundError: If the folder does not exist
+            PermissionError: If the folder can not be accessed
+            OSError: If the folder could not be listed for any other reason
+            sqlite3.Error: If the cache could not be read or written
+        """
+
+        folder_path = os.path.abspath(folder_path)
+        folder_stat = os.stat(folder_path)
+
+        row = self.connection.execute(
+            "SELECT dev, ino, mtime_ns, scanned_ns, items FROM listings "
+            "WHERE path = ?", (folder_path,)).fetchone()
+
+        #the cached listing is used when the folder is the same one, has not
+        #been modified since, and was not modified just before being listed
+        if (row is not None and
+                row[:3] == (folder_stat.st_dev, folder_stat.st_ino,
+                            folder_stat.st_mtime_ns) and
+                folder_stat.st_mtime_ns < row[3] - CACHE_RACY_NS):
+
+            #a listing written by another version of Python may not be
+            #readable, in which case the folder is listed again
+            try:
+                return marshal.loads(row[4])
+            except (ValueError, EOFError, TypeError) as e:
+                record_error("listing", e)
+
+        #taken before listing so changes made during the listing are racy
+        scanned_ns = time.time_ns()
+
+        #classifies every entry from its d_type, which only stats the entries
+        #whose type is ambiguous
+        items = []
+        with os.scandir(folder_path) as entries:
+            for entry in entries:
+                item_type, extension = classify_entry(entry)
+                items.append((entry.name, item_type, extension))
+
+        items.sort()
+
+        #replaces the cached folder
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO listings VALUES (?, ?, ?, ?, ?, ?)",
+                (folder_path, folder_stat.st_dev, folder_stat.st_ino,
+                 folder_stat.st_mtime_ns, scanned_ns, marshal.dumps(items)))
+
+        return items
+
+    def close(self):
+        #closes the database
+        self.connection.close()
+
+
+
+
+def walk_items(folder_path, max_depth = None, follow_symlinks = False,
+               exclude = None, detect_content = None, category_rules = None):
+    """Recursively walks a folder with `os.scandir` and yields a record for
+    every item that is not a folder as soon as it is found. Nothing but the
+    folders still waiting to be walked is kept in memory, so the walk can be
+    consumed while it is still running on trees with millions of entries.
+
+    Args:
+        folder_path(str): The path of the folder to walk
+        max_depth(int, optional): How many levels of subfolders are walked.
+            0 only walks the items directly in folder_path. Defaults to None
+            for no limit.
+        follow_symlinks(bool, optional): Whether symbolic links to folders are
+            walked into. Defaults to False.
+        exclude(list[str], optional): Glob patterns (e.g., '*.tmp', '.git')
+            matched against the name and the path relative to folder_path of
+            every item. Matching items and folders are skipped. Defaults to
+            None.
+        detect_content(str, optional): "missing" or "all" to categorize
+            files by their content with `detect_item_categories`. Defaults
+            to None for categorizing files by their extension only.
+        category_rules(CategoryRules, optional): The rules giving the
+            category of every item. Defaults to None for
+            `DEFAULT_CATEGORY_RULES`.
+
+    Yields:
+        tuple[str, str, int]: The full path of the item, its category
+            (e.g., '.txt', 'No Extension', 'Improper File') and its size in
+            bytes (0 for improper files).
+
+    Raises:
+        FileNotFoundError: If folder_path does not exist
+        PermissionError: If folder_path can not be accessed
+        OSError: If folder_path could not be listed for any other reason.
+            Subfolders that can not be listed are skipped.
+    """
+
+    #the records of the walk are passed through the content detector
+    if detect_content:
+        yield from detect_item_categories(
+            walk_items(folder_path, max_depth, follow_symlinks, exclude,
+                       category_rules = category_rules),
+            detect_content)
+        return
+
+    get_category = (category_rules or DEFAULT_CATEGORY_RULES).get_category
+
+    #the listings are counted while metrics are enabled
+    recorder = metrics
+
+    #compiles every exclude pattern into a single expression so each item
+    #only gets matched once
+    excluded = None
+    if exclude:
+        excluded = re.compile("|".join(fnmatch.translate(pattern)
+                                       for pattern in exclude))
+
+    #folders waiting to be walked along with their depth
+    pending = [(folder_path, 0)]
+
+    #identities of the folders already walked, used to stop symbolic link
+    #loops when links are followed
+    visited = set()
+    if follow_symlinks:
+        stat = os.stat(folder_path)
+        visited.add((stat.st_dev, stat.st_ino))
+
+    while pending:
+
+        current_path, depth = pending.pop()
+
+        #The root folder must be listable however subfolders that can not be
+        #listed are skipped so the rest of the tree can still be walked
+        try:
+            entries = os.scandir(current_path)
+        except OSError as e:
+            if current_path == folder_path:
+                raise
+            record_error("listing", e)
+            continue
+
+        #the items yielded from this folder, each of which was stat'ed
+        listed = 0
+
+        with entries:
+            for entry in entries:
+
+                #skips the entry if its name or relative path is excluded
+                if excluded and (excluded.match(entry.name) or excluded.match(
+                        os.path.relpath(entry.path, folder_path))):
+                    continue
+
+                item_type, extension = classify_entry(entry)
+
+                if item_type == "Folder":
+
+                    #stops once the maximum depth has been reached
+                    if max_depth is not None and depth >= max_depth:
+                        continue
+
+                    #Links are only walked into if asked to and when they
+                    #are, every folder is identified so none is walked twice
+                    try:
+                        if entry.is_symlink() and not follow_symlinks:
+                            continue
+                        if follow_symlinks:
+                            stat = entry.stat()
+                            if (stat.st_dev, stat.st_ino) in visited:
+                                continue
+                            visited.add((stat.st_dev, stat.st_ino))
+                    except OSError:
+                        continue
+
+                    #the folder is walked after the rest of this folder
+                    pending.append((entry.path, depth + 1))
+
+                else:
+
+                    #the size of the file, improper files have no size
+                    size = 0
+                    stat_result = None
+                    if item_type == "File":
+                        try:
+                            stat_result = entry.stat()
+                            size = stat_result.st_size
+                        except OSError:
+                            pass
+
+                    listed += 1
+                    yield (entry.path,
+                           get_category(entry.name, item_type, extension,
+                                        entry.path, stat_result),
+                           size)
+
+        if recorder is not None:
+            recorder.count("syscalls", 1 + listed)
+            recorder.count("items", listed)
+
+
+
+
+def list_items_by_type(folder_path, cache_file = None):
+    """Lists all of the items from a folder to the console and outputs their
+    extension and type. If any errors occur during processing they are printed
+    to the console. 
+
+    Args:
+        folder_path(str): The full path of the folder
+        cache_file(str, optional): The path to a `ScanCache` the listing is
+            kept in. Defaults to None for not caching.
+
+    Returns:
+        None: Prints to the console
+
+    Raises: 
+        None: Handles all errors internally
+    """
+
+    
+    #Attempts to list out all of the items in a folder along with their type
+    #and given extension. Generating a list of items from an ambiguous
+    #directory can cause multiple errors which are handled in the try-block
+    try:
+
+        #Attempts to get all of the items from the folder path along with
+        #their type and extension and can generate exceptions such as
+        #"FolderNotFoundError" and "FolderAccessError" when trying to access
+        items = get_items(folder_path, cache_file)
+
+        if not items:
+            #incase the folder is empty
+            print(f"\n\t{folder_path} is empty")
+
+        else:
+
+            #outputs the starting header for the contents
+            lines = [f"\n\t----- Contents of {folder_path} With Type ------"]
+
+            #adds the name, type and extension of every item in the folder
+            #followed by an intermediate line
+            for item in items:
+                lines.append(f"\t{item.name}\n\tType: {item.item_type}\n"
+                             f"\tExtension: {item.extension}\n")
+
+            #ending header for the folder contents
+            lines.append(f"\n\t-----         End of {folder_path}        ------")
+
+            #the whole listing is written to the console at once
+            print("\n".join(lines))
+
+    except FolderNotFoundError:
+
+        #incase the file could not be found
+        print(f"\n\tFolder {folder_path} not found")
+
+    except FolderAccessError:
+
+        #incase the file could not be accessed
+        print(f"\n\tFolder {folder_path} could not be accessed")
+
+    except Exception as e:
+
+        #incase any ambiguous errors occur
+        record_error("listing", e)
+        print(f"\n\tAn error {e} occurred")
+
+        
+
+
+def group_items(folder_path, cache_file = None, detect_content = None,
+                category_rules = None):
+    """Constructs a dictionary from a folder path where each category is an 
+    item type and returns None if the folder could not be operated on
+
+    Args:
+        folder_path(str): The path of the folder 
+        cache_file(str, optional): The path to a `ScanCache` the listing is
+            kept in. Defaults to None for not caching.
+        detect_content(str, optional): "missing" or "all" to categorize
+            files by their content, see `detect_item_categories`. Defaults
+            to None for categorizing files by their extension only.
+        category_rules(CategoryRules, optional): The rules giving the
+            category of every item. Defaults to None for
+            `DEFAULT_CATEGORY_RULES`.
+
+    Returns:
+        dict[str, list[str]] or None: A dictionary where keys are category names
+            (e.g., 'Folder', '.txt', 'No Extension', 'Improper File') and
+            values are lists of item names (str) belonging to that category.
+            Returns None if an error occurs (e.g., folder not found,
+            permission issues).
+
+    Raises:
+        None: All errors handled internally
+    """
+
+    #dictionary for holding the string names of items in a folder and storing
+    #them by type
+    sorted_types = {}
+
+    #Attempts to create a list of items from an ambiguous folder path. If the
+    #folder can not be accessed in any way then nothing can be sorted therefore,
+    #None is returned.
+    try:
+
+        #Tries to store the names and types of all of the items in the folder
+        #to a list and can generate errors from doing so
+        phase = "listing"
+        items = scan_items(folder_path, cache_file)
+        phase = "classify"
+
+        #the categorizing is timed while metrics are enabled
+        recorder = metrics
+        if recorder is not None:
+            start = time.perf_counter()
+
+        #the group each item belongs in
+        category_rules = category_rules or DEFAULT_CATEGORY_RULES
+        get_category = category_rules.get_category
+
+        #the paths are only needed by rules on the size or age of files
+        if category_rules.needs_stat:
+            prefix = os.path.join(folder_path, "")
+            categories = (get_category(item_name, item_type, extension,
+                                       prefix + item_name)
+                          for item_name, item_type, extension in items)
+        else:
+            categories = (get_category(item_name, item_type, extension)
+                          for item_name, item_type, extension in items)
+
+        #files are read to recognize their content if asked to
+        if detect_content:
+            records = detect_item_categories(
+                ((os.path.join(folder_path, item[0]), category, 0)
+                 for item, category in zip(items, categories)), detect_content)
+            categories = (category for path, category, size in records)
+
+        #Loops through each and every item in the list
+        for (item_name, item_type, extension), category in zip(items, categories):
+
+            if category not in sorted_types:
+                #if the item belongs in a new category
+                sorted_types[category] = [item_name]
+            else:
+                #if the item belongs in an existing category
+                sorted_types[category].append(item_name)
+
+        if recorder is not None:
+            recorder.observe("classify", time.perf_counter() - start)
+
+        return sorted_types
+
+    except Exception as e:
+        #if any problems occured then nothing should be returned
+        record_error(phase, e)
+        return None
+
+
+
+
+
+def output_items_by_group(folder_path, cache_file = None):
+    """Outputs each possible group for all of the items in a folder based on
+    the item type of each item in the folder. If any errors occur when 
+    processing the folder then it is printed to the console.
+
+        Args:
+            folder_path(str): The path to the folder containing the groupable
+            items
+            cache_file(str, optional): The path to a `ScanCache` the listing
+            is kept in. Defaults to None for not caching.
+
+        Returns: 
+            None: Only prints to the console
+    
+        Raises:
+            None: No operations generate errors
+    """
+
+    #dictionary to store the items by type
+    grouped_items = group_items(folder_path, cache_file)
+
+    #incase the dictionary could not be generated
+    if not grouped_items:
+        #outputs the problem and ends the function
+        print(f"\n\tThe items in {folder_path} could not be grouped")
+        return
+
+    #the header for the item groups in the folder
+    lines = [f"\n\t----- Items in {folder_path} by Group\n"]
+    
+    #goes through all categories in the dictionary
+    for category in grouped_items:
+
+        #adds the category name
+        lines.append(f"\n\t{category}:")
+
+        #adds the file names of all items in the category
+        lines.extend(f"\t\t{item}" for item in grouped_items[category])
+
+    #the groups are written to the console at once
+    print("\n".join(lines))
+
+
+def get_bucket_name(category):
+    """Determines the name of the subfolder (bucket) that items of a category
+    are moved into
+
+    Args:
+        category(str): The category of an item (e.g., '.txt', '.h',
+            'No Extension', 'Improper File', 'Folder')
+
+    Returns:
+        str or None: The name of the bucket (e.g., 'TXT', 'DOT_H',
+            'No Extension', 'Improper File') or None for folders since they
+            are not moved
+
+    Raises:
+        None
+    """
+
+    if category == "Folder":
+        #folders do not belong in a bucket
+        return None
+
+    elif category == "Improper File" or category == "No Extension":
+        #the outsider cases are named after their category
+        return category
+
+    #the name of the folder is the extension with out the "."
+    folder_name = category[1:].upper()
+
+    #incase the extension is single like a ".h" then the folder
+    #is named "DOT_H"
+    if len(folder_name) == 1:
+        folder_name = "DOT_" + folder_name
+
+    return folder_name
+
+
+
+
+class CategoryRules:
+    """A declarative set of rules deciding the category and bucket of every
+    file, compiled once into lookup tables so sorting a folder does no
+    per-item work beyond a few dictionary lookups. Without rules it gives
+    the same categories as `get_item_category` and the same buckets as
+    `get_bucket_name`.
+
+    Every rule is a dictionary with a 'category' and any of the keys:
+        'bucket' (str): The name of the bucket of the category, instead of
+            the one given by `get_bucket_name` for an extension, or the
+            category itself for any other name (e.g., 'Images')
+        'extensions' (str or list[str]): The extensions of the category,
+            which may have several parts (e.g., '.tar.gz')
+        'glob' (str): A pattern the whole name must match, ignoring case
+        'min_size', 'max_size' (int): Bounds on the size in bytes
+        'min_age', 'max_age' (float): Bounds on the seconds since the file
+            was modified
+
+    Rules with a 'glob', size or age are checked first in the order given,
+    and the first one matching decides the category. Otherwise the longest
+    multi-part extension decides it, then the plain extension, and files
+    no rule matches are categorized by `get_item_category`. Only files are
+    given categories by rules.
+
+    Usage:
+        rules = CategoryRules([
+            {"category": "Images", "extensions": [".jpg", ".png"]},
+            {"category": ".tar.gz", "bucket": "TAR_GZ",
+             "extensions": ".tar.gz"},
+            {"category": "Old Logs", "glob": "*.log", "min_age": 86400},
+        ])
+        category = rules.get_category(name, "File", extension)
+        bucket = rules.get_bucket(category)
+
+    Raises:
+        ValueError: If a rule has no category or has an unknown key
+        re.error: If a glob could not be compiled
+    """
+
+    #the keys that make a rule depend on more than the extension
+    PREDICATE_KEYS = ("glob", "min_size", "max_size", "min_age", "max_age")
+
+    def __init__(self, rules = None):
+
+        #the category of every single-part extension
+        self.exact = {}
+
+        #the categories of multi-part extensions, as a trie of extension
+        #parts from the last one on, the category is under the key None
+        self.suffixes = {}
+
+        #(glob, extensions, min_size, max_size, min_age, max_age, category)
+        #tuples checked in order
+        self.predicates = []
+
+        #the bucket of every category seen so far
+        self.buckets = {}
+
+        #whether the rules need the size or modification time of files
+        self.needs_stat = False
+
+        #the globs of every predicate rule compiled into one expression, and
+        #the rule of the group of every glob
+        self.globs = None
+        self.glob_rules = {}
+
+        rules = list(rules or [])
+
+        for rule in rules:
+
+            unknown = set(rule) - {"category", "bucket", "extensions",
+                                   *self.PREDICATE_KEYS}
+            if "category" not in rule or unknown:
+                raise ValueError(f"Invalid category rule {rule!r}")
+
+            category = rule["category"]
+            if rule.get("bucket"):
+                self.buckets[category] = rule["bucket"]
+
+            #a category that is not an extension is its own bucket
+            elif not category.startswith("."):
+                self.buckets.setdefault(category, category)
+
+            extensions = rule.get("extensions") or []
+            if isinstance(extensions, str):
+                extensions = [extensions]
+            extensions = ["." + extension.lower().lstrip(".")
+                          for extension in extensions]
+
+            if any(key in rule for key in self.PREDICATE_KEYS):
+
+                glob = None
+                if rule.get("glob"):
+                    glob = re.compile(fnmatch.translate(rule["glob"]),
+                                      re.IGNORECASE).match
+
+                self.predicates.append((glob, tuple(extensions) or None,
+                                        rule.get("min_size"),
+                                        rule.get("max_size"),
+                                        rule.get("min_age"),
+                                        rule.get("max_age"), category))
+
+                if any(rule.get(key) is not None for key in
+                       ("min_size", "max_size", "min_age", "max_age")):
+                    self.needs_stat = True
+                continue
+
+            for extension in extensions:
+
+                #the first rule giving an extension a category wins
+                parts = extension[1:].split(".")
+                if len(parts) == 1:
+                    self.exact.setdefault(extension, category)
+                    continue
+
+                node = self.suffixes
+                for part in reversed(parts):
+                    node = node.setdefault(part, {})
+                node.setdefault(None, category)
+
+        #names are matched against every glob at once when every predicate
+        #rule has one, otherwise each rule is checked in turn
+        globs = [rule.get("glob") for rule in rules
+                 if any(key in rule for key in self.PREDICATE_KEYS)]
+        if globs and all(globs):
+            pattern = re.compile("|".join(
+                f"(?P<rule{index}>{fnmatch.translate(glob)})"
+                for index, glob in enumerate(globs)), re.IGNORECASE)
+            self.globs = pattern.match
+            self.glob_rules = {pattern.groupindex[f"rule{index}"]: index
+                               for index in range(len(globs))}
+
+    def match_predicates(self, name, path, stat_result):
+        #gives the category of the first predicate rule matching the file
+        now = None
+
+        #skips straight to the first rule whose glob matches
+        start = 0
+        if self.globs is not None:
+            match = self.globs(name)
+            if match is None:
+                return None
+            start = self.glob_rules[match.lastindex]
+
+        for (glob, extensions, min_size, max_size, min_age, max_age,
+             category) in itertools.islice(self.predicates, start, None):
+
+            if glob is not None and not glob(name):
+                continue
+            if extensions is not None and not name.lower().endswith(extensions):
+                continue
+
+            if (min_size is not None or max_size is not None or
+                    min_age is not None or max_age is not None):
+
+                #the file is only read once even with several rules
+                if stat_result is None:
+                    if path is None:
+                        continue
+                    try:
+                        stat_result = os.stat(path)
+                    except OSError:
+                        continue
+
+                size = stat_result.st_size
+                if min_size is not None and size < min_size:
+                    continue
+                if max_size is not None and size > max_size:
+                    continue
+
+                if min_age is not None or max_age is not None:
+                    if now is None:
+                        now = time.time()
+                    age = now - stat_result.st_mtime
+                    if min_age is not None and age < min_age:
+                        continue
+                    if max_age is not None and age > max_age:
+                        continue
+
+            return category
+
+        return None
+
+    def get_category(self, name, item_type, extension, path = None,
+                     stat_result = None):
+        """Gives the category of an item
+
+        Args:
+            name (str): The name of the item
+            item_type (str): 'File', 'Folder' or 'Improper File'
+            extension (str | None): The lowercase extension of the item
+            path (str, optional): The path of the item, used to read its
+                size and modification time when a rule needs them and
+                stat_result is not given. Defaults to None.
+            stat_result (os.stat_result, optional): The status of the item.
+                Defaults to None.
+
+        Returns:
+            str: The category of the item
+        """
+
+        if item_type != "File":
+            return item_type
+
+        if self.predicates:
+            category = self.match_predicates(name, path, stat_result)
+            if category is not None:
+                return category
+
+        #only names with several dots can have a multi-part extension
+        if self.suffixes and name.count(".") > 1:
+            parts = name.lower().lstrip(".").split(".")
+            node = self.suffixes
+            category = None
+
+            #follows the parts from the last one for the longest extension,
+            #the first part is the stem and never an extension
+            for part in reversed(parts[1:]):
+                node = node.get(part)
+                if node is None:
+                    break
+                category = node.get(None, category)
+
+            if category is not None:
+                return category
+
+        #the categories of extensions no rule gives are added once found
+        try:
+            return self.exact[extension]
+        except KeyError:
+            category = self.exact[extension] = get_item_category(item_type,
+                                                                 extension)
+            return category
+
+    def get_bucket(self, category):
+        """Gives the name of the bucket of a category, or None for folders,
+        see `get_bucket_name`"""
+
+        try:
+            return self.buckets[category]
+        except KeyError:
+            bucket = self.buckets[category] = get_bucket_name(category)
+            return bucket
+
+
+
+
+#the rules used when none are given, which categorize files by extension
+DEFAULT_CATEGORY_RULES = CategoryRules()
+
+
+
+
+def create_bucket_folders(folder_path, recursive = False, max_depth = None,
+                          follow_symlinks = False, exclude = None,
+                          detect_content = None, category_rules = None):
+    """
+    Creates subfolders within the specified folder_path based on item categories
+    derived from `group_items`. It then returns a dictionary mapping the
+    names of these created/ensured subfolders to the lists of items
+    belonging to those original categories. This is an interactive wrapper
+    over `make_bucket_folders`, which returns `Bucket` results and raises
+    typed errors instead of printing them.
+
+    The function first groups items using `group_items`. For each category
+    that is not 'Folder', it determines a target subfolder name using
+    `get_bucket_name` (e.g., uppercasing file extensions, using "DOT_" prefix
+    for single-character extensions, or using names like "No Extension"
+    directly). It then ensures these subfolders exist using
+    `os.makedirs(exist_ok=True)`.
+
+    Args:
+        folder_path (str): The full path to the main folder where subfolders
+                           will be created.
+        recursive (bool, optional): Whether the items of every subfolder are
+                           grouped as well using `walk_items`. Defaults to
+                           False.
+        max_depth, follow_symlinks, exclude (optional): Passed to
+                           `walk_items` when recursive is True.
+        detect_content (str, optional): "missing" or "all" to sort files by
+                           their content, see `detect_item_categories`.
+                           Defaults to None.
+        category_rules (CategoryRules, optional): The rules giving the
+                           category and bucket of every file. Defaults to
+                           None for `DEFAULT_CATEGORY_RULES`.
+
+    Returns:
+        dict[str, list[str]] or None:
+            On success, a dictionary where keys are the names of the
+            created/ensured subfolders (e.g., 'TXT', 'DOT_C', 'No Extension')
+            and values are the lists of item names (str) that belong to the
+            original category corresponding to that subfolder. When
+            recursive is True the items are paths relative to folder_path.
+            Returns None if `group_items` fails, if no groups are found,
+            or if a critical error occurs during folder creation.
+
+    Raises:
+        None: Handles errors from `group_items` or `os.makedirs`
+              internally by printing an error message and returning None.
+              (External interrupts like KeyboardInterrupt can still occur).
+    """
+
+    #Creates the buckets, the most likely error to occur here is a permission
+    #error when creating directories with in a folder
+    try:
+        buckets = make_bucket_folders(folder_path, recursive, max_depth,
+                                      follow_symlinks, exclude, detect_content,
+                                      category_rules)
+
+    #Incase creating a folder generated an error then the error is printed
+    except BucketCreationError as e:
+        record_error("mkdir", e)
+        print("\n\tERROR - Creating folders could not be done")
+        print(f"\n\tERROR - {e}")
+
+        #None is returned to signal operation failure
+        return None
+
+    #incase the folder could not be grouped no folders were created
+    except Exception as e:
+        record_error("listing", e)
+        return None
+
+    #incase there were no items no folder dictionary should be returned
+    if not buckets:
+        return None
+
+    #returns the dictionary of the folders and the files that belong in them
+    return {bucket.name: bucket.items for bucket in buckets}
+
+
+
+def assign_folders(folder_path, recursive = False, max_depth = None,
+                   follow_symlinks = False, exclude = None,
+                   journal_file = None, detect_content = None,
+                   duplicates = None, category_rules = None):
+    """Moves files from a specified base folder into categorized subfolders.
+    This is an interactive wrapper over `sort_folder`, which returns a
+    `SortReport` and raises typed errors instead of printing them.
+
+    The moves are planned by `iter_move_plan`, which determines the
+    destination subfolder (bucket) for each file based on its
+    type/extension, and carried out by `iter_apply_plan`, which creates
+    the buckets as they are needed and moves each file into its bucket.
+    Both run while the folder is still being walked, so moving starts
+    right away and memory stays flat on very large folders. Files already
+    in their bucket are left alone and files whose name is already taken
+    in their bucket are not moved.
+
+    Errors during individual file moves (e.g., permission issues, file
+    not found at the time of move) are caught, the function continues with
+    the other files, and every error is printed to the console once sorting
+    is done.
+
+    Args:
+        folder_path (str): The full path to the main folder containing the
+                           source files that need to be moved and where the
+                           destination subfolders (buckets) have been or will
+                           be created.
+        recursive (bool, optional): Whether the files in every subfolder are
+                           moved as well. Defaults to False.
+        max_depth, follow_symlinks, exclude (optional): Passed to
+                           `walk_items` when recursive is True.
+        journal_file (str, optional): A journal the moves are recorded in
+                           so an interrupted run can be resumed or undone,
+                           see `iter_apply_plan`. Defaults to None.
+        detect_content (str, optional): "missing" or "all" to sort files by
+                           their content, see `detect_item_categories`.
+                           Defaults to None.
+        duplicates (str, optional): "hardlink" or "delete" to remove the
+                           duplicate files of every bucket files were moved
+                           into once sorting is done, see
+                           `remove_duplicates`. Defaults to None for
+                           keeping duplicates.
+        category_rules (CategoryRules, optional): The rules giving the
+                           category and bucket of every file. Defaults to
+                           None for `DEFAULT_CATEGORY_RULES`.
+
+    Returns:
+        None: This function performs file system operations and prints status
+              or error messages directly to the console.
+
+    Raises:
+        None: Handles errors from walking the folder (by returning early
+              if it fails) and individual file move operations internally by
+              printing messages. (External interrupts like KeyboardInterrupt
+              can still occur).
+    """
+
+    #A failure here means that folder_path itself could not be walked
+    try:
+        report = sort_folder(folder_path, recursive, max_depth, follow_symlinks,
+                             exclude, journal_file, detect_content, duplicates,
+                             category_rules = category_rules)
+
+    except (FolderNotFoundError, FolderAccessError) as e:
+        print(f"\n\tERROR - {folder_path} could not be walked due to {e}")
+        return
+
+    except Exception as e:
+        record_error("move", e)
+        print(f"\n\tERROR - {folder_path} could not be sorted due to {e}")
+        return
+
+    #the errors are written to the console at once
+    lines = []
+
+    for result in report.failed:
+        #incase the specific file could not be moved
+        lines.append(f"\n\tERROR: Could not move {result['source']} due to "
+                     f"{result['error']}")
+
+    #if there are no files to move
+    if not (report.moved or report.skipped or report.failed):
+        lines.append("\n\tERROR - No files to move")
+
+    for result in report.duplicates:
+        if result["status"] == "failed":
+            lines.append(f"\n\tERROR: Could not remove duplicate "
+                         f"{result['path']} due to {result['error']}")
+
+    if lines:
+        print("\n".join(lines))
+
+
+
+
+
+def move_file(source, dest, on_copied = None):
+    """Moves a single file without ever overwriting the destination. The
+    move is first attempted with `os.rename`; only when the destination is
+    on another device (EXDEV) is the file copied into a temporary file next
+    to the destination, synced to disk, renamed into place and then removed
+    from its source. An interrupted copy therefore never leaves a partial
+    file at dest.
+
+    Args:
+        source (str): The path of the file to move
+        dest (str): The path the file is moved to
+        on_copied (callable, optional): Called without arguments once a copy
+            across devices is complete and on disk, before its source is
+            removed. Defaults to None.
+
+    Returns:
+        str: 'rename' if the file was renamed in place or 'copy' if it had to
+             be copied across devices
+
+    Raises:
+        FileExistsError: If dest already exists
+        OSError: If the file could not be renamed, copied or removed
+    """
+
+    #os.rename silently replaces existing files on some platforms
+    if os.path.lexists(dest):
+        raise FileExistsError(errno.EEXIST, "Destination already exists", dest)
+
+    #renaming is a single system call when both paths are on the same device
+    try:
+        os.rename(source, dest)
+        return "rename"
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+
+    #the file is copied next to its destination under a temporary name
+    temp_path = dest + PARTIAL_SUFFIX
+
+    try:
+        shutil.copy2(source, temp_path, follow_symlinks = False)
+
+        #the copy is on disk before anything records it as complete
+        if not os.path.islink(temp_path):
+            fd = os.open(temp_path, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+        os.replace(temp_path, dest)
+
+    except BaseException:
+        #removes the partial copy before passing the error on
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+    #the source is only removed once the copy is complete
+    if on_copied is not None:
+        on_copied()
+    os.unlink(source)
+    return "copy"
+
+
+
+
+def apply_move(move, journal = None):
+    """Makes a single planned move with `move_file` and records its outcome
+
+    Args:
+        move (tuple[str, str, int, str]): The move as a
+            (source, dest, size, category) tuple
+        journal (MoveJournal, optional): The journal a copy across devices is
+            recorded in as 'copied' before its source is removed. Defaults to
+            None.
+
+    Returns:
+        dict: The result of the move with the keys 'source', 'dest', 'size',
+            'category', 'status' ('moved' or 'failed'), 'method' ('rename',
+            'copy' or None) and 'error' (a description of the error or None)
+
+    Raises:
+        None: Errors from the move are recorded in the result
+    """
+
+    source, dest, size, category = move
+
+    result = {"source": source, "dest": dest, "size": size,
+              "category": category, "status": "moved", "method": None,
+              "error": None}
+
+    #the move is timed while metrics are enabled
+    recorder = metrics
+    if recorder is not None:
+        start = time.perf_counter()
+
+    def on_copied():
+        #a completed copy is synced to the journal so `recover_journal`
+        #knows the source may be removed
+        if journal is not None:
+            journal.write("copied", source, dest)
+            journal.sync()
+
+    #attempts to move the file recording any errors in its result
+    try:
+        result["method"] = move_file(source, dest, on_copied)
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = f"{type(e).__name__}: {e}"
+        record_error("move", e)
+
+    if recorder is not None:
+        recorder.observe("move", time.perf_counter() - start)
+        if result["method"] == "copy":
+            #a copy reads and writes the whole file
+            recorder.count("bytes_read", size)
+            recorder.count("bytes_written", size)
+        if result["status"] == "moved":
+            recorder.count("items")
+            recorder.count("syscalls")
+
+    return result
+
+
+
+
+def move_files(moves, max_workers = 4, max_in_flight_bytes = 64 * 1024 * 1024,
+               journal = None):
+    """Moves many files concurrently with `move_file` using a bounded pool of
+    threads. Moves into the same destination folder (bucket) are made one at
+    a time in the order given while different buckets are moved in parallel,
+    so one large file only holds up its own bucket. Moves are started as soon
+    as they are read from moves, which may be a generator.
+
+    Args:
+        moves (iterable[tuple[str, str, int, str]]): The moves to make as
+            (source, dest, size, category) tuples
+        max_workers (int, optional): The amount of moves made at once.
+            Defaults to 4.
+        max_in_flight_bytes (int, optional): The total size of the files
+            being moved at once. A single file larger than the limit is still
+            moved, by itself. Defaults to 64 MiB.
+        journal (MoveJournal, optional): Passed to `apply_move`. Defaults to
+            None.
+
+    Returns:
+        list[dict]: One result for each move in the order given, as
+            described in `apply_move`
+
+    Raises:
+        None: Errors from individual moves are recorded in the results.
+              (Errors raised by the moves iterable itself are passed on).
+    """
+
+    #results along with the position of their move
+    results = []
+
+    #guards the bucket queues, the bytes in flight and the results
+    condition = threading.Condition()
+
+    #the moves waiting in each bucket that currently has a worker
+    queues = {}
+
+    #the total size of the files currently being moved
+    in_flight = [0]
+
+    def run_bucket(bucket):
+        #moves the files queued for a bucket one after another until the
+        #queue is empty
+        while True:
+
+            with condition:
+
+                #the worker stops once its bucket has no moves left
+                if not queues[bucket]:
+                    del queues[bucket]
+                    return
+
+                index, (source, dest, size, category) = queues[bucket].popleft()
+
+                #waits until the file fits within the bytes in flight
+                while in_flight[0] and in_flight[0] + size > max_in_flight_bytes:
+                    condition.wait()
+                in_flight[0] += size
+
+            result = apply_move((source, dest, size, category), journal)
+
+            with condition:
+                in_flight[0] -= size
+                results.append((index, result))
+                condition.notify_all()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+
+        for index, move in enumerate(moves):
+
+            #moves are ordered by the folder they are moved into
+            bucket = os.path.dirname(move[1])
+
+            with condition:
+
+                #the move waits behind the other moves into its bucket
+                if bucket in queues:
+                    queues[bucket].append((index, move))
+                    continue
+
+                queues[bucket] = collections.deque([(index, move)])
+
+            #buckets without a worker are given one
+            executor.submit(run_bucket, bucket)
+
+    #puts the results back into the order of the moves
+    results.sort(key = lambda pair: pair[0])
+    return [result for index, result in results]
+
+
+
+
+def iter_move_plan(folder_path, recursive = False, max_depth = None,
+                   follow_symlinks = False, exclude = None,
+                   detect_content = None, category_rules = None):
+    """Plans the moves that sort a folder into categorized subfolders
+    (buckets) without touching the disk, yielding each move as soon as its
+    file is found by `walk_items`. Files already in their bucket are not
+    planned.
+
+    Args:
+        folder_path (str): The full path to the main folder containing the
+                           source files and the destination buckets
+        recursive (bool, optional): Whether the files in every subfolder are
+                           planned as well. Defaults to False.
+        max_depth, follow_symlinks, exclude (optional): Passed to
+                           `walk_items` when recursive is True.
+        detect_content (str, optional): Passed to `walk_items`. Defaults to
+                           None.
+        category_rules (CategoryRules, optional): The rules giving the
+                           category and bucket of every file. Defaults to
+                           None for `DEFAULT_CATEGORY_RULES`.
+
+    Yields:
+        tuple[str, str, int, str]: A move as (source, dest, size, category)
+
+    Raises:
+        OSError: If folder_path could not be walked
+    """
+
+    #only the items directly in the folder are planned unless recursive
+    if not recursive:
+        max_depth = 0
+
+    category_rules = category_rules or DEFAULT_CATEGORY_RULES
+
+    for path, category, size in walk_items(folder_path, max_depth,
+                                           follow_symlinks, exclude,
+                                           detect_content, category_rules):
+
+        move = get_move(folder_path, path, category, size, category_rules)
+        if move is not None:
+            yield move
+
+
+
+
+def get_move(folder_path, path, category, size, category_rules = None):
+    """Plans the move of one file of a folder into its bucket
+
+    Args:
+        folder_path (str): The full path to the main folder holding the
+                           buckets
+        path (str): The full path of the file
+        category (str): The category of the file
+        size (int): The size of the file in bytes
+        category_rules (CategoryRules, optional): The rules giving the bucket
+                           of the category. Defaults to None for
+                           `DEFAULT_CATEGORY_RULES`.
+
+    Returns:
+        tuple[str, str, int, str] or None: The move as
+            (source, dest, size, category), or None if the file is already in
+            its bucket
+
+    Raises:
+        None
+    """
+
+    category_rules = category_rules or DEFAULT_CATEGORY_RULES
+
+    bucket_path = os.path.join(folder_path, category_rules.get_bucket(category))
+
+    #files that are already in their bucket stay where they are
+    if os.path.dirname(path) == bucket_path:
+        return None
+
+    return (path, os.path.join(bucket_path, os.path.basename(path)), size,
+            category)
+
+
+
+
+def plan_moves(folder_path, recursive = False, max_depth = None,
+               follow_symlinks = False, exclude = None, detect_content = None,
+               category_rules = None):
+    """Builds the complete move plan for sorting a folder with
+    `iter_move_plan`. Nothing on the disk is changed, so the plan can be
+    inspected, saved with `save_plan`, compared with `diff_plans` and later
+    carried out with `apply_plan`.
+
+    Args:
+        folder_path (str): The full path to the main folder containing the
+                           source files and the destination buckets
+        recursive, max_depth, follow_symlinks, exclude, detect_content,
+                           category_rules (optional): Passed to
+                           `iter_move_plan`.
+
+    Returns:
+        list[tuple[str, str, int, str]] or None: The planned moves as
+            (source, dest, size, category) tuples, or None if the folder
+            could not be walked
+
+    Raises:
+        None: All errors handled internally
+    """
+
+    #if the folder can not be walked then nothing can be planned
+    try:
+        return list(iter_move_plan(folder_path, recursive, max_depth,
+                                   follow_symlinks, exclude, detect_content,
+                                   category_rules))
+    except Exception as e:
+        record_error("listing", e)
+        return None
+
+
+
+
+def iter_apply_plan(plan, batch_size = 1000, max_workers = None,
+                    max_in_flight_bytes = 64 * 1024 * 1024, worker_index = 0,
+                    worker_count = 1, journal_file = None, journal = None):
+    """Carries out a move plan in batches, yielding the result of every move.
+    Before each batch is moved the destination folders it needs are created.
+    Batches are moved one file at a time with `apply_move`, or concurrently
+    with `move_files` when max_workers is given.
+
+    The same plan can be split between several processes by giving each one
+    its worker_index out of worker_count. Moves are split by destination
+    folder, so the moves into a bucket all stay in order in one process.
+
+    When a journal_file is given every move is recorded in it with
+    `MoveJournal`: the intent of the whole batch is synced to disk before the
+    batch is moved, a copy across devices is synced as copied before its
+    source is removed and the outcome of each move is synced once the batch
+    is done. An existing journal is first repaired with `recover_journal` and
+    the moves it records as completed are skipped, so an interrupted run can
+    be resumed by applying the same plan with the same journal.
+
+    Args:
+        plan (iterable[tuple[str, str, int, str]]): The moves to make as
+            (source, dest, size, category) tuples, which may be a generator
+        batch_size (int, optional): The amount of moves made per batch.
+            Defaults to 1000.
+        max_workers (int, optional): The amount of moves made at once.
+            Defaults to None for moving one file at a time.
+        max_in_flight_bytes (int, optional): Passed to `move_files`.
+            Defaults to 64 MiB.
+        worker_index (int, optional): The part of the plan carried out by
+            this call. Defaults to 0.
+        worker_count (int, optional): The amount of parts the plan is split
+            into. Defaults to 1.
+        journal_file (str, optional): The path to the journal the moves are
+            recorded in. Defaults to None for no journal.
+        journal (MoveJournal, optional): An open journal the moves are
+            recorded in instead of journal_file, for callers applying many
+            plans with one journal. It is neither repaired nor closed.
+            Defaults to None.
+
+    Yields:
+        dict: The result of each move, as described in `apply_move`. Moves
+            the journal records as completed have the status 'skipped'.
+
+    Raises:
+        None: Errors from individual moves are recorded in the results.
+              (Errors raised by the plan iterable or by writing the journal
+              are passed on).
+    """
+
+    #repairs and opens the journal, unless an open one is given
+    opened = journal is None and bool(journal_file)
+    if opened:
+        recover_journal(journal_file)
+        journal = MoveJournal(journal_file)
+
+    #destination folders that have already been created
+    created = set()
+
+    #the moves of the current batch
+    batch = []
+
+    try:
+
+        #reads the plan a batch at a time, the final batch may be partial
+        for move in itertools.chain(plan, [None]):
+
+            if move is not None:
+
+                #skips the moves that belong to other workers
+                if worker_count > 1:
+                    dest_folder = os.path.dirname(move[1])
+                    key = zlib.crc32(dest_folder.encode("utf-8",
+                                                        "surrogateescape"))
+                    if key % worker_count != worker_index:
+                        continue
+
+                batch.append(move)
+                if len(batch) < batch_size:
+                    continue
+
+            if not batch:
+                break
+
+            outcomes, movable = prepare_move_batch(batch, journal, created)
+
+            if max_workers:
+                results = iter(move_files(movable, max_workers,
+                                          max_in_flight_bytes, journal))
+            else:
+                results = (apply_move(move, journal) for move in movable)
+
+            #yields the results in the order of the batch
+            for index in range(len(batch)):
+
+                if index in outcomes:
+                    yield outcomes[index]
+                    continue
+
+                result = next(results)
+
+                #records the outcome of the move
+                if journal:
+                    if result["status"] == "moved":
+                        journal.write("done", result["source"], result["dest"],
+                                      result["method"])
+                    else:
+                        journal.write("failed", result["source"],
+                                      result["dest"])
+
+                yield result
+
+            #the outcome of the batch is on disk before the next batch starts
+            if journal:
+                journal.sync()
+
+            batch = []
+
+    finally:
+        if opened:
+            journal.close()
+
+
+
+
+def prepare_move_batch(batch, journal = None, created = None):
+    """Prepares a batch of moves of `iter_apply_plan` to be made: the moves
+    the journal records as completed are skipped, the destination folders
+    the other moves need are created and the intent of every move left is
+    synced to the journal
+
+    Args:
+        batch (list[tuple[str, str, int, str]]): The moves of the batch as
+            (source, dest, size, category) tuples
+        journal (MoveJournal, optional): The journal the moves are recorded
+            in. Defaults to None for no journal.
+        created (set[str], optional): The destination folders that have
+            already been created, which folders are added to as they are
+            created. Defaults to None.
+
+    Returns:
+        tuple[dict[int, dict], list[tuple[str, str, int, str]]]: The result
+            of each move that is not made by its position in the batch, as
+            described in `apply_move`, and the moves that can be made
+
+    Raises:
+        OSError: If the journal could not be written
+    """
+
+    if created is None:
+        created = set()
+
+    #the result of each move that is not made, by its position
+    outcomes = {}
+
+    for index, (source, dest, size, category) in enumerate(batch):
+
+        #moves completed by an earlier run are not made again
+        if journal and (source, dest) in journal.completed:
+            outcomes[index] = {"source": source, "dest": dest, "size": size,
+                               "category": category, "status": "skipped",
+                               "method": None, "error": None}
+            continue
+
+        #creates the destination folder the first time it is needed
+        dest_folder = os.path.dirname(dest)
+        if dest_folder in created:
+            continue
+        recorder = metrics
+        if recorder is not None:
+            start = time.perf_counter()
+        try:
+            os.makedirs(dest_folder, exist_ok = True)
+            created.add(dest_folder)
+            if recorder is not None:
+                recorder.observe("mkdir", time.perf_counter() - start)
+                recorder.count("syscalls")
+        except Exception as e:
+            record_error("mkdir", e)
+            outcomes[index] = {"source": source, "dest": dest, "size": size,
+                               "category": category, "status": "failed",
+                               "method": None,
+                               "error": f"{type(e).__name__}: {e}"}
+
+    #the moves that can be made
+    movable = [move for index, move in enumerate(batch)
+               if index not in outcomes]
+
+    #the intent of every move is on disk before any file is moved
+    if journal:
+        for source, dest, size, category in movable:
+            journal.write("intent", source, dest)
+        journal.sync()
+
+    return outcomes, movable
+
+
+
+
+def apply_plan(plan, batch_size = 1000, max_workers = None,
+               max_in_flight_bytes = 64 * 1024 * 1024, worker_index = 0,
+               worker_count = 1, journal_file = None, journal = None):
+    """Carries out a move plan with `iter_apply_plan` and returns the result
+    of every move
+
+    Args:
+        plan (iterable[tuple[str, str, int, str]]): The moves to make as
+            (source, dest, size, category) tuples
+        batch_size, max_workers, max_in_flight_bytes, worker_index,
+        worker_count, journal_file, journal (optional): Passed to
+            `iter_apply_plan`.
+
+    Returns:
+        list[dict] or None: The result of each move, as described in
+            `apply_move`, or None if the plan itself could not be read
+
+    Raises:
+        None: All errors handled internally
+    """
+
+    #errors from a plan generator (e.g., a folder that could not be walked)
+    #mean the plan could not be carried out
+    try:
+        return list(iter_apply_plan(plan, batch_size, max_workers,
+                                    max_in_flight_bytes, worker_index,
+                                    worker_count, journal_file, journal))
+    except Exception as e:
+        record_error("move", e)
+        return None
+
+
+
+
+def save_plan(plan, file_name):
+    """Writes a move plan to a JSON file, or to a CSV file with the columns in
+    `PLAN_HEADERS` if file_name ends in '.csv'
+
+    Args:
+        plan (iterable[tuple[str, str, int, str]]): The moves as
+            (source, dest, size, category) tuples
+        file_name (str): The path to the file the plan is written to. It is
+            overwritten if it exists.
+
+    Returns:
+        bool: True on success, False if any error occurs
+
+    Raises:
+        None: Handles all exceptions internally
+    """
+
+    #the plan is read once so generators can be saved
+    plan = list(plan)
+
+    if file_name.lower().endswith(".csv"):
+
+        #builds the columns of the csv from the moves
+        columns = {}
+        for index, header in enumerate(PLAN_HEADERS):
+            columns[header] = [move[index] for move in plan]
+
+        return dictionary_to_csv(columns, file_name, PLAN_HEADERS)
+
+    #Attempts to write the plan as a compact list of moves
+    try:
+        with open(file_name, "w", encoding="utf-8") as f:
+            json.dump({"columns": PLAN_HEADERS, "moves": plan}, f,
+                      separators = (",", ":"))
+        return True
+
+    except Exception as e:
+        record_error("write", e)
+        return False
+
+
+
+
+def load_plan(file_name):
+    """Reads a move plan written by `save_plan`
+
+    Args:
+        file_name (str): The path to the JSON or CSV file holding the plan
+
+    Returns:
+        list[tuple[str, str, int, str]] or None: The moves as
+            (source, dest, size, category) tuples, or None if the file could
+            not be read
+
+    Raises:
+        None: Handles all exceptions internally
+    """
+
+    #Attempts to read the plan, any malformed file results in None
+    try:
+        if file_name.lower().endswith(".csv"):
+
+            columns = get_csv_dictionary(file_name)
+            return [(source, dest, int(size), category)
+                    for source, dest, size, category in zip(
+                        *(columns[header] for header in PLAN_HEADERS))]
+
+        with open(file_name, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        return [(source, dest, int(size), category)
+                for source, dest, size, category in data["moves"]]
+
+    except Exception as e:
+        record_error("parse", e)
+        return None
+
+
+
+
+def diff_plans(old_plan, new_plan):
+    """Compares two move plans by the source of each move
+
+    Args:
+        old_plan (iterable[tuple[str, str, int, str]]): The earlier plan
+        new_plan (iterable[tuple[str, str, int, str]]): The later plan
+
+    Returns:
+        dict[str, list]: A dictionary with the keys 'added' (moves only in
+            new_plan), 'removed' (moves only in old_plan) and 'changed'
+            ((old move, new move) pairs whose source is the same but whose
+            destination, size or category differs)
+
+    Raises:
+        None
+    """
+
+    #indexes both plans by the source of each move
+    old_moves = {tuple(move)[0]: tuple(move) for move in old_plan}
+    new_moves = {tuple(move)[0]: tuple(move) for move in new_plan}
+
+    differences = {"added": [], "removed": [], "changed": []}
+
+    for source, move in new_moves.items():
+        if source not in old_moves:
+            differences["added"].append(move)
+        elif old_moves[source] != move:
+            differences["changed"].append((old_moves[source], move))
+
+    for source, move in old_moves.items():
+        if source not in new_moves:
+            differences["removed"].append(move)
+
+    return differences
+
+
+
+
+class MoveJournal:
+    """An append-only record of the moves made while carrying out a move
+    plan. Each line of the journal is a JSON object with the keys 'op',
+    'source', 'dest' and, for completed moves, 'method', where 'op' is one
+    of 'intent' (the move is about to be made), 'copied' (the file was
+    copied across devices and is about to be removed from its source),
+    'done' (the move was made), 'failed' (the move could not be made) or
+    'undone' (the move was reversed by `undo_journal`).
+
+    Records are only guaranteed to be on disk once `sync` is called, which
+    lets callers sync a whole batch of records at once. Records may be
+    written and synced from several threads.
+
+    Usage:
+        with MoveJournal("moves.journal") as journal:
+            journal.write("intent", source, dest)
+            journal.sync()
+    """
+
+    def __init__(self, file_name):
+
+        #the path to the journal
+        self.file_name = file_name
+
+        #the (source, dest) pairs the journal records as moved and not undone
+        self.completed = set()
+        for record in read_journal(file_name):
+            key = (record["source"], record["dest"])
+            if record["op"] == "done":
+                self.completed.add(key)
+            elif record["op"] == "undone":
+                self.completed.discard(key)
+
+        #the journal is only ever appended to
+        self.file = open(file_name, "a", encoding="utf-8")
+
+        #guards the file and the completed moves across threads
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, op, source, dest, method = None):
+        #appends a record to the journal
+        record = {"op": op, "source": source, "dest": dest}
+        if method:
+            record["method"] = method
+        line = json.dumps(record) + "\n"
+
+        with self.lock:
+            self.file.write(line)
+
+            #keeps the completed moves up to date
+            if op == "done":
+                self.completed.add((source, dest))
+            elif op == "undone":
+                self.completed.discard((source, dest))
+
+    def sync(self):
+        #forces every record written so far onto the disk
+        with self.lock:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def close(self):
+        #syncs and closes the journal
+        if not self.file.closed:
+            self.sync()
+            self.file.close()
+
+
+
+
+def read_journal(file_name):
+    """Reads the records of a journal written by `MoveJournal` in order. A
+    record cut off by a crash while it was being written is ignored.
+
+    Args:
+        file_name (str): The path to the journal
+
+    Yields:
+        dict: Each record of the journal
+
+    Raises:
+        OSError: If the journal exists but could not be read
+    """
+
+    #a journal that does not exist yet has no records
+    if not os.path.exists(file_name):
+        return
+
+    with open(file_name, "r", encoding="utf-8") as f:
+        for line in f:
+
+            #skips records that were not completely written
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+
+            yield record
+
+
+
+
+def is_same_copy(source, dest):
+    """Checks whether dest is a complete copy of source made across devices:
+    both are regular files on different devices with the same size and the
+    same bytes
+
+    Args:
+        source (str): The path of the file that was copied
+        dest (str): The path of the copy
+
+    Returns:
+        bool: True if dest is a copy of source
+
+    Raises:
+        OSError: If either file could not be found
+    """
+
+    source_stat = os.lstat(source)
+    dest_stat = os.lstat(dest)
+
+    #a move on one device is a rename, so it never leaves a copy behind
+    if (source_stat.st_dev == dest_stat.st_dev or
+            not stat.S_ISREG(source_stat.st_mode) or
+            not stat.S_ISREG(dest_stat.st_mode) or
+            source_stat.st_size != dest_stat.st_size):
+        return False
+
+    #files that could not be read are never taken for copies
+    try:
+        with open(source, "rb") as source_file, open(dest, "rb") as dest_file:
+            while True:
+                chunk = source_file.read(1024 * 1024)
+                if chunk != dest_file.read(1024 * 1024):
+                    return False
+                if not chunk:
+                    return True
+    except OSError:
+        return False
+
+
+
+
+def recover_journal(file_name):
+    """Repairs the moves a journal records as intended but never finished,
+    which happens when a run is killed partway through a batch. For each of
+    them:
+
+    -a partial copy left by a move across devices is removed (rolled back)
+    -a move whose file is at dest and no longer at source is recorded as done
+    -a move across devices whose copy was completed but whose source was not
+     yet removed is finished by removing the source and recorded as done.
+     The copy counts as completed only if the journal records it as copied,
+     or if source and dest are on different devices and hold the same bytes.
+    -a move whose file is at both source and dest for any other reason (such
+     as another file already at dest) is recorded as failed, and its source
+     is left alone
+    -a move whose file is still only at source is left to be made again
+
+    Args:
+        file_name (str): The path to the journal
+
+    Returns:
+        dict[str, int] or None: The amount of moves that were 'rolled_back',
+            'recorded' (found complete), 'finished' and left 'pending', or
+            None if the journal could not be read or written
+
+    Raises:
+        None: Handles all exceptions internally
+    """
+
+    summary = {"rolled_back": 0, "recorded": 0, "finished": 0, "pending": 0}
+
+    #Attempts to repair the journal, any error reading or writing it results
+    #in None
+    try:
+
+        #the last operation recorded for each move
+        last_ops = {}
+        for record in read_journal(file_name):
+            last_ops[(record["source"], record["dest"])] = record["op"]
+
+        with MoveJournal(file_name) as journal:
+
+            for (source, dest), op in last_ops.items():
+
+                #only the moves that were started and never finished remain
+                if op not in ("intent", "copied"):
+                    continue
+
+                #removes a partial copy
+                temp_path = dest + PARTIAL_SUFFIX
+                if os.path.lexists(temp_path):
+                    os.unlink(temp_path)
+                    summary["rolled_back"] += 1
+
+                source_exists = os.path.lexists(source)
+                dest_exists = os.path.lexists(dest)
+
+                if dest_exists and not source_exists:
+                    #the move was made before the journal recorded it
+                    journal.write("done", source, dest, "recovered")
+                    summary["recorded"] += 1
+
+                elif dest_exists and source_exists:
+
+                    #the source is only removed if dest is known to be its
+                    #copy, anything else (such as another file with the same
+                    #name) was already at dest
+                    if op == "copied" or is_same_copy(source, dest):
+                        os.unlink(source)
+                        journal.write("done", source, dest, "copy")
+                        summary["finished"] += 1
+                    else:
+                        journal.write("failed", source, dest)
+
+                else:
+                    #the move is made again the next time the plan is applied
+                    summary["pending"] += 1
+
+        return summary
+
+    except Exception as e:
+        record_error("move", e)
+        return None
+
+
+
+
+def undo_journal(file_name):
+    """Reverses every move a journal records as completed, newest first, by
+    moving each file from its dest back to its source. Each reversed move is
+    recorded in the journal as undone so it is not reversed twice.
+
+    Args:
+        file_name (str): The path to the journal
+
+    Returns:
+        list[dict] or None: The result of moving each file back, as described
+            in `apply_move` (with source and dest swapped), or None if the
+            journal could not be read or written
+
+    Raises:
+        None: Handles all exceptions internally
+    """
+
+    results = []
+
+    #Attempts to undo the moves, any error reading or writing the journal
+    #results in None
+    try:
+
+        #the completed moves in the order they were made
+        completed = {}
+        for record in read_journal(file_name):
+            key = (record["source"], record["dest"])
+            if record["op"] == "done":
+                completed.pop(key, None)
+                completed[key] = True
+            elif record["op"] == "undone":
+                completed.pop(key, None)
+
+        with MoveJournal(file_name) as journal:
+
+            #replays the journal in reverse
+            for source, dest in reversed(list(completed)):
+
+                #the folder the file came from may have been removed since
+                try:
+                    os.makedirs(os.path.dirname(source), exist_ok = True)
+                except OSError:
+                    pass
+
+                result = apply_move((dest, source, 0, None))
+                if result["status"] == "moved":
+                    journal.write("undone", source, dest)
+                results.append(result)
+
+                #syncs the journal in batches
+                if len(results) % 1000 == 0:
+                    journal.sync()
+
+        return results
+
+    except Exception as e:
+        record_error("move", e)
+        return None
+
+
+
+
+def parallel_assign_folders(folder_path, max_workers = 4,
+                            max_in_flight_bytes = 64 * 1024 * 1024,
+                            recursive = False, max_depth = None,
+                            follow_symlinks = False, exclude = None,
+                            journal_file = None, detect_content = None,
+                            category_rules = None):
+    """Moves files from a specified base folder into categorized subfolders
+    like `assign_folders`, but makes the moves concurrently with `move_files`
+    while the folder is still being walked. Nothing is printed, the outcome of
+    every move is returned instead.
+
+    Args:
+        folder_path (str): The full path to the main folder containing the
+                           source files and the destination subfolders
+        max_workers (int, optional): The amount of moves made at once.
+                           Defaults to 4.
+        max_in_flight_bytes (int, optional): The total size of the files
+                           being moved at once. Defaults to 64 MiB.
+        recursive (bool, optional): Whether the files in every subfolder are
+                           moved as well. Defaults to False.
+        max_depth, follow_symlinks, exclude (optional): Passed to
+                           `walk_items` when recursive is True.
+        journal_file (str, optional): Passed to `iter_apply_plan`.
+                           Defaults to None.
+        detect_content, category_rules (optional): Passed to
+                           `iter_move_plan`.
+
+    Returns:
+        list[dict] or None: The results of `move_files` for every file that
+            was not already in its bucket, or None if folder_path could not
+            be walked.
+
+    Raises:
+        None: All errors handled internally
+    """
+
+    #the moves are planned as the folder is walked and applied in batches
+    plan = iter_move_plan(folder_path, recursive, max_depth, follow_symlinks,
+                          exclude, detect_content, category_rules)
+
+    return apply_plan(plan, max_workers = max_workers,
+                      max_in_flight_bytes = max_in_flight_bytes,
+                      journal_file = journal_file)
+
+
+
+
+def hash_file_edges(path, size, edge_size = DUPLICATE_EDGE_SIZE):
+    """Hashes the first and last edge_size bytes of a file with blake2b. A
+    file no larger than twice edge_size is hashed whole. Used by
+    `find_duplicate_files` in each worker process.
+
+    Args:
+        path (str): The path of the file
+        size (int): The size of the file in bytes
+        edge_size (int, optional): The amount of bytes hashed from each end.
+            Defaults to `DUPLICATE_EDGE_SIZE`.
+
+    Returns:
+        bytes or None: The digest, or None if the file could not be read
+
+    Raises:
+        None
+    """
+
+    hasher = hashlib.blake2b()
+
+    try:
+        with open(path, "rb") as f:
+            if size <= 2 * edge_size:
+                hasher.update(f.read())
+            else:
+                hasher.update(f.read(edge_size))
+                f.seek(size - edge_size)
+                hasher.update(f.read(edge_size))
+    except OSError:
+        return None
+
+    return hasher.digest()
+
+
+
+
+def hash_file(path):
+    """Hashes the whole content of a file with blake2b. The file is mapped
+    into memory and hashed straight from the mapping, so it is never
+    copied into a read buffer. Used by `find_duplicate_files` in each
+    worker process.
+
+    Args:
+        path (str): The path of the file
+
+    Returns:
+        bytes or None: The digest, or None if the file could not be read
+
+    Raises:
+        None
+    """
+
+    hasher = hashlib.blake2b()
+
+    try:
+        with open(path, "rb") as f:
+
+            #empty files can not be mapped and have nothing to hash
+            try:
+                mapping = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+            except ValueError:
+                return hasher.digest()
+
+            with mapping:
+                hasher.update(mapping)
+
+    except OSError:
+        return None
+
+    return hasher.digest()
+
+
+
+
+def find_duplicate_files(records, workers = None, min_size = 1,
+                         edge_size = DUPLICATE_EDGE_SIZE):
+    """Finds the files with identical content among item records in three
+    stages, each only looking at the files the stage before could not tell
+    apart. Files are first grouped by size. Files sharing a size then have
+    their first and last edge_size bytes hashed with `hash_file_edges`, and
+    only files still sharing that hash are hashed whole with `hash_file`.
+    Hashing is done in a pool of processes.
+
+    Args:
+        records (iterable[tuple[str, str, int]]): (path, category, size)
+            records such as the ones yielded by `walk_items`
+        workers (int, optional): The amount of processes. Defaults to None
+            for one per CPU.
+        min_size (int, optional): The size in bytes below which files are
+            ignored. Defaults to 1 for ignoring empty files.
+        edge_size (int, optional): The amount of bytes hashed from each end
+            of a file. Defaults to `DUPLICATE_EDGE_SIZE`.
+
+    Returns:
+        list[list[str]]: Every set of duplicate files as a sorted list of
+            their paths, sorted by their first path
+
+    Raises:
+        Exception: Any error raised by iterating over records
+    """
+
+    #groups the files by size, improper files have no content to compare
+    by_size = {}
+    for path, category, size in records:
+        if category != "Improper File" and size >= min_size:
+            by_size.setdefault(size, []).append(path)
+
+    #only files that share their size can be duplicates
+    candidates = [(path, size) for size, paths in by_size.items()
+                  if len(paths) > 1 for path in paths]
+
+    duplicates = []
+
+    if not candidates:
+        return duplicates
+
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+
+        #groups the files by size and the hash of their edges
+        by_edges = {}
+        digests = executor.map(hash_file_edges,
+                               [path for path, size in candidates],
+                               [size for path, size in candidates],
+                               itertools.repeat(edge_size), chunksize = 64)
+        for (path, size), digest in zip(candidates, digests):
+            if digest is not None:
+                by_edges.setdefault((size, digest), []).append(path)
+
+        #files hashed whole by their edges are already known to be duplicates,
+        #the others are hashed whole
+        remaining = []
+        for (size, digest), paths in by_edges.items():
+            if len(paths) < 2:
+                continue
+            if size <= 2 * edge_size:
+                duplicates.append(paths)
+            else:
+                remaining.extend(((size, digest), path) for path in paths)
+
+        by_content = {}
+        digests = executor.map(hash_file, [path for key, path in remaining])
+        for (key, path), digest in zip(remaining, digests):
+            if digest is not None:
+                by_content.setdefault((key, digest), []).append(path)
+
+        duplicates.extend(paths for paths in by_content.values()
+                          if len(paths) > 1)
+
+    duplicates = [sorted(paths) for paths in duplicates]
+    duplicates.sort()
+    return duplicates
+
+
+
+
+def find_duplicates(folder_path, recursive = True, max_depth = None,
+                    follow_symlinks = False, exclude = None, workers = None,
+                    min_size = 1):
+    """Finds the files with identical content in a folder with
+    `find_duplicate_files`, walking it with `walk_items`
+
+    Args:
+        folder_path (str): The path of the folder
+        recursive (bool, optional): Whether the files in every subfolder are
+                           compared as well. Defaults to True.
+        max_depth, follow_symlinks, exclude (optional): Passed to
+                           `walk_items` when recursive is True.
+        workers, min_size (optional): Passed to `find_duplicate_files`.
+
+    Returns:
+        list[list[str]] or None: Every set of duplicate files, or None if
+            the folder could not be walked
+
+    Raises:
+        None: All errors handled internally
+    """
+
+    #only the files directly in the folder are compared unless recursive
+    if not recursive:
+        max_depth = 0
+
+    try:
+        return find_duplicate_files(
+            walk_items(folder_path, max_depth, follow_symlinks, exclude),
+            workers, min_size)
+    except Exception as e:
+        record_error("listing", e)
+        return None
+
+
+
+
+def output_duplicates(folder_path, recursive = True):
+    """Outputs every set of duplicate files in a folder along with the space
+    they waste. If the folder could not be walked it is printed to the
+    console.
+
+    Args:
+        folder_path (str): The path of the folder
+        recursive (bool, optional): Passed to `find_duplicates`. Defaults
+                           to True.
+
+    Returns:
+        None: Only prints to the console
+
+    Raises:
+        None: All errors handled internally
+    """
+
+    duplicates = find_duplicates(folder_path, recursive)
+
+    #incase the folder could not be walked
+    if duplicates is None:
+        print(f"\n\tThe items in {folder_path} could not be compared")
+        return
+
+    if not duplicates:
+        print(f"\n\tNo duplicate files in {folder_path}")
+        return
+
+    #prints the header for the duplicate sets in the folder
+    print(f"\n\t----- Duplicate Files in {folder_path}\n")
+
+    wasted = 0
+
+    for paths in duplicates:
+
+        #every copy but the first wastes the size of the file
+        try:
+            size = os.path.getsize(paths[0])
+        except OSError:
+            size = 0
+        wasted += size * (len(paths) - 1)
+
+        print(f"\n\t{len(paths)} copies of {size} bytes:")
+        for path in paths:
+            print(f"\t\t{os.path.relpath(path, folder_path)}")
+
+    print(f"\n\t{len(duplicates)} sets of duplicates wasting {wasted} bytes")
+
+
+
+
+def remove_duplicates(duplicates, action = "hardlink"):
+    """Keeps the first file of every set of duplicates and either replaces
+    the others with hard links to it or deletes them. A hard link is made
+    under a temporary name and renamed over the duplicate, so the duplicate
+    is never missing. Deleted files can not be restored by `undo_journal`.
+
+    Args:
+        duplicates (list[list[str]]): Sets of duplicate files, as returned by
+            `find_duplicate_files`
+        action (str, optional): "hardlink" or "delete". Defaults to
+            "hardlink".
+
+    Returns:
+        list[dict]: A result for every duplicate that is not kept, with the
+            keys 'path', 'original', 'action', 'status' ('linked',
+            'deleted', 'skipped' when it already is a hard link to the
+            original, or 'failed') and 'error' (a description of the error
+            or None)
+
+    Raises:
+        ValueError: If the action is not known
+    """
+
+    if action not in ("hardlink", "delete"):
+        raise ValueError(f"unknown action: {action}")
+
+    results = []
+
+    for original, *copies in duplicates:
+        for path in copies:
+
+            result = {"path": path, "original": original, "action": action,
+                      "status": "linked" if action == "hardlink" else "deleted",
+                      "error": None}
+
+            try:
+                if os.path.samefile(original, path):
+                    result["status"] = "skipped"
+
+                elif action == "delete":
+                    os.unlink(path)
+
+                else:
+                    temp_path = path + LINK_SUFFIX
+                    os.link(original, temp_path)
+                    try:
+                        os.replace(temp_path, path)
+                    except OSError:
+                        os.unlink(temp_path)
+                        raise
+
+            except OSError as e:
+                result["status"] = "failed"
+                result["error"] = f"{type(e).__name__}: {e}"
+                record_error("move", e)
+
+            results.append(result)
+
+    return results
+
+
+
+
+def get_free_name(name, taken, counters):
+    """Finds the first name out of name, then name with the suffix "_2", "_3",
+    etc. inserted before its extension, that is not already taken. The
+    highest suffix used for each name is remembered in counters, so finding
+    the next free name for a name that keeps clashing takes constant time
+    instead of retrying every suffix from "_2" again.
+
+    Args:
+        name (str): The name wanted (e.g., 'report_.pdf')
+        taken (set[str]): The names already in use in the folder
+        counters (dict[str, int]): The highest suffix used so far for each
+            wanted name. It is updated in place.
+
+    Returns:
+        str: A name that is not in taken (e.g., 'report__3.pdf')
+
+    Raises:
+        None
+    """
+
+    #the wanted name is used when it is free
+    if name not in taken:
+        return name
+
+    #splits the name so the suffix goes in front of the extension
+    stem, ext = os.path.splitext(name)
+
+    #continues from the last suffix used for this name
+    attempt = counters.get(name, 1)
+
+    while True:
+        attempt += 1
+        candidate = f"{stem}_{attempt}{ext}"
+
+        if candidate not in taken:
+            counters[name] = attempt
+            return candidate
+
+
+
+
+def compile_rename_rules(substitutions = None, strip = True, spaces = "_",
+                         case = None, normalize = None,
+                         lowercase_extension = False, template = None):
+    """Compiles a set of renaming rules once into a single function that
+    gives the new name of a file. The rules are applied in the order of the
+    arguments below, the defaults reproduce the cleaning done by
+    `rename_files`.
+
+    Args:
+        substitutions (list[tuple[str, str]], optional): Regular expressions
+            and their replacements applied to the name with `re.sub`, in
+            order. Defaults to None.
+        strip (bool, optional): Whether leading and trailing whitespace is
+            removed. Defaults to True.
+        spaces (str, optional): The text every space is replaced with, or
+            None to keep spaces. Defaults to "_".
+        case (str, optional): 'lower', 'upper', 'title' or 'casefold' to
+            change the case of the name. Defaults to None.
+        normalize (str, optional): The Unicode normalization form ('NFC',
+            'NFD', 'NFKC' or 'NFKD') applied first. Defaults to None.
+        lowercase_extension (bool, optional): Whether the extension is
+            lowercased last. Defaults to False.
+        template (str, optional): A `str.format` template for the new name
+            using the variables {name}, {stem}, {ext}, {parent}, {counter}
+            (the position of the file in the batch starting at 1) and {mtime}
+            (a datetime, e.g. '{mtime:%Y%m%d}'). Defaults to None.
+
+    Returns:
+        callable: A function taking an `os.DirEntry` and its counter and
+            returning the new name of the file
+
+    Raises:
+        re.error: If a substitution is not a valid regular expression
+        ValueError: If case or normalize is not one of the listed values
+    """
+
+    #compiles every expression up front
+    compiled = [(re.compile(pattern), replacement)
+                for pattern, replacement in (substitutions or [])]
+
+    #the method changing the case of the name
+    case_function = None
+    if case:
+        if case not in ("lower", "upper", "title", "casefold"):
+            raise ValueError(f"Unknown case {case!r}")
+        case_function = getattr(str, case)
+
+    if normalize and normalize not in ("NFC", "NFD", "NFKC", "NFKD"):
+        raise ValueError(f"Unknown normalization form {normalize!r}")
+
+    #the modification time is only read if the template needs it
+    needs_mtime = bool(template) and "mtime" in template
+
+    def rule(entry, counter):
+        #gives the new name of the file in entry
+        name = entry.name
+
+        if normalize:
+            name = unicodedata.normalize(normalize, name)
+
+        for expression, replacement in compiled:
+            name = expression.sub(replacement, name)
+
+        if strip:
+            name = name.strip()
+
+        if spaces is not None:
+            name = name.replace(" ", spaces)
+
+        if case_function:
+            name = case_function(name)
+
+        if template:
+            stem, ext = os.path.splitext(name)
+            variables = {"name": name, "stem": stem, "ext": ext,
+                         "parent": os.path.basename(os.path.dirname(entry.path)),
+                         "counter": counter}
+            if needs_mtime:
+                variables["mtime"] = datetime.datetime.fromtimestamp(
+                    entry.stat().st_mtime)
+            name = template.format(**variables)
+
+        if lowercase_extension:
+            stem, ext = os.path.splitext(name)
+            name = stem + ext.lower()
+
+        return name
+
+    return rule
+
+
+
+
+def plan_renames(folder_path, rules = None, recursive = False,
+                 max_depth = None, exclude = None):
+    """Computes every rename of a batch before any file is renamed. Each
+    folder is listed once with `os.scandir` and the new names are found with
+    `rules`, then checked against the names the folder will hold once the
+    batch is done, so clashes get "_2", "_3", etc. from `get_free_name` while
+    a name given up by another file in the batch can be reused.
+
+    Args:
+        folder_path (str): The path to the folder containing the files
+        rules (callable, optional): A function compiled by
+            `compile_rename_rules`. Defaults to None for the default rules.
+        recursive (bool, optional): Whether the files in every subfolder are
+            renamed as well. Defaults to False.
+        max_depth (int, optional): How many levels of subfolders are renamed
+            when recursive. Defaults to None for no limit.
+        exclude (list[str], optional): Glob patterns of item names that are
+            skipped. Defaults to None.
+
+    Returns:
+        list[tuple[str, str]]: The (old path, new path) of every rename
+
+    Raises:
+        OSError: If folder_path could not be listed. Subfolders that can not
+            be listed are skipped, and files whose new name can not be found
+            are recorded as errors and keep their name.
+    """
+
+    if rules is None:
+        rules = compile_rename_rules()
+
+    #compiles every exclude pattern into a single expression
+    excluded = None
+    if exclude:
+        excluded = re.compile("|".join(fnmatch.translate(pattern)
+                                       for pattern in exclude))
+
+    renames = []
+
+    #counts every file the rules are applied to
+    counter = 0
+
+    #folders waiting to be listed along with their depth
+    pending = [(folder_path, 0)]
+
+    while pending:
+
+        current_path, depth = pending.pop()
+
+        #the root folder must be listable, subfolders are skipped otherwise
+        try:
+            with os.scandir(current_path) as entries:
+                entries = list(entries)
+        except OSError:
+            if current_path == folder_path:
+                raise
+            continue
+
+        #the names of every item in the folder
+        taken = set(entry.name for entry in entries)
+
+        #the files of the folder in name order, so counters are repeatable
+        files = []
+
+        for entry in sorted(entries, key = lambda entry: entry.name):
+
+            if excluded and excluded.match(entry.name):
+                continue
+
+            item_type = classify_entry(entry)[0]
+
+            if item_type == "File":
+                files.append(entry)
+
+            #real subfolders are listed after this folder
+            elif (item_type == "Folder" and recursive and
+                  not entry.is_symlink() and
+                  (max_depth is None or depth < max_depth)):
+                pending.append((entry.path, depth + 1))
+
+        #the new name wanted by each file, a file whose rules fail (e.g., it
+        #could not be stat'ed) keeps its name
+        wanted = []
+        for entry in files:
+            counter += 1
+            try:
+                new_name = rules(entry, counter)
+            except Exception as e:
+                record_error("rename", e)
+                continue
+            if new_name and new_name != entry.name and os.sep not in new_name:
+                wanted.append((entry.name, new_name))
+
+        #the names left once every file in the batch has been renamed
+        taken.difference_update(name for name, new_name in wanted)
+
+        #the highest suffix used for each new name
+        counters = {}
+
+        for name, new_name in wanted:
+            new_name = get_free_name(new_name, taken, counters)
+            taken.add(new_name)
+            renames.append((os.path.join(current_path, name),
+                            os.path.join(current_path, new_name)))
+
+    return renames
+
+
+
+
+def apply_renames(renames):
+    """Carries out renames computed by `plan_renames`. Renames whose new name
+    is the current name of another file in the batch (chains such as a->b,
+    b->c and cycles such as a->b, b->a) are made in two steps through
+    temporary names, and so are renames that only change the case of a name
+    on case insensitive file systems (a.TXT->a.txt), where the new name is
+    already the file itself. Every other rename is made directly. No
+    existing file is ever replaced.
+
+    Args:
+        renames (list[tuple[str, str]]): The (old path, new path) of every
+            rename
+
+    Returns:
+        int: The amount of files renamed
+
+    Raises:
+        None: Files that can not be renamed are left with their old name
+    """
+
+    #the batch is timed while metrics are enabled
+    recorder = metrics
+    if recorder is not None:
+        start = time.perf_counter()
+
+    #the paths that are renamed away during the batch
+    sources = set(old_path for old_path, new_path in renames)
+
+    #renames that must wait until their new name has been given up
+    chained = []
+
+    renamed = 0
+
+    for old_path, new_path in renames:
+
+        if new_path in sources:
+            chained.append((old_path, new_path))
+            continue
+
+        #attempts to rename the file, files that can not be renamed are
+        #left as they are
+        try:
+            if os.path.lexists(new_path):
+
+                #a new name that is the file itself only differs in case
+                if os.path.samestat(os.lstat(old_path), os.lstat(new_path)):
+                    chained.append((old_path, new_path))
+                continue
+
+            os.rename(old_path, new_path)
+            renamed += 1
+        except Exception as e:
+            record_error("rename", e)
+            continue
+
+    #first every chained file is moved out of the way under a temporary name
+    moved = []
+    for index, (old_path, new_path) in enumerate(chained):
+
+        temp_path = os.path.join(os.path.dirname(old_path),
+                                 f".fo-rename-{os.getpid()}-{index}.tmp")
+        try:
+            if os.path.lexists(temp_path):
+                continue
+            os.rename(old_path, temp_path)
+            moved.append((old_path, temp_path, new_path))
+        except Exception as e:
+            record_error("rename", e)
+            continue
+
+    #then every temporary name is given its new name
+    for old_path, temp_path, new_path in moved:
+
+        try:
+            if not os.path.lexists(new_path):
+                os.rename(temp_path, new_path)
+                renamed += 1
+                continue
+        except Exception as e:
+            record_error("rename", e)
+
+        #a file that can not take its new name gets its old name back
+        try:
+            os.rename(temp_path, old_path)
+        except Exception as e:
+            record_error("rename", e)
+
+    #every rename checks its new name is free before renaming
+    if recorder is not None:
+        recorder.observe("rename", time.perf_counter() - start)
+        recorder.count("syscalls", 2 * (len(renames) + len(moved)))
+        recorder.count("items", renamed)
+
+    return renamed
+
+
+
+
+def rename_files(folder_path, rules = None, recursive = False,
+                 max_depth = None, exclude = None):
+    """
+    Renames files within a specified folder by removing leading/trailing whitespace
+    and replacing spaces with underscores, or by the rules compiled with
+    `compile_rename_rules`. If a file with the new name already exists, it
+    appends a numerical suffix (e.g., "_2", "_3") to ensure uniqueness.
+
+    The whole batch is computed by `plan_renames` (one listing per folder,
+    with clashing names resolved by `get_free_name`) before any file is
+    renamed by `apply_renames`, which handles chains and cycles of renames
+    through temporary names and never replaces an existing file.
+
+    Args:
+        folder_path (str): The absolute or relative path to the folder
+                           containing the files to be renamed.
+        rules (callable, optional): A function compiled by
+                           `compile_rename_rules`. Defaults to None for the
+                           default cleaning.
+        recursive, max_depth, exclude (optional): Passed to `plan_renames`.
+
+    Returns:
+        bool: True if the operation completes (or attempts to complete) for all
+              files, False if the initial listing of files in the folder_path
+              fails (e.g., path does not exist or is not a directory).
+              Note: Individual file renaming errors within the loop are caught
+              and allow the function to continue with other files, but the
+              function will still return True in such cases.
+
+    Raises:
+        None: All errors handled internally
+    """
+
+    #Attempts to compute every rename. If the folder can not be listed then
+    #the function returns false to signal failure
+    try:
+        renames = plan_renames(folder_path, rules, recursive, max_depth,
+                               exclude)
+    except Exception as e:
+        record_error("rename", e)
+        return False
+
+    #renames the files
+    apply_renames(renames)
+
+    #returns true to signal operation success
+    return True
+
+
+
+
+def valid_read_file(file_name):
+    """
+    Validates if a file can be opened for reading with UTF-8 encoding.
+
+    This function attempts to open the specified file in read-only mode ('r')
+    using 'utf-8' encoding. It does not read the file's content but checks
+    for its existence, readability, and that it can be initiated for reading
+    with UTF-8 encoding. All potential exceptions during this process are
+    handled internally, and the function will return False in such cases.
+
+    Args:
+        file_name (str): The path to the file to be validated.
+
+    Returns:
+        bool: True if the file can be successfully opened for reading.
+              False if any error occurs during the attempt to open the file.
+
+    Raises:
+        None: This function handles all exceptions internally and does not
+              raise any exceptions to the caller.
+    """
+
+    #Attempts to open the file for reading
+    try:
+        #Only tries to open the file
+        with open(file_name, "r", encoding="utf-8"):
+            pass
+        #Returns true if the file be read
+        return True
+    except Exception as e:
+        #Returns false if any errors on the file can be read
+        record_error("parse", e)
+        return False
+
+
+
+def get_compression(file_name, mode = "r"):
+    """Finds the compressed format of a file. Files being read are recognized
+    by their first bytes, so a compressed file is found whatever its name.
+    Files being written, and empty or missing files being read, are
+    recognized by their extension (.gz, .bz2, .xz or .zst).
+
+    Args:
+        file_name (str): The path to the file
+        mode (str, optional): "r" when the file is to be read, otherwise
+            the file is to be written. Defaults to "r".
+
+    Returns:
+        str or None: "gzip", "bz2", "xz" or "zstd", or None for a file that
+            is not compressed
+
+    Raises:
+        None: A file that can not be opened is recognized by its extension
+    """
+
+    if mode.startswith("r"):
+
+        #reads just enough bytes to match every format
+        try:
+            with open(file_name, "rb") as f:
+                start = f.read(10)
+        except OSError:
+            start = b""
+
+        for magic, compression in COMPRESSION_MAGIC:
+            if magic.match(start):
+                return compression
+
+        #a file with content but no known first bytes is not compressed
+        if start:
+            return None
+
+    return COMPRESSION_EXTENSIONS.get(os.path.splitext(file_name)[1].lower())
+
+
+
+
+class KeepOpenTextIOWrapper(io.TextIOWrapper):
+    """A text layer over a binary file object that is detached from the file
+    object when it is closed, leaving the file object open, like the
+    compressed files of `open_file` leave the file objects they wrap open.
+
+    Usage:
+        with KeepOpenTextIOWrapper(buffer, encoding="utf-8") as f:
+            f.write(text)
+    """
+
+    #whether the text layer has been detached by close
+    detached = False
+
+    @property
+    def closed(self):
+        return self.detached or super().closed
+
+    def close(self):
+        #flushes the text layer and detaches it instead of closing the file
+        if not self.detached:
+            self.detach()
+            self.detached = True
+
+
+
+
+def open_file(file, mode = "r", compression = "auto", level = None,
+              threads = 0, newline = None):
+    """
+    Opens a file that may be compressed with gzip, bz2, xz or zstd. Reading
+    decompresses the file as a stream, so it is never written out or held
+    in memory whole. Text modes use UTF-8 encoding like the rest of this
+    module.
+
+    gzip, bz2 and xz are handled by the standard library. zstd needs the
+    `compression.zstd` module of Python 3.14 or the `zstandard` package,
+    either of which can compress with several threads. The standard library
+    has no threaded gzip, bz2 or xz compressors, so threads only applies to
+    zstd.
+
+    Args:
+        file (str or file object): The path to the file, or a binary file
+            object to wrap. A wrapped file object is not closed when
+            the compressed file wrapping it is closed.
+        mode (str, optional): "r", "w" or "a", followed by "b" for bytes or
+            "t" for text. Defaults to "r".
+        compression (str, optional): "gzip", "bz2", "xz", "zstd", None for
+            an uncompressed file, or "auto" to use `get_compression` on the
+            path. Defaults to "auto".
+        level (int, optional): The compression level when writing. Defaults
+            to None for the default of each format (9 for gzip and bz2, 6
+            for xz, 3 for zstd). Lower levels are faster and compress less.
+        threads (int, optional): The amount of threads zstd compresses with,
+            where 0 compresses in the calling thread. Defaults to 0.
+        newline (str, optional): Passed to the text layer, as with `open`.
+            Defaults to None.
+
+    Returns:
+        file object: The opened file, to be used as a context manager
+
+    Raises:
+        OSError: If the file could not be opened
+        ValueError: If the compression is not known
+        ImportError: If zstd is asked for but no zstd module is installed
+    """
+
+    if compression == "auto":
+        compression = get_compression(file, mode) if isinstance(file, str) else None
+
+    binary = "b" in mode
+    mode = mode.replace("t", "").replace("b", "")
+
+    #the keyword arguments of the text layer
+    text = {} if binary else {"encoding": "utf-8", "newline": newline}
+
+    if compression is None:
+        if isinstance(file, str):
+            return open(file, mode + ("b" if binary else ""), **text)
+        return file if binary else KeepOpenTextIOWrapper(file, **text)
+
+    if compression == "gzip":
+        if isinstance(file, str):
+            stream = gzip.GzipFile(file, mode + "b", 9 if level is None else level)
+        else:
+            stream = gzip.GzipFile(mode = mode + "b", fileobj = file,
+                                   compresslevel = 9 if level is None else level)
+
+    elif compression == "bz2":
+        stream = bz2.BZ2File(file, mode, compresslevel = 9 if level is None else level)
+
+    elif compression == "xz":
+        stream = lzma.LZMAFile(file, mode, preset = None if mode == "r" else level)
+
+    elif compression == "zstd":
+        try:
+            #the standard library module of Python 3.14
+            from compression import zstd
+
+            #level and options can not both be given, so with threads the
+            #level is one of the options
+            options = None
+            if threads and mode != "r":
+                options = {zstd.CompressionParameter.nb_workers: threads}
+                if level is not None:
+                    options[zstd.CompressionParameter.compression_level] = level
+                level = None
+            stream = zstd.ZstdFile(file, mode, level = None if mode == "r" else level,
+                                   options = options)
+
+        except ImportError:
+            #the zstandard package, imported here since it is optional
+            import zstandard
+
+            compressor = None
+            if mode != "r":
+                compressor = zstandard.ZstdCompressor(
+                    level = 3 if level is None else level, threads = threads)
+            stream = zstandard.open(file, mode + "b", cctx = compressor,
+                                    closefd = isinstance(file, str))
+
+    else:
+        raise ValueError(f"unknown compression: {compression}")
+
+    if binary:
+        return stream
+    return io.TextIOWrapper(stream, **text)
+
+
+
+
+def iter_file_lines(file_name, buffer_size = 1024 * 1024, use_mmap = False,
+                    compression = "auto"):
+    """
+    Reads a file line by line with UTF-8 encoding, yielding each non-empty line
+    with leading/trailing whitespace removed. Only one buffer of the file is
+    held in memory at a time, so files of any size can be read.
+
+    With use_mmap the file is mapped into memory instead of read through a
+    buffer. The end of each line is found in the mapping with `mmap.find`,
+    and a line is only copied out and decoded once it is reached, so one line
+    is held at a time. The search is made once per line, so this is slower
+    than the buffer for files of many short lines and is meant for when the
+    memory of the buffer matters. A lone carriage return ends a line like it
+    does when reading text. Empty files and files that can not be mapped
+    (e.g., pipes) are read through the buffer.
+
+    Compressed files are decompressed as they are read (see `open_file`)
+    and are never mapped.
+
+    Args:
+        file_name (str): The path to the file to be read.
+        buffer_size (int, optional): The size in bytes of the read buffer.
+                   Defaults to 1 MiB.
+        use_mmap (bool, optional): Whether the file is mapped into memory.
+                   Defaults to False.
+        compression (str, optional): Passed to `open_file`. Defaults to
+                   "auto" for recognizing compressed files by their first
+                   bytes.
+
+    Yields:
+        str: Each non-empty line from the file with leading/trailing
+             whitespace removed.
+
+    Raises:
+        OSError: If the file could not be opened or read
+        UnicodeDecodeError: If the file is not valid UTF-8, once the
+                   invalid line is reached
+    """
+
+    if compression == "auto":
+        compression = get_compression(file_name)
+
+    if use_mmap and compression is None:
+        with open(file_name, "rb") as f:
+
+            #Attempts to map the file, empty files and files that are not
+            #regular files can not be mapped and are read through the buffer
+            try:
+                mapping = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                mapping = None
+
+            if mapping is not None:
+                with mapping:
+
+                    size = len(mapping)
+                    start = 0
+                    newline = -1
+                    carriage = -1
+
+                    while start < size:
+
+                        #a line ends at a newline or at a lone carriage
+                        #return, and each is only searched for again once
+                        #the last one found is passed, so a file without
+                        #one of them is not searched to its end every line
+                        if newline < start:
+                            newline = mapping.find(b"\n", start)
+                            if newline == -1:
+                                newline = size
+                        if carriage < start:
+                            carriage = mapping.find(b"\r", start)
+                            if carriage == -1:
+                                carriage = size
+                        end = newline if newline < carriage else carriage
+
+                        #each line is only copied and decoded once it is
+                        #reached
+                        new_string = mapping[start:end].decode("utf-8").strip()
+                        start = end + 1
+
+                        if new_string:
+                            yield new_string
+                return
+
+    #reads the file as text through a buffer of buffer_size bytes, or
+    #through the decompressor
+    if compression is None:
+        f = open(file_name, "r", encoding="utf-8", buffering = buffer_size)
+    else:
+        f = open_file(file_name, "r", compression)
+
+    with f:
+
+        #Iterates through all lines in the file
+        for line in f:
+
+            #removes the empty space off the ends of a line
+            new_string = line.strip()
+
+            #ensures that only strings with actual information are yielded
+            if new_string:
+                yield new_string
+
+
+
+
+def iter_chunk_lines(chunk):
+    """Splits a chunk of UTF-8 bytes holding whole lines into its non-empty
+    lines with leading/trailing whitespace removed. A lone carriage return
+    ends a line like it does when reading text. Each line is only decoded
+    once it is reached.
+
+    Args:
+        chunk (bytes): The bytes of one or more whole lines
+
+    Yields:
+        str: Each non-empty line with leading/trailing whitespace removed
+
+    Raises:
+        UnicodeDecodeError: If a line is not valid UTF-8
+    """
+
+    #chunks holding a carriage return are split on it as well
+    if b"\r" in chunk:
+        chunk = chunk.replace(b"\r\n", b"\n")
+        chunk = chunk.replace(b"\r", b"\n")
+
+    for line in chunk.split(b"\n"):
+        new_string = line.decode("utf-8").strip()
+        if new_string:
+            yield new_string
+
+
+
+
+def get_line_ranges(file_name, chunk_size = 64 * 1024 * 1024):
+    """Splits a file into byte ranges of about chunk_size bytes that each
+    start at the beginning of a line and end at the end of one, so every
+    range can be read and split into lines on its own
+
+    Args:
+        file_name (str): The path to the file
+        chunk_size (int, optional): The size in bytes each range aims for.
+            Defaults to 64 MiB.
+
+    Returns:
+        list[tuple[int, int]]: The (start, end) offsets of every range, in
+            order and covering the whole file
+
+    Raises:
+        OSError: If the file could not be opened or read
+    """
+
+    ranges = []
+
+    with open(file_name, "rb") as f:
+
+        size = os.fstat(f.fileno()).st_size
+        start = 0
+
+        while start < size:
+
+            #the range ends after the line running through its nominal end
+            end = start + chunk_size
+            if end < size:
+                f.seek(end)
+                f.readline()
+                end = f.tell()
+            else:
+                end = size
+
+            ranges.append((start, end))
+            start = end
+
+    return ranges
+
+
+
+
+def process_line_range(file_name, start, end, map_function):
+    """Reads one byte range of a file and passes its lines to map_function.
+    Used by `process_file_lines` in each worker process.
+
+    Args:
+        file_name (str): The path to the file
+        start (int): The offset of the first byte of the range
+        end (int): The offset just past the last byte of the range
+        map_function (callable): A function taking an iterator over the
+            non-empty, stripped lines of the range (see `iter_chunk_lines`)
+
+    Returns:
+        object: The value returned by map_function
+
+    Raises:
+        OSError: If the file could not be read
+        UnicodeDecodeError: If a line is not valid UTF-8
+    """
+
+    with open(file_name, "rb") as f:
+        f.seek(start)
+        chunk = f.read(end - start)
+
+    return map_function(iter_chunk_lines(chunk))
+
+
+
+
+def process_file_lines(file_name, map_function, reduce_function = None,
+                       initial = None, workers = None,
+                       chunk_size = 64 * 1024 * 1024, ordered = True):
+    """Processes the lines of a large file in parallel. The file is split
+    into line aligned byte ranges by `get_line_ranges`, each range is given
+    to map_function in a pool of processes, and the results are optionally
+    combined by reduce_function.
+
+    map_function and reduce_function are sent to other processes, so they
+    must be defined at the top level of a module. A compressed file can not
+    be split, so all of its lines are given to one map_function call in the
+    calling process.
+
+    Example:
+        def count_errors(lines):
+            return sum(1 for line in lines if "ERROR" in line)
+
+        total = process_file_lines("app.log", count_errors, operator.add, 0)
+
+    Args:
+        file_name (str): The path to the file
+        map_function (callable): A function taking an iterator over the
+            non-empty, stripped lines of one range and returning a result
+        reduce_function (callable, optional): A function combining two
+            results into one, as with `functools.reduce`. Defaults to None
+            for returning every result.
+        initial (object, optional): The value the reduction starts from.
+            Defaults to None for starting from the first result.
+        workers (int, optional): The amount of processes. Defaults to None
+            for one per CPU.
+        chunk_size (int, optional): Passed to `get_line_ranges`. Defaults to
+            64 MiB.
+        ordered (bool, optional): Whether results are handled in the order
+            of the file. When False, results are handled as soon as they are
+            ready and, without a reduce_function, streamed from a generator.
+            Defaults to True.
+
+    Returns:
+        object: The reduced result when reduce_function is given (initial
+            for an empty file), otherwise a list of the results in the
+            order of the file, or a generator of the results in the order
+            they finish when ordered is False
+
+    Raises:
+        OSError: If the file could not be read
+        Exception: Any error raised by map_function or reduce_function, or
+            a UnicodeDecodeError if a line is not valid UTF-8
+    """
+
+    #a compressed file can not be split into byte ranges, so its lines are
+    #streamed through the decompressor to a single map_function call
+    compression = get_compression(file_name)
+    if compression is None:
+        ranges = get_line_ranges(file_name, chunk_size)
+
+    def iter_results():
+        if compression is not None:
+            yield map_function(iter_file_lines(file_name, compression = compression))
+            return
+
+        #runs every range in the pool, yielding the results as chosen
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+
+            futures = [executor.submit(process_line_range, file_name, start,
+                                       end, map_function)
+                       for start, end in ranges]
+
+            if not ordered:
+                futures = concurrent.futures.as_completed(futures)
+
+            for future in futures:
+                yield future.result()
+
+    if reduce_function is not None:
+        results = iter_results()
+
+        #the reduction starts from the first result, and an empty file may
+        #have none
+        if initial is None:
+            initial = next(results, None)
+
+        return functools.reduce(reduce_function, results, initial)
+
+    if not ordered:
+        return iter_results()
+
+    return list(iter_results())
+
+
+
+
+def file_segement_lines(file_name):
+    """
+    Reads a file line by line, strips leading/trailing whitespace from each line,
+    and returns a list containing only non-empty lines. This is a thin wrapper
+    over `iter_file_lines`, which should be used for files too large to hold
+    as a list.
+
+    The function attempts to open and read the specified file using UTF-8 encoding.
+    If any error occurs during file opening or reading (e.g., file not found,
+    permission issues, encoding errors), the function will handle the error
+    internally and return the list of lines collected up to the point of the
+    error, or an empty list if the error occurred before any lines were read.
+
+    Args:
+        file_name (str): The path to the file to be read.
+
+    Returns:
+        list[str]: A list of strings, where each string is a non-empty line
+                   from the file with leading/trailing whitespace removed.
+                   If an error occurs, this list may be empty or partially
+                   populated with lines read before the error.
+
+    Raises:
+        None: This function handles all exceptions internally and does not
+              raise any exceptions to the caller.
+    """
+
+    #initializes the list for each string
+    segmented_lines = []
+
+    #the reading is timed while metrics are enabled
+    recorder = metrics
+    if recorder is not None:
+        start = time.perf_counter()
+
+    #Attempts to read the file line by line
+    try:
+        #If any errors are generated then the lines read so far are returned
+        for line in iter_file_lines(file_name):
+            segmented_lines.append(line)
+
+    except Exception as e:
+        #If any errors in file processing occured the string list will return
+        #as it was before any errors occured
+        record_error("parse", e)
+
+    if recorder is not None:
+        recorder.record_read(file_name, start, len(segmented_lines))
+
+    #returns the list of all of the lines in the file
+    return segmented_lines
+
+
+
+
+def write_lines(lines, file_name, buffer_size = 1024 * 1024, append = False,
+                atomic = True, compression = "auto", level = None, threads = 0):
+    """
+    Writes any iterable of strings (including generators) to a file with UTF-8
+    encoding, each string on a new line. Lines are joined into chunks of about
+    buffer_size characters so each chunk is encoded and written at once.
+
+    Unless appending, the lines are written to a temporary file in the same
+    folder which is synced to disk and then renamed over file_name with
+    `os.replace`, so readers only ever see the old or the complete new file.
+    The new file keeps the permissions of the file it replaces. When
+    appending the lines are added to the end of file_name, which is synced
+    to disk before returning.
+
+    A file_name ending in .gz, .bz2, .xz or .zst is compressed as it is
+    written (see `open_file`). Appending to a compressed file adds a new
+    compressed stream to its end, which is read back as one file.
+
+    Args:
+        lines (iterable[str]): The strings to be written to the file.
+        file_name (str): The path to the file where the strings will be written.
+        buffer_size (int, optional): The amount of characters joined into each
+                         chunk. Defaults to 1 MiB.
+        append (bool, optional): Whether the lines are added to the end of the
+                         file instead of replacing it. Defaults to False.
+        atomic (bool, optional): Whether a replaced file is written through a
+                         temporary file. Defaults to True.
+        compression (str, optional): Passed to `open_file`. Defaults to
+                         "auto" for using the extension of file_name.
+        level (int, optional): The compression level. Defaults to None for
+                         the default of the format.
+        threads (int, optional): The amount of threads zstd compresses with.
+                         Defaults to 0.
+
+    Returns:
+        tuple[int, int]: The amount of bytes, before any compression, and the
+                         amount of lines written.
+
+    Raises:
+        OSError: If the file could not be opened, written or replaced. The
+                 temporary file is removed and file_name is left as it was.
+        TypeError: If an item of lines is not a string
+    """
+
+    #the folder the file, and its temporary file, are written in
+    folder_path = os.path.dirname(os.path.abspath(file_name))
+
+    #the temporary file has its own extension, so the format is found first
+    if compression == "auto":
+        compression = get_compression(file_name, "w")
+
+    temp_path = None
+
+    if append:
+        f = open(file_name, "ab")
+
+    elif atomic:
+        #the temporary file is hidden next to the file it replaces
+        handle, temp_path = tempfile.mkstemp(
+            dir = folder_path, prefix = "." + os.path.basename(file_name) + ".",
+            suffix = ".tmp")
+        f = os.fdopen(handle, "wb")
+
+    else:
+        f = open(file_name, "wb")
+
+    byte_count = 0
+    line_count = 0
+
+    #the writing is timed while metrics are enabled
+    recorder = metrics
+    if recorder is not None:
+        start = time.perf_counter()
+
+    try:
+        with f:
+
+            #the lines are compressed on their way to the file
+            stream = f
+            if compression is not None:
+                stream = open_file(f, "wb", compression, level, threads)
+
+            #the lines of the chunk being built and their total length
+            batch = []
+            pending = 0
+
+            for line in itertools.chain(lines, [None]):
+
+                if line is not None:
+                    batch.append(line)
+                    pending += len(line) + 1
+                    line_count += 1
+                    if pending < buffer_size:
+                        continue
+
+                if not batch:
+                    break
+
+                #newlines are written the same way text files write them
+                chunk = "\n".join(batch) + "\n"
+                if os.linesep != "\n":
+                    chunk = chunk.replace("\n", os.linesep)
+
+                data = chunk.encode("utf-8")
+                stream.write(data)
+                byte_count += len(data)
+
+                batch = []
+                pending = 0
+
+            #the compressed stream is finished, without closing the file
+            if stream is not f:
+                stream.close()
+
+            #the lines are on disk before the file is put in place
+            f.flush()
+            os.fsync(f.fileno())
+
+        if temp_path:
+
+            #the new file keeps the permissions of the file it replaces, or
+            #gets the default permissions of a new file
+            try:
+                mode = stat.S_IMODE(os.stat(file_name).st_mode)
+            except FileNotFoundError:
+                umask = os.umask(0)
+                os.umask(umask)
+                mode = 0o666 & ~umask
+            os.chmod(temp_path, mode)
+
+            os.replace(temp_path, file_name)
+            temp_path = None
+
+            #syncs the folder so the rename itself survives a crash, which is
+            #not supported on every platform
+            try:
+                folder = os.open(folder_path, os.O_RDONLY)
+                try:
+                    os.fsync(folder)
+                finally:
+                    os.close(folder)
+            except OSError:
+                pass
+
+    finally:
+        #removes the temporary file if anything failed
+        if temp_path:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+
+    if recorder is not None:
+        recorder.observe("write", time.perf_counter() - start)
+        recorder.count("bytes_written", byte_count)
+        recorder.count("items", line_count)
+
+    return (byte_count, line_count)
+
+
+
+
+def string_list_to_file(string_list, file_name):
+    """
+    Writes a list of strings to a file, with each string on a new line.
+
+    This function is a thin wrapper over `write_lines`. The strings are
+    written with UTF-8 encoding to a temporary file which then replaces the
+    specified file, so if the file already exists, its contents will be
+    overwritten all at once. Each string from the input list is written to
+    the file, followed by a newline character.
+
+    Args:
+        string_list (list[str]): A list of strings to be written to the file.
+        file_name (str): The path to the file where the strings will be written.
+                         If the file does not exist, it will be created.
+                         If it exists, it will be overwritten.
+
+    Returns:
+        bool: True if all strings are successfully written to the file.
+              False if any error occurs during the file opening or writing process.
+
+    Raises:
+        None: This function handles all exceptions internally (e.g., IOError,
+              PermissionError) and does not raise any exceptions to the caller.
+              It returns False upon encountering an error.
+    """
+
+    #Attempts to write every line from the string list to the file
+    try:
+        write_lines(string_list, file_name)
+
+    except Exception as e:
+        #returns false for operation failure
+        record_error("write", e)
+        return False
+
+    #returns true for operation success
+    return True
+
+
+
+
+def get_csv_headers(file_name):
+    """
+    Reads the column headers from the first row of a CSV file, which may be
+    compressed (see `open_file`).
+
+    Args:
+        file_name (str): The path to the CSV file to be read.
+
+    Returns:
+        list[str] or None: The column headers in order, or None if the file
+                           is empty.
+
+    Raises:
+        OSError: If the file could not be opened or read
+        csv.Error: If the first row is malformed
+    """
+
+    with open_file(file_name, "r", newline = "") as f:
+        return next(csv.reader(f), None)
+
+
+
+
+def iter_csv_rows(file_name, columns = None, batch_size = None):
+    """
+    Streams the rows of a CSV file without ever holding more than one row, or
+    one batch of rows, in memory. The first row of the file holds the column
+    headers. Only the columns asked for are kept, so the values of other
+    columns are dropped as soon as each row is parsed.
+
+    Rows are parsed with `csv.reader`, which is faster than `csv.DictReader`
+    since no dictionary is built for each row. Blank lines are skipped and
+    values missing from the end of a row are filled in with "". Compressed
+    files are decompressed as they are read (see `open_file`).
+
+    Args:
+        file_name (str): The path to the CSV file to be read.
+        columns (list[str], optional): The headers of the columns to keep, in
+                           the order their values are yielded. Defaults to
+                           None for every column in file order. When a header
+                           is repeated its last column is used.
+        batch_size (int, optional): The amount of rows yielded together in a
+                           list. Defaults to None for yielding rows one at a
+                           time. Memory use is then bounded by the size of
+                           one batch.
+
+    Yields:
+        list[str] or list[list[str]]: The values of each row in the order of
+                           columns, or lists of up to batch_size such rows.
+
+    Raises:
+        OSError: If the file could not be opened or read
+        KeyError: If a column asked for is not in the headers
+        csv.Error: If the file is malformed
+    """
+
+    with open_file(file_name, "r", newline = "") as f:
+
+        reader = csv.reader(f)
+
+        #an empty file has no rows
+        headers = next(reader, None)
+        if headers is None:
+            return
+
+        #the position of each header, the last one wins when repeated
+        positions = {header: index for index, header in enumerate(headers)}
+        if columns is None:
+            columns = list(positions)
+        indexes = [positions[column] for column in columns]
+
+        #rows shorter than this are filled in with ""
+        width = max(indexes) + 1 if indexes else 0
+
+        batch = []
+
+        for row in reader:
+
+            #skips blank lines
+            if not row:
+                continue
+
+            if len(row) < width:
+                row = row + [""] * (width - len(row))
+
+            values = [row[index] for index in indexes]
+
+            if batch_size is None:
+                yield values
+                continue
+
+            batch.append(values)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+
+        #the final batch may be partial
+        if batch:
+            yield batch
+
+
+
+
+def get_csv_dictionary(file_name, columns = None):
+    """
+    Reads a CSV file and returns its contents as a dictionary of lists,
+    where keys are column headers and values are lists of column data.
+
+    This function attempts to open and read the specified CSV file using
+    UTF-8 encoding. It streams the rows with `iter_csv_rows`, so columns that
+    are not asked for are never stored, and compressed files are read
+    without being decompressed to disk. If the CSV file is empty or headers
+    cannot be determined, an empty dictionary might be returned. If a row is
+    missing a value for a particular header, an empty string "" is used as a
+    placeholder.
+
+    Args:
+        file_name (str): The path to the CSV file to be read.
+        columns (list[str], optional): The headers of the columns to read.
+                              Defaults to None for every column.
+
+    Returns:
+        dict[str, list[str]]: A dictionary where each key is a column header
+                              (str) from the CSV file, and its corresponding
+                              value is a list of strings representing the data
+                              in that column. If an error occurs during file
+                              processing (e.g., file not found, permission
+                              denied, malformed CSV, unknown column), an empty
+                              dictionary or a partially populated dictionary
+                              (if the error occurs mid-processing) might be
+                              returned.
+
+    Raises:
+        None: This function handles all exceptions internally (e.g.,
+              FileNotFoundError, PermissionError, csv.Error, general Exception)
+              and does not raise any exceptions to the caller. It returns the
+              `columns` dictionary in its current state upon encountering an error.
+    """
+
+    #initializes the list of columns from the csv file
+    columns_dictionary = {}
+
+    #the parsing is timed while metrics are enabled
+    recorder = metrics
+    if recorder is not None:
+        start = time.perf_counter()
+
+    #the amount of rows read
+    row_count = 0
+
+    #attempts to open the csv file for reading
+    try:
+
+        #gets the headers from the csv file, an empty file has none
+        headers = get_csv_headers(file_name)
+        if headers is None:
+            return columns_dictionary
+
+        #only the columns asked for are read
+        if columns is None:
+            columns = list(dict.fromkeys(headers))
+
+        #sets each categories in columns dictionary to empty lists
+        column_lists = []
+        for header in columns:
+            columns_dictionary[header] = []
+            column_lists.append(columns_dictionary[header])
+
+        #iterates over the rows a batch at a time
+        for batch in iter_csv_rows(file_name, columns, CSV_BATCH_SIZE):
+
+            #adds each value of the batch to the list of its column
+            for column_list, values in zip(column_lists, zip(*batch)):
+                column_list.extend(values)
+            row_count += len(batch)
+
+    except Exception as e:
+        #passes over if any errors occur in file handling
+        record_error("parse", e)
+
+    if recorder is not None:
+        recorder.record_read(file_name, start, row_count)
+
+    #returns the full dictionary of all of the columns
+    return columns_dictionary
+
+
+
+
+def find_record_end(mapping, start, position):
+    """Finds the end of the csv record holding position in a memory mapped
+    file, from the start of any earlier record. Only quoted fields that start
+    between the two offsets are matched, so most of a range is skipped with
+    a search for '"'.
+
+    Args:
+        mapping (mmap.mmap): The mapped file
+        start (int): The offset of the start of a record at or before position
+        position (int): The offset the record is found for
+
+    Returns:
+        int: The offset just past the newline ending the record, or the size
+             of the file for the last record
+
+    Raises:
+        csv.Error: If a quoted field is not closed, so the records after it
+                   can not be told apart
+    """
+
+    size = len(mapping)
+    newline = mapping.find(b"\n", position)
+    if newline == -1:
+        return size
+
+    #a newline is inside a quoted field only if a '"' comes before it
+    quote = mapping.find(b'"', start, newline)
+    while quote != -1:
+
+        #a '"' that does not start a field is just a character
+        match = QUOTED_FIELD_PATTERN.match(mapping, quote)
+        if match is None:
+            quote = mapping.find(b'"', quote + 1, newline)
+            continue
+        if match.group(1) is None:
+            raise csv.Error(f"unclosed quoted field at byte {quote}")
+
+        #the newline is inside of the field, so the record goes on
+        if match.end() > newline:
+            newline = mapping.find(b"\n", match.end())
+            if newline == -1:
+                return size
+
+        quote = mapping.find(b'"', match.end(), newline)
+
+    return newline + 1
+
+
+
+
+def iter_csv_record_ranges(file_name, chunk_size = 32 * 1024 * 1024):
+    """
+    Splits a CSV file into byte ranges of about chunk_size bytes that each
+    hold whole records, so every range can be parsed on its own. Ranges are
+    yielded as soon as their end is found, so they can be parsed while the
+    rest of the file is split. A newline only ends a record when it is
+    outside of a quoted field, and like in `csv.reader` a field is only
+    quoted when it starts with '"', so a '"' inside of an unquoted field
+    (12" screen) is just a character.
+
+    Args:
+        file_name (str): The path to the CSV file.
+        chunk_size (int, optional): The size in bytes each range aims for.
+                           Defaults to 32 MiB.
+
+    Yields:
+        tuple[int, int]: The (start, end) offsets of the header record, then
+                           of every range of records after it, in order.
+                           An empty file yields nothing.
+
+    Raises:
+        OSError: If the file could not be opened or read
+        csv.Error: If a quoted field is not closed
+    """
+
+    with open(file_name, "rb") as f:
+
+        #Attempts to map the file, an empty file can not be mapped
+        try:
+            mapping = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+        except ValueError:
+            return
+
+        with mapping:
+
+            size = len(mapping)
+
+            #the header is the first record
+            start = find_record_end(mapping, 0, 0)
+            yield (0, start)
+
+            while start < size:
+
+                #the range ends with the record holding its nominal end
+                end = start + chunk_size
+                if end < size:
+                    end = find_record_end(mapping, start, end)
+                else:
+                    end = size
+
+                yield (start, end)
+                start = end
+
+
+
+
+def get_csv_record_ranges(file_name, chunk_size = 32 * 1024 * 1024):
+    """
+    Splits a CSV file into byte ranges of whole records with
+    `iter_csv_record_ranges`.
+
+    Args:
+        file_name (str): The path to the CSV file.
+        chunk_size (int, optional): The size in bytes each range aims for.
+                           Defaults to 32 MiB.
+
+    Returns:
+        tuple[bytes, list[tuple[int, int]]]: The bytes of the header record
+                           and the (start, end) offsets of every range of
+                           records after it, in order.
+
+    Raises:
+        OSError: If the file could not be opened or read
+        csv.Error: If a quoted field is not closed
+    """
+
+    ranges = list(iter_csv_record_ranges(file_name, chunk_size))
+    if not ranges:
+        return (b"", [])
+
+    with open(file_name, "rb") as f:
+        header = f.read(ranges[0][1])
+
+    return (header, ranges[1:])
+
+
+
+
+def parse_csv_range(file_name, start, end, indexes):
+    """
+    Parses one range of whole CSV records with `csv.reader` into columns.
+    Used by `get_csv_dictionary_parallel` in each worker process.
+
+    Args:
+        file_name (str): The path to the CSV file.
+        start (int): The offset of the first byte of the range
+        end (int): The offset just past the last byte of the range
+        indexes (list[int]): The position in each record of every column kept
+
+    Returns:
+        list[list[str]]: The values of each column kept, in the order of
+                         indexes. Blank lines are skipped and missing values
+                         are filled in with "".
+
+    Raises:
+        OSError: If the file could not be read
+        UnicodeDecodeError: If the range is not valid UTF-8
+        csv.Error: If a record is malformed
+    """
+
+    with open(file_name, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+
+    columns = [[] for index in indexes]
+
+    #rows shorter than this are filled in with ""
+    width = max(indexes) + 1 if indexes else 0
+
+    for row in csv.reader(io.StringIO(text, newline = "")):
+
+        #skips blank lines
+        if not row:
+            continue
+
+        if len(row) < width:
+            row = row + [""] * (width - len(row))
+
+        for column, index in zip(columns, indexes):
+            column.append(row[index])
+
+    return columns
+
+
+
+
+def get_csv_dictionary_parallel(file_name, columns = None, workers = None,
+                                chunk_size = 32 * 1024 * 1024):
+    """
+    Reads a CSV file into a dictionary of lists like `get_csv_dictionary`,
+    but parses it in a pool of processes. The file is split at record
+    boundaries by `iter_csv_record_ranges`, each range is parsed by
+    `parse_csv_range` as soon as it is found and the columns of every range
+    are joined in order. A compressed file can not be split, and a file with
+    an unclosed quoted field can not be split safely, so they are read by
+    `get_csv_dictionary`, as is a file of a single range or a read with a
+    single process, where starting processes would only cost time.
+
+    Args:
+        file_name (str): The path to the CSV file to be read.
+        columns (list[str], optional): The headers of the columns to read.
+                           Defaults to None for every column.
+        workers (int, optional): The amount of processes. Defaults to None
+                           for one per CPU.
+        chunk_size (int, optional): Passed to `iter_csv_record_ranges`.
+                           Defaults to 32 MiB.
+
+    Returns:
+        dict[str, list[str]]: A dictionary where each key is a column header
+                           and its value is the list of values in that
+                           column. If an error occurs, an empty dictionary or
+                           a partially populated dictionary might be returned.
+
+    Raises:
+        None: Handles all exceptions internally
+    """
+
+    #initializes the list of columns from the csv file
+    columns_dictionary = {}
+
+    #the parsing is timed while metrics are enabled
+    recorder = metrics
+    if recorder is not None:
+        start = time.perf_counter()
+
+    #attempts to read the csv file
+    try:
+
+        if get_compression(file_name) is not None:
+            return get_csv_dictionary(file_name, columns)
+
+        ranges = iter_csv_record_ranges(file_name, chunk_size)
+
+        #an empty file has no headers
+        header_range = next(ranges, None)
+        if header_range is None:
+            return columns_dictionary
+
+        #a file of a single range, or a single process, gains nothing from
+        #starting processes
+        first_range = next(ranges, None)
+        if (first_range is None or first_range[1] == os.path.getsize(file_name)
+                or (workers or os.cpu_count() or 1) == 1):
+            ranges.close()
+            return get_csv_dictionary(file_name, columns)
+
+        with open(file_name, "rb") as f:
+            header = f.read(header_range[1])
+        headers = next(csv.reader(io.StringIO(header.decode("utf-8"),
+                                              newline = "")))
+
+        #the position of each header, the last one wins when repeated
+        positions = {name: index for index, name in enumerate(headers)}
+        if columns is None:
+            columns = list(positions)
+        indexes = [positions[column] for column in columns]
+
+        for column in columns:
+            columns_dictionary[column] = []
+
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+
+            #each range is parsed while the ranges after it are found
+            parsed = []
+            try:
+                for range_start, range_end in itertools.chain([first_range],
+                                                              ranges):
+                    parsed.append(executor.submit(parse_csv_range, file_name,
+                                                  range_start, range_end,
+                                                  indexes))
+
+            #the records can not be told apart, so the file is read in order
+            except csv.Error:
+                for future in parsed:
+                    future.cancel()
+                parsed = None
+
+            #the columns of the ranges are joined in order
+            if parsed is not None:
+                for future in parsed:
+                    for column, values in zip(columns, future.result()):
+                        columns_dictionary[column].extend(values)
+
+        if parsed is None:
+            return get_csv_dictionary(file_name, columns)
+
+    except Exception as e:
+        #passes over if any errors occur in file handling
+        record_error("parse", e)
+
+    if recorder is not None:
+        recorder.record_read(file_name, start,
+                             len(next(iter(columns_dictionary.values()), [])))
+
+    return columns_dictionary
+
+
+
+
+class EncodedColumn:
+    """A column of strings stored as small integer codes into a table of its
+    distinct values, which takes far less memory than a list of strings when
+    few values repeat many times. It can be read like a list (len, indexing,
+    iteration), so it can be written back with `dictionary_to_csv` as is.
+
+    Usage:
+        column = EncodedColumn(["red", "blue", "red"])
+        column.codes    #array('B', [0, 1, 0])
+        column.values   #['red', 'blue']
+        column[2]       #'red'
+    """
+
+    #the array type codes used for the codes, widened as values are added
+    TYPECODES = [("B", 0xFF), ("H", 0xFFFF), ("I", 0xFFFFFFFF)]
+
+    def __init__(self, items = ()):
+
+        #the distinct values in the order they were first seen
+        self.values = []
+
+        #the code of each distinct value
+        self.lookup = {}
+
+        #the code of every item in the column
+        self.codes = array.array("B")
+
+        self.extend(items)
+
+    def append(self, item):
+        #adds an item, giving it a new code if it has not been seen before
+        code = self.lookup.get(item)
+        if code is None:
+            code = len(self.values)
+            self.lookup[item] = code
+            self.values.append(item)
+
+            #widens the codes once the new code does not fit
+            if code > self.limit():
+                for typecode, limit in self.TYPECODES:
+                    if code <= limit:
+                        self.codes = array.array(typecode, self.codes)
+                        break
+
+        self.codes.append(code)
+
+    def extend(self, items):
+        #adds every item in order
+        for item in items:
+            self.append(item)
+
+    def limit(self):
+        #the largest code the current codes array can hold
+        return dict(self.TYPECODES)[self.codes.typecode]
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.values[code] for code in self.codes[index]]
+        return self.values[self.codes[index]]
+
+    def __iter__(self):
+        values = self.values
+        return (values[code] for code in self.codes)
+
+    def __repr__(self):
+        return f"EncodedColumn({len(self.codes)} items, {len(self.values)} values)"
+
+
+
+
+def infer_csv_schema(file_name, columns = None, max_categories = 256):
+    """
+    Scans a CSV file with `iter_csv_rows` and picks the most compact type
+    each column can be stored as by `get_csv_columns` without changing any
+    value when it is written back:
+
+    -'int' if every value is an integer written in its plain form (e.g. "42",
+     not "042" or "+42") that fits in 64 bits
+    -'float' if every value is a float written the way Python writes it
+     (e.g. "1.5", not "1.50" or "1e3")
+    -'category' if the column holds at most max_categories distinct values
+    -'str' otherwise
+
+    Args:
+        file_name (str): The path to the CSV file to be read.
+        columns (list[str], optional): The headers of the columns to scan.
+                           Defaults to None for every column.
+        max_categories (int, optional): The most distinct values a
+                           'category' column can hold. Defaults to 256.
 
     Returns:
-        str or None: The validated, full path to an existing directory,
-                     or None if the user enters an empty string to exit.
+        dict[str, str] or None: The type of each column, or None if the file
+                           could not be read.
+
     Raises:
-        None: Handles invalid path errors internally by re-prompting.
-              (External interrupts like KeyboardInterrupt can still occur).
+        None: Handles all exceptions internally
     """
 
-    #Loop continuously, prompting the user for a folder path.
-    #The loop exits ONLY when a valid, existing directory path is entered
-    #and returned by the function, OR if the user enters nothing.
-    while True:
-
-        #retrieves the name of a folder path from the user removing trailing
-        #whitespace and surrounding quotes
-        folder_path = input("\n\tEnter the path for the folder or nothing to exit: ").strip().strip('"')
+    #Attempts to scan the file, any error results in None
+    try:
+        headers = get_csv_headers(file_name)
+        if headers is None:
+            return {}
+        if columns is None:
+            columns = list(dict.fromkeys(headers))
+
+        #the types each column may still be
+        could_be_int = [True] * len(columns)
+        could_be_float = [True] * len(columns)
+
+        #the distinct values of each column, until there are too many
+        distinct = [set() for column in columns]
+
+        for batch in iter_csv_rows(file_name, columns, CSV_BATCH_SIZE):
+            for index, values in enumerate(zip(*batch)):
+
+                if could_be_int[index]:
+                    could_be_int[index] = all(
+                        INT_PATTERN.fullmatch(value) and
+                        -2 ** 63 <= int(value) < 2 ** 63 for value in values)
+
+                #checked on every batch, since a batch of integers can be
+                #followed by a float that makes the column neither type
+                if could_be_float[index]:
+                    could_be_float[index] = all(
+                        FLOAT_PATTERN.fullmatch(value) and
+                        repr(float(value)) == value for value in values)
+
+                if distinct[index] is not None:
+                    distinct[index].update(values)
+                    if len(distinct[index]) > max_categories:
+                        distinct[index] = None
+
+        schema = {}
+        for index, column in enumerate(columns):
+            if could_be_int[index]:
+                schema[column] = "int"
+            elif could_be_float[index]:
+                schema[column] = "float"
+            elif distinct[index] is not None:
+                schema[column] = "category"
+            else:
+                schema[column] = "str"
 
-        #in the case the user entered nothing
-        if not folder_path:
-            return None
+        return schema
 
-        #checks if the name entered is a folder path
-        valid_path = os.path.isdir(folder_path)
+    except Exception as e:
+        record_error("parse", e)
+        return None
 
-        if not valid_path:
-            #informs the user of the error in finding the folder path
-            print(f"\n\tERROR: \"{folder_path}\" is not valid or existing path.")
 
-        else:
-            #exits the loop by returning the string name of the folder path
-            return folder_path
-   
 
 
+def get_csv_columns(file_name, dtypes = None, columns = None,
+                    max_categories = 256, use_numpy = False):
+    """
+    Reads a CSV file into typed, compact columns. Each column is stored as:
 
-def get_file(folder_path = ""):    
-    """Prompts the user to enter a filename and validates if it exists
-    and is readable. The filename can be relative to an optional base folder.
+    -'int': an `array.array` of signed 64 bit integers
+    -'float': an `array.array` of doubles
+    -'category': an `EncodedColumn` of codes into a table of distinct values
+    -'str': a list of strings
 
-    The function will continuously prompt the user until a valid, readable
-    file path is entered.
+    The type of each column comes from dtypes or, for columns not in dtypes,
+    from `infer_csv_schema`. The columns can be written back with
+    `dictionary_to_csv` without converting them to lists first.
 
     Args:
-        folder_path (str, optional): The base directory path to prepend to the
-            user-entered filename. Defaults to "" (meaning the filename
-            will be relative to the current working directory or an
-            absolute path if the user enters one).
+        file_name (str): The path to the CSV file to be read.
+        dtypes (dict[str, str], optional): The type of some or all columns.
+                           Defaults to None for inferring every type.
+        columns (list[str], optional): The headers of the columns to read.
+                           Defaults to None for every column.
+        max_categories (int, optional): Passed to `infer_csv_schema`.
+                           Defaults to 256.
+        use_numpy (bool, optional): Whether 'int' and 'float' columns are
+                           returned as NumPy arrays (sharing the memory of
+                           the arrays read). Requires NumPy. Defaults to
+                           False.
 
     Returns:
-        str or None: The full, validated path to an existing and readable file,
-            or None if the user enters an empty string to quit.
+        dict[str, object] or None: The typed columns by header, or None if
+                           the file could not be read, a value could not be
+                           converted to the type of its column or a type is
+                           unknown.
+
     Raises:
-        None: Handles file access errors (FileNotFoundError, PermissionError,
-              IsADirectoryError, OSError, general Exception) internally by
-              printing an error message and re-prompting the user.
-              (External interrupts like KeyboardInterrupt can still occur
-              during the input() call).
+        None: Handles all exceptions internally
     """
 
-    #Loops continuously prompting user for a file.
-    #The loop exits only when a valid file name is entered
-    #and returned, OR if the user enters nothing.
-    while True:
+    #the parsing is timed while metrics are enabled
+    recorder = metrics
+    if recorder is not None:
+        start = time.perf_counter()
 
-        #retrieves the file name from the user and deletes surrounding quotes
-        #and white space.
-        file_name = input("\n\tEnter the name of the file or nothing to exit: ").strip().strip('"')
+    #Attempts to read the file, any error results in None
+    try:
+        headers = get_csv_headers(file_name)
+        if headers is None:
+            return {}
+        if columns is None:
+            columns = list(dict.fromkeys(headers))
+
+        #infers the types that were not given
+        dtypes = dict(dtypes or {})
+        missing = [column for column in columns if column not in dtypes]
+        if missing:
+            dtypes.update(infer_csv_schema(file_name, missing, max_categories))
+
+        #creates the storage of each column
+        typed = {}
+        for column in columns:
+            dtype = dtypes[column]
+            if dtype == "int":
+                typed[column] = array.array("q")
+            elif dtype == "float":
+                typed[column] = array.array("d")
+            elif dtype == "category":
+                typed[column] = EncodedColumn()
+            elif dtype == "str":
+                typed[column] = []
+            else:
+                return None
+
+        #how the text of each column is converted before it is stored
+        converters = [{"int": int, "float": float}.get(dtypes[column])
+                      for column in columns]
+        storages = [typed[column] for column in columns]
+
+        for batch in iter_csv_rows(file_name, columns, CSV_BATCH_SIZE):
+            for storage, converter, values in zip(storages, converters,
+                                                  zip(*batch)):
+                if converter:
+                    storage.extend(map(converter, values))
+                else:
+                    storage.extend(values)
 
-        #incase the user just presses enter
-        if not file_name:
-            return None
+        #wraps the numeric arrays without copying them
+        if use_numpy:
+            import numpy
+            for column in columns:
+                if isinstance(typed[column], array.array):
+                    typed[column] = numpy.frombuffer(
+                        typed[column], dtype = "int64" if
+                        typed[column].typecode == "q" else "float64")
 
-        #connects the file to folder_path
-        file_name = os.path.join(folder_path, file_name)
+        if recorder is not None:
+            recorder.record_read(file_name, start,
+                                 len(storages[0]) if storages else 0)
 
-        #Attempts to validate the file by checking the typical file prone
-        #errors that might occur for file operations.
-        try:
+        return typed
+
+    except Exception as e:
+        record_error("parse", e)
+        return None
 
-            #The two errors to occurs in this operation are that the file does
-            #not exist or that file can not be read. However other errors can
-            #occur when attempting to open a file.
-            with open(file_name, "r", encoding="utf-8") as f:
 
-                #returns the file_name if no errors were generated
-                return file_name
 
-        except FileNotFoundError:
 
-            #occurs if the name of the file does not exist
-            print(f"\tERROR - File could not be found")
-        except PermissionError:
+def fill_row(row, missing):
+    """Inserts an empty value into a row at every position of a missing
+    column. Used by `dictionary_to_csv`.
 
-            #occurs if the file is not allowed to be read
-            print(f"\tERROR - File could not be accessed")
-        except Exception as e:
+    Args:
+        row (tuple): The values of the columns that are present
+        missing (list[int]): The positions of the missing columns, in order
 
-            #other errors that might occur when opening a file
-            print(f"\tERROR - File could not be handled")
+    Returns:
+        list: The row with an empty value at every missing position
+
+    Raises:
+        None
+    """
 
+    row = list(row)
+    for index in missing:
+        row.insert(index, "")
+    return row
 
 
 
-def list_items(folder_path):
-    """Lists out all the items with in a folder path to the console or prints
-    that operation could not be done due to a problem with processing
+
+def dictionary_to_csv(data_dict, file_name, headers, batch_size = CSV_BATCH_SIZE,
+                      level = None):
+    """Writes a dictionary of lists to a CSV file.
+
+    Overwrites `file_name` if it exists. Only columns in `headers` are
+    written, in that order; other keys of `data_dict` are ignored and headers
+    missing from `data_dict` are written as empty columns. The columns named
+    in `headers` are zipped into rows, which are written with
+    `csv.writer.writerows` a batch at a time. Every column must have the
+    same length: columns of different lengths are an error, found before
+    anything is written for columns with a length and once the shortest
+    column ends for generators. Columns are only read once from start to
+    end, so generators and other streaming sources can be used as columns.
+    A file_name ending in .gz, .bz2, .xz or .zst is compressed as it is
+    written (see `open_file`).
 
     Args:
-        folder_path(str): An exisiting folder path
+        data_dict (dict[str, iterable]): Dictionary with column names as keys
+                                     and lists of column data as values. Any
+                                     iterable column works, including the
+                                     typed columns of `get_csv_columns` and
+                                     generators.
+        file_name (str): Path to the output CSV file.
+        headers (list[str]): Ordered list of column headers for the CSV.
+        batch_size (int, optional): The amount of rows written at once.
+                                     Defaults to `CSV_BATCH_SIZE`.
+        level (int, optional): The compression level of a compressed file.
+                                     Defaults to None for the default of its
+                                     format.
 
     Returns:
-        None: Prints out the items with in the folder path to the console
+        bool: True on success, False if any error occurs, including columns
+            of different lengths.
 
     Raises:
-        None
-
+        None: Handles all exceptions internally.
     """
-
-    #Attempts to validate the folder by checking if a list of files can be
-    #generated from the name of the path 
+    #Attempts to open a file for complete overwriting via a dictionary
+    #If this can not be done then false is returned for operation failure.
     try:
-        
-        #Generates a list of items and can raise an error if the folder does
-        #not exist, or an ambiguous error
-        items = os.listdir(folder_path)
+        #the columns that know their length are checked before the file is
+        #touched, so no values are silently dropped
+        lengths = set(len(data_dict[header]) for header in headers
+                      if header in data_dict and
+                      hasattr(data_dict[header], "__len__"))
+        if len(lengths) > 1:
+            raise ValueError("columns have different lengths")
 
-        
-        if not items:
+        #opens the file with the name of file_name for a complete overwrite
+        with open_file(file_name, "w", level = level, newline = '') as f:
 
-            #incase the folder is empty
-            print(f"\n\t{folder_path} is empty")
-        else:
-            
-            #starting header for the items in the folder 
-            print(f"\n\t----- Contents of {folder_path} -----")
+            #sets the file writer
+            file_writer = csv.writer(f)
 
-            #prints out the name of each item in the folder
-            for item_name in items:
-                print(f"\t{item_name}")
+            #writes the headers to the csv
+            file_writer.writerow(headers)
 
-            #ending header for the items in the folder
-            print(f"\n\t-----    End of {folder_path}   -----")
+            #without any of the columns there are no rows to write
+            if not any(header in data_dict for header in headers):
+                return True
 
-    except FileNotFoundError:
+            #zips the columns into rows, raising if a column ends early
+            rows = zip(*(data_dict[header] for header in headers
+                         if header in data_dict), strict = True)
+
+            #missing columns are filled with empty values
+            missing = [index for index, header in enumerate(headers)
+                       if header not in data_dict]
+            if missing:
+                rows = (fill_row(row, missing) for row in rows)
+
+            #writes the rows a batch at a time
+            while True:
+                batch = list(itertools.islice(rows, batch_size))
+                if not batch:
+                    break
+                file_writer.writerows(batch)
+
+        #returns true to signal operation success
+        return True
 
-        #If the folder could not be found
-        print(f"\n\tFolder {folder_path} not found")
     except Exception as e:
 
-        #If any other errors occured when opening the folder path
-        print(f"\n\tAn error {e} occurred")
+        #if complete file overwriting failes then false is returned to signal
+        #operation failure
+        record_error("write", e)
+        return False
 
 
 
 
-def get_item_type(folder_path, item_name):
-    """Determines the type of the item given based on its name and the path
-    to the folder that was given
 
-    Args:
-        folder_path(str): The path for the folder item_name resides in
-        item_name(str): The name of the item
-    Returns:
-        tuple[str, str | None]: A tuple where the first element is the item type
-            ('File', 'Folder', or 'Improper File') and the second element
-            is the lowercase file extension (e.g., '.txt') if it's a file
-            with an extension, otherwise None.
+
+class InotifyWatcher:
+    """Watches a folder for files that finished being written (close-write)
+    or were moved into it (moved-in) with the Linux inotify API, called
+    through ctypes. Only the folder itself is watched, not its subfolders.
+
+    Usage:
+        with InotifyWatcher(folder_path) as watcher:
+            names = watcher.read(timeout)
+
     Raises:
-        None
+        OSError: If inotify is not available (e.g., not on Linux) or the
+            folder could not be watched
     """
-    
-    #Attempts to join, validate, and extract the extension from a item. If any
-    #errors are generated then the item gets labled as improper.
-    try:
 
-        #connects the name of item to the path of the folder
-        item_path = os.path.join(folder_path, item_name)
+    def __init__(self, folder_path):
 
-        if os.path.isfile(item_path):
+        #the path to the watched folder
+        self.folder_path = folder_path
 
-            #if the item is a file
-            extension = os.path.splitext(item_path)
+        library = ctypes.util.find_library("c")
+        libc = ctypes.CDLL(library, use_errno = True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "inotify is not available")
 
-            #returns the type as a file and the lowercased extension
-            return ("File", extension[1].lower())
+        #the inotify instance, read without blocking
+        self.handle = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.handle < 0:
+            number = ctypes.get_errno()
+            raise OSError(number, os.strerror(number))
 
-        elif os.path.isdir(item_path):
-            #if the item is a folder returns the type as a folder with
-            #no extension
-            return ("Folder", None)
+        watch = libc.inotify_add_watch(self.handle, os.fsencode(folder_path),
+                                       INOTIFY_CLOSE_WRITE | INOTIFY_MOVED_TO)
+        if watch < 0:
+            number = ctypes.get_errno()
+            os.close(self.handle)
+            raise OSError(number, os.strerror(number), folder_path)
 
-    except Exception as e:
-        #if the item is problematic returns the type as improper file with
-        #no extension
-        return ("Improper File", None)
+    def __enter__(self):
+        return self
 
+    def __exit__(self, *exc_info):
+        self.close()
 
+    def read(self, timeout = None):
+        """Waits up to timeout seconds (None for no limit) for events and
+        returns the names of the files they were about, or None when the
+        kernel dropped events and the whole folder must be scanned again"""
 
+        names = []
 
-def list_items_by_type(folder_path):
-    """Lists all of the items from a folder to the console and outputs their
-    extension and type. If any errors occur during processing they are printed
-    to the console. 
+        if not select.select([self.handle], [], [], timeout)[0]:
+            return names
 
-    Args:
-        folder_path(str): The full path of the folder
+        #reads every queued event
+        while True:
+            try:
+                data = os.read(self.handle, 64 * 1024)
+            except BlockingIOError:
+                break
 
-    Returns:
-        None: Prints to the console
+            position = 0
+            while position < len(data):
+                watch, mask, cookie, length = INOTIFY_EVENT.unpack_from(data, position)
+                position += INOTIFY_EVENT.size
 
-    Raises: 
-        None: Handles all errors internally
-    """
+                if mask & INOTIFY_OVERFLOW:
+                    return None
 
-    
-    #Attempts to list out all of the items in a folder along with their type
-    #and given extension. Generating a list of items from an ambiguous
-    #directory can cause multiple errors which are handled in the try-block
-    try:
+                #folders moved in are not sorted
+                if length and not mask & INOTIFY_IS_FOLDER:
+                    name = data[position:position + length].rstrip(b"\0")
+                    names.append(os.fsdecode(name))
+                position += length
 
-        #Attempts to get all of the items from the folder path as a list
-        #and can generate exceptions such as "FileNotFoundError" and
-        #"PermissionError" when trying to access
-        items = os.listdir(folder_path)
+        return names
 
-        if not items:
-            #incase the folder is empty
-            print(f"\n\t{folder_path} is empty")
+    def close(self):
+        #stops watching and closes the inotify instance
+        if self.handle is not None:
+            os.close(self.handle)
+            self.handle = None
 
-        else:
 
-            #outputs the starting header for the contents
-            print(f"\n\t----- Contents of {folder_path} With Type ------")
 
-            #iterates over all of the items in the folder
-            for item_name in items:
 
-                #prints the item name
-                print(f"\t{item_name}")
+class PollingWatcher:
+    """Watches a folder by listing it every poll_interval seconds, for the
+    platforms inotify is not available on. A file is only reported once its
+    size and modification time are the same in two listings in a row, since
+    there is no way to know when a file was closed after being written.
 
-                #gets a tuple that contains the type and extension of the item
-                item_type = get_item_type(folder_path, item_name)
+    Usage:
+        with PollingWatcher(folder_path) as watcher:
+            names = watcher.read(timeout)
+    """
 
-                #outputs the type
-                print(f"\tType: {item_type[0]}")
+    def __init__(self, folder_path, poll_interval = 1.0):
+
+        #the path to the watched folder and the time between listings
+        self.folder_path = folder_path
+        self.poll_interval = poll_interval
+
+        #the (size, mtime) of every file that has not been reported yet
+        self.pending = {}
+
+        #the (size, mtime) of every file already reported
+        self.reported = self.list_files()
+
+        #the time of the next listing
+        self.next_poll = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def list_files(self):
+        #lists the (size, mtime) of every file directly in the folder
+        files = {}
+        with os.scandir(self.folder_path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file(follow_symlinks = False):
+                        entry_stat = entry.stat(follow_symlinks = False)
+                        files[entry.name] = (entry_stat.st_size,
+                                             entry_stat.st_mtime_ns)
+                except OSError:
+                    pass
+        return files
+
+    def read(self, timeout = None):
+        """Waits until the next listing, or up to timeout seconds (None for
+        no limit), and returns the names of the files that are new or
+        changed and have stopped changing"""
+
+        delay = self.next_poll - time.monotonic()
+        if timeout is not None and timeout < delay:
+            time.sleep(max(timeout, 0))
+            return []
+        time.sleep(max(delay, 0))
+        self.next_poll = time.monotonic() + self.poll_interval
+
+        files = self.list_files()
+        names = []
+
+        for name, key in files.items():
+            if self.reported.get(name) == key:
+                continue
+
+            #the file is reported once it is unchanged since the last listing
+            if self.pending.get(name) == key:
+                names.append(name)
+                self.reported[name] = key
+                del self.pending[name]
+            else:
+                self.pending[name] = key
 
-                #outputs the extension
-                print(f"\tExtension: {item_type[1]}")
+        #forgets the files that are gone, such as the ones sorted away
+        for name in list(self.reported):
+            if name not in files:
+                del self.reported[name]
+        for name in list(self.pending):
+            if name not in files:
+                del self.pending[name]
 
-                #intermediate line
-                print()
-            
-            #ending header for the folder contents
-            print(f"\n\t-----         End of {folder_path}        ------")
-            
-    except FileNotFoundError:
+        return names
 
-        #incase the file could not be found
-        print(f"\n\tFolder {folder_path} not found")
+    def close(self):
+        #nothing is held open between listings
+        pass
 
-    except PermissionError:
 
-        #incase the file could not be accessed
-        print(f"\n\tFolder {folder_path} could not be accessed")
 
-    except Exception as e:
 
-        #incase any ambiguous errors occur
-        print(f"\n\tAn error {e} occurred")
+def open_watcher(folder_path, poll_interval = 1.0, inotify = True):
+    """Opens an `InotifyWatcher` on a folder, or a `PollingWatcher` where
+    inotify is not available or not wanted
 
-        
+    Args:
+        folder_path (str): The path of the folder
+        poll_interval (float, optional): The seconds between listings of a
+            `PollingWatcher`. Defaults to 1.0.
+        inotify (bool, optional): Whether inotify is tried before polling.
+            Defaults to True.
+
+    Returns:
+        InotifyWatcher or PollingWatcher: The watcher
+
+    Raises:
+        OSError: If the folder could not be listed
+    """
+
+    if inotify:
+        try:
+            return InotifyWatcher(folder_path)
+        except (OSError, AttributeError, TypeError):
+            pass
+
+    return PollingWatcher(folder_path, poll_interval)
 
 
-def group_items(folder_path):
-    """Constructs a dictionary from a folder path where each category is an 
-    item type and returns None if the folder could not be operated on
+
+
+def plan_file_moves(folder_path, names, detect_content = None,
+                    category_rules = None, exclude = None):
+    """Plans the moves that sort some files of a folder into their buckets,
+    categorizing each the same way `group_items` and `iter_move_plan` do.
+    Names that are no longer files (e.g., already moved) are left out, as
+    are the temporary files this module writes.
 
     Args:
-        folder_path(str): The path of the folder 
+        folder_path (str): The path of the folder holding the files
+        names (iterable[str]): The names of the files
+        detect_content (str, optional): "missing" or "all" to categorize
+            files by their content, see `detect_item_categories`. Defaults
+            to None.
+        category_rules (CategoryRules, optional): The rules giving the
+            category and bucket of every file. Defaults to None for
+            `DEFAULT_CATEGORY_RULES`.
+        exclude (iterable[str], optional): The paths of files that are never
+            moved, e.g., a journal kept in the folder. Defaults to None.
 
     Returns:
-        dict[str, list[str]] or None: A dictionary where keys are category names
-            (e.g., 'Folder', '.txt', 'No Extension', 'Improper File') and
-            values are lists of item names (str) belonging to that category.
-            Returns None if an error occurs (e.g., folder not found,
-            permission issues).
+        list[tuple[str, str, int, str]]: The moves as (source, dest, size,
+            category) tuples
 
     Raises:
-        None: All errors handled internally
+        None
     """
 
-    #dictionary for holding the string names of items in a folder and storing
-    #them by type
-    sorted_types = {}
+    category_rules = category_rules or DEFAULT_CATEGORY_RULES
 
-    #Attempts to create a list of items from an ambiguous folder path. If the
-    #folder can not be accessed in any way then nothing can be sorted therefore,
-    #None is returned.
-    try:
+    excluded = {os.path.abspath(path) for path in exclude or ()}
 
-        #Tries to store the names of all of the items in the folder to a list
-        #and can generate errors from doing so
-        items = os.listdir(folder_path)
+    records = []
 
-        #Loops through each and every item in the list
-        for item_name in items:
+    for name in names:
 
-            #gets the item and extension of the item in the folder
-            item_type, extension = get_item_type(folder_path, item_name)
+        #temporary files of this module are never sorted
+        if (name.endswith(PARTIAL_SUFFIX) or name.endswith(LINK_SUFFIX) or
+                TEMPORARY_NAME_PATTERN.fullmatch(name)):
+            continue
 
-            #initializes the category to None, for an unknown value
-            category = None
+        if (excluded and
+                os.path.abspath(os.path.join(folder_path, name)) in excluded):
+            continue
+
+        item_type, extension = get_item_type(folder_path, name)
+        if item_type != "File":
+            continue
 
+        path = os.path.join(folder_path, name)
+        try:
+            stat_result = os.stat(path)
+        except OSError:
+            continue
 
-            if not item_type == "File":
-                #incase the item type is not a file sets the category to that
-                #item's type
-                category = item_type
+        records.append((path, category_rules.get_category(
+            name, item_type, extension, path, stat_result),
+            stat_result.st_size))
 
-            else:
-                #if the item is a file
-                if extension:
-                    #sets the category to the item's extension if it has one
-                    category = extension
-                else:
-                    #sets the category to "No Extension" if the item does not
-                    #have an extension
-                    category = "No Extension"
+    #files are read to recognize their content if asked to
+    if detect_content:
+        records = detect_item_categories(records, detect_content)
 
-            if category not in sorted_types:
-                #if the item belongs in a new category
-                sorted_types[category] = [item_name]
-            else:
-                #if the item belongs in an existing category
-                sorted_types[category].append(item_name)
-        return sorted_types
+    return [(path, os.path.join(folder_path, category_rules.get_bucket(category),
+                                os.path.basename(path)), size, category)
+            for path, category, size in records]
 
-    except Exception as e:
-        #if any problems occured then nothing should be returned
-        return None
 
 
 
+def watch_folder(folder_path, debounce = 0.5, max_delay = 5.0,
+                 batch_size = 10000, poll_interval = 1.0, inotify = True,
+                 max_workers = None,
+                 journal_file = None, detect_content = None,
+                 category_rules = None, initial = True, on_batch = None,
+                 stop_event = None):
+    """Keeps a folder sorted by moving every file into its bucket as soon as
+    it arrives, instead of listing the whole folder on every run. Files are
+    noticed when they are closed after being written or moved into the
+    folder, with `open_watcher`.
 
+    Arrivals are debounced: files are gathered until none has arrived for
+    debounce seconds, the oldest has waited max_delay seconds, or
+    batch_size files are waiting, and are then moved together with
+    `apply_plan`. A burst of thousands of files therefore becomes a few
+    large batches. With a journal_file the journal is repaired once when the
+    watcher starts and kept open for every batch, and is never moved itself
+    when it is kept in the watched folder.
 
-def output_items_by_group(folder_path):
-    """Outputs each possible group for all of the items in a folder based on
-    the item type of each item in the folder. If any errors occur when 
-    processing the folder then it is printed to the console.
+    Runs until stop_event is set or the process is interrupted.
 
-        Args:
-            folder_path(str): The path to the folder containing the groupable
-            items
+    Args:
+        folder_path (str): The path of the folder to keep sorted
+        debounce (float, optional): The seconds without arrivals after which
+            the waiting files are moved. Defaults to 0.5.
+        max_delay (float, optional): The most seconds a file waits before
+            being moved. Defaults to 5.0.
+        batch_size (int, optional): The amount of waiting files that are
+            moved at once without waiting any longer. Defaults to 10000.
+        poll_interval, inotify (optional): Passed to `open_watcher`.
+        max_workers (optional): Passed to `apply_plan`.
+        journal_file (str, optional): The path to the journal every move is
+            recorded in, see `MoveJournal`. Defaults to None for no journal.
+        detect_content, category_rules (optional): Passed to
+            `plan_file_moves`.
+        initial (bool, optional): Whether the files already in the folder
+            are sorted first. Defaults to True.
+        on_batch (callable, optional): Called with the list of results of
+            every batch, as described in `apply_move`. Defaults to None.
+        stop_event (threading.Event, optional): Stops the watcher once set.
+            Defaults to None for running until interrupted.
 
-        Returns: 
-            None: Only prints to the console
-    
-        Raises:
-            None: No operations generate errors
+    Returns:
+        None
+
+    Raises:
+        FolderNotFoundError: If the folder does not exist
+        OSError: If the folder could not be watched or listed
     """
 
-    #dictionary to store the items by type
-    grouped_items = group_items(folder_path)
+    check_folder_path(folder_path)
+
+    #the names of the files waiting to be moved, in order of arrival
+    pending = {}
+
+    #when the oldest waiting file and the latest file arrived
+    first_arrival = None
+    last_arrival = None
+
+    def flush(names):
+        #moves a batch of files and reports the results
+        plan = plan_file_moves(folder_path, names, detect_content,
+                               category_rules, exclude)
+        if not plan:
+            return
+        results = apply_plan(plan, batch_size = batch_size,
+                             max_workers = max_workers, journal = journal)
+        if on_batch is not None and results is not None:
+            on_batch(results)
+
+    def list_files():
+        #every file directly in the folder
+        with os.scandir(folder_path) as entries:
+            return [entry.name for entry in entries
+                    if entry.is_file(follow_symlinks = False)]
+
+    #the journal is repaired once and stays open while the folder is watched
+    journal = None
+    exclude = None
+    if journal_file:
+        exclude = [journal_file]
+        recover_journal(journal_file)
+        journal = MoveJournal(journal_file)
+
+    with contextlib.ExitStack() as stack:
+        if journal:
+            stack.enter_context(journal)
+        watcher = stack.enter_context(open_watcher(folder_path, poll_interval,
+                                                   inotify))
+
+        #the watcher is opened first so no file arriving during this is missed
+        if initial:
+            flush(list_files())
+
+        while stop_event is None or not stop_event.is_set():
+
+            #waits for arrivals, for the waiting files to become due, or at
+            #most a second so the stop event is noticed
+            timeout = 1.0
+            if pending:
+                now = time.monotonic()
+                timeout = max(0, min(last_arrival + debounce,
+                                     first_arrival + max_delay) - now)
+
+            names = watcher.read(timeout)
+
+            #events were dropped so the whole folder is listed again
+            if names is None:
+                names = list_files()
+
+            now = time.monotonic()
+            for name in names:
+                if not pending:
+                    first_arrival = now
+                pending[name] = None
+                last_arrival = now
+
+            if pending and (len(pending) >= batch_size or
+                            now >= last_arrival + debounce or
+                            now >= first_arrival + max_delay):
+                names = list(pending)
+                pending.clear()
+                flush(names)
+
+
+
+
+def get_aio_executor():
+    """Gets the pool of threads every `aio_` function runs its blocking calls
+    in, creating it on first use. The pool has `AIO_MAX_WORKERS` threads, so
+    no amount of concurrent requests can start more blocking calls than
+    that at once.
+
+    Args:
+        None
+
+    Returns:
+        concurrent.futures.ThreadPoolExecutor: The shared pool
 
-    #incase the dictionary could not be generated
-    if not grouped_items:
-        #outputs the problem and ends the function
-        print(f"\n\tThe items in {folder_path} could not be grouped")
-        return
+    Raises:
+        None
+    """
 
-    #prints the header for the item groups in the folder
-    print(f"\n\t----- Items in {folder_path} by Group\n")
-    
-    #goes through all categories in the dictionary
-    for category in grouped_items:
+    global aio_executor
 
-        #outputs the category name
-        print(f"\n\t{category}:")
+    with aio_executor_lock:
+        if aio_executor is None:
+            aio_executor = concurrent.futures.ThreadPoolExecutor(
+                AIO_MAX_WORKERS, thread_name_prefix = "FileOperator-aio")
 
-        #goes through all items in the category
-        for item in grouped_items[category]:
+    return aio_executor
 
-            #outputs the file names
-            print(f"\t\t{item}")
 
 
-def create_bucket_folders(folder_path):
-    """
-    Creates subfolders within the specified folder_path based on item categories
-    derived from `group_items`. It then returns a dictionary mapping the
-    names of these created/ensured subfolders to the lists of items
-    belonging to those original categories.
 
-    The function first groups items using `group_items`. For each category
-    that is not 'Folder', it determines a target subfolder name (e.g.,
-    uppercasing file extensions, using "DOT_" prefix for single-character
-    extensions, or using names like "No Extension" directly). It then ensures
-    these subfolders exist using `os.makedirs(exist_ok=True)`.
+async def aio_call(function, *args, **kwargs):
+    """Runs a blocking function in the pool of `get_aio_executor` without
+    blocking the event loop.
+
+    If the awaiting task is cancelled before the call has started the call
+    never runs. A call that has already started can not be interrupted, so
+    it finishes in the background and its result is dropped.
 
     Args:
-        folder_path (str): The full path to the main folder where subfolders
-                           will be created.
+        function (callable): The blocking function
+        *args, **kwargs: The arguments passed to the function
 
     Returns:
-        dict[str, list[str]] or None:
-            On success, a dictionary where keys are the names of the
-            created/ensured subfolders (e.g., 'TXT', 'DOT_C', 'No Extension')
-            and values are the lists of item names (str) that belong to the
-            original category corresponding to that subfolder.
-            Returns None if `group_items` fails, if no groups are found,
-            or if a critical error occurs during folder creation.
+        object: The value returned by the function
 
     Raises:
-        None: Handles errors from `group_items` or `os.makedirs`
-              internally by printing an error message and returning None.
-              (External interrupts like KeyboardInterrupt can still occur).
+        asyncio.CancelledError: If the awaiting task is cancelled
+        Exception: Any error raised by the function
     """
 
-    #gets a dictionary of all of the items sorted by type
-    grouped_items = group_items(folder_path)
+    future = get_aio_executor().submit(function, *args, **kwargs)
+    return await asyncio.wrap_future(future)
 
-    #incase getting a dictionary failed no folder dictionary should be
-    #generated since no folders will be created
-    if not grouped_items:
-        return None
 
-    #initializes the dictionary containing the folder names with the files that
-    #should be in them
-    return_dictionary = {}
 
-    #The most likely error to occur here is a permission error when creating
-    #directories with in a folder however other erros could occur
-    try:
 
-        #loops for every category in the dictionary of items sorted by type
-        for category in grouped_items:
+async def aio_iterate(iterator, batch_size = 1000):
+    """Iterates over a blocking iterator (such as the generators of this
+    module) from the event loop. Items are read a batch at a time in the
+    pool of `get_aio_executor`, so only one call per iteration is ever
+    running in the pool and other requests get their turn between batches.
 
-            if category == "Improper File":
-                #if there are improper files a folder for them is made
-                os.makedirs(os.path.join(folder_path, category), exist_ok = True)
+    When the iteration is cancelled or stopped early no more batches are
+    read and the iterator is closed, after the batch being read finishes,
+    so the files and folders it has open are released.
 
-                #puts all of the file names that would belong in "Improper File"
-                #folder in said category
-                return_dictionary[category] = grouped_items[category]
+    Args:
+        iterator (iterator): The blocking iterator
+        batch_size (int, optional): The amount of items read per call.
+            Defaults to 1000.
 
-            elif category == "No Extension":
-                #if there are files with no extension then a folder for them is made
-                os.makedirs(os.path.join(folder_path, category), exist_ok = True)
-                
-                #puts all of the files in a dictionary for files with no extension
-                return_dictionary[category] = grouped_items[category]
+    Yields:
+        object: Each item of the iterator
 
-            elif not category == "Folder":
-                #if the file is not one of the outsider cases
+    Raises:
+        asyncio.CancelledError: If the iterating task is cancelled
+        Exception: Any error raised by the iterator
+    """
 
-                #the name of the folder is the extension with out the "."
-                folder_name = category[1:].upper()
+    future = None
 
-                #incase the extension is single like a ".h" then the folder
-                #is named "DOT_H"
-                if len(folder_name) == 1:
-                    folder_name = "DOT_" + folder_name
+    try:
+        while True:
+            future = get_aio_executor().submit(
+                list, itertools.islice(iterator, batch_size))
+            batch = await asyncio.wrap_future(future)
+            if not batch:
+                break
+
+            for item in batch:
+                yield item
+
+    finally:
+        #a generator can not be closed while a batch of it is being read,
+        #so it is closed once the batch is done
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            if future is None or future.done():
+                close()
+            else:
+                future.add_done_callback(lambda future: close())
 
-                #creates a directory for all of the files with the extension
-                os.makedirs(os.path.join(folder_path, folder_name), exist_ok = True)
 
-                #puts all of the file names in a dictionary for files with the
-                #given extension
-                return_dictionary[folder_name] = grouped_items[category]
 
-        #returns the complete dictionary of the files and the folders they
-        #belong in
-        return return_dictionary
 
-    #Incase creating a folder generated an error then the error is printed
-    except Exception as e:
-        print("\n\tERROR - Creating folders could not be done")
-        print(f"\n\tERROR - {e}")
+async def aio_scan_entries(folder_path, batch_size = 1000):
+    """Async version of `scan_items` that yields the items of a folder as
+    they are listed
 
-        #None is returned to signal operation failure
-        return None
+    Args:
+        folder_path (str): The path of the folder
+        batch_size (int, optional): Passed to `aio_iterate`. Defaults to
+            1000.
 
+    Yields:
+        tuple[str, str, str | None]: The name, type and lowercase extension
+            (or None) of every item
 
-def assign_folders(folder_path):
-    """Moves files from a specified base folder into categorized subfolders.
+    Raises:
+        OSError: If the folder could not be listed
+    """
+
+    def iter_entries():
+        #lists and classifies the entries in the pool
+        with os.scandir(folder_path) as entries:
+            for entry in entries:
+                item_type, extension = classify_entry(entry)
+                yield (entry.name, item_type, extension)
+
+    async for item in aio_iterate(iter_entries(), batch_size):
+        yield item
 
-    This function first calls `create_bucket_folders` to determine the
-    destination subfolder for each file (based on its type/extension) and
-    to ensure these subfolders exist. It then iterates through the map
-    returned by `create_bucket_folders` (which maps destination subfolder
-    names to lists of original filenames) and moves each original file
-    from the `folder_path` into its corresponding created subfolder.
 
-    Errors during individual file moves (e.g., permission issues, file
-    not found at the time of move) are caught, printed to the console,
-    and the function attempts to continue with other files.
+
+
+async def aio_walk_items(folder_path, max_depth = None, follow_symlinks = False,
+                         exclude = None, detect_content = None,
+                         category_rules = None, batch_size = 1000):
+    """Async version of `walk_items`
 
     Args:
-        folder_path (str): The full path to the main folder containing the
-                           source files that need to be moved and where the
-                           destination subfolders (buckets) have been or will
-                           be created.
+        folder_path, max_depth, follow_symlinks, exclude, detect_content,
+            category_rules (optional): Passed to `walk_items`.
+        batch_size (int, optional): Passed to `aio_iterate`. Defaults to
+            1000.
 
-    Returns:
-        None: This function performs file system operations and prints status
-              or error messages directly to the console.
+    Yields:
+        tuple[str, str, int]: The (path, category, size) record of every
+            item that is not a folder
 
     Raises:
-        None: Handles errors from `create_bucket_folders` (by returning early
-              if it fails) and individual file move operations internally by
-              printing messages. (External interrupts like KeyboardInterrupt
-              can still occur).
+        OSError: If folder_path could not be walked
     """
 
-    #retreives the files to move from the create_bucket_folders function
-    #as a dictionary
-    files_to_move = create_bucket_folders(folder_path)
+    async for record in aio_iterate(walk_items(folder_path, max_depth,
+                                               follow_symlinks, exclude,
+                                               detect_content, category_rules),
+                                    batch_size):
+        yield record
 
-    #if there are no files to move then the function stops executing
-    if not files_to_move:
-        print("\n\tERROR - No files to move")
-        return
 
-    #loops through each category with in the dictionary
-    for category in files_to_move:
 
-        #loops through each file in the category
-        for file in files_to_move[category]:
 
-            #generates the file path for the new location of the file
-            new_file_path = os.path.join(folder_path, category, file)
+async def aio_iter_file_lines(file_name, buffer_size = 1024 * 1024,
+                              use_mmap = False, compression = "auto",
+                              batch_size = 1000):
+    """Async version of `iter_file_lines`
 
-            #generates the file path for the current location of the file
-            old_file_path = os.path.join(folder_path, file)
+    Args:
+        file_name, buffer_size, use_mmap, compression (optional): Passed to
+            `iter_file_lines`.
+        batch_size (int, optional): Passed to `aio_iterate`. Defaults to
+            1000.
 
-            #attempts to move the file from its old location to its new location
-            try:
-                #can generate a permission error
-                shutil.move(old_file_path, new_file_path)
+    Yields:
+        str: Each non-empty line from the file with leading/trailing
+             whitespace removed.
 
-            except Exception as e:
-                #incase the specific file could not be moved
-                print(f"\n\tERROR: Could not move {file} due to {e}")
+    Raises:
+        OSError: If the file could not be opened or read
+        UnicodeDecodeError: If the file is not valid UTF-8
+    """
 
+    async for line in aio_iterate(iter_file_lines(file_name, buffer_size,
+                                                  use_mmap, compression),
+                                  batch_size):
+        yield line
 
 
 
-def rename_files(folder_path):
-    """
-    Renames files within a specified folder by removing leading/trailing whitespace
-    and replacing spaces with underscores. If a file with the new name already
-    exists, it appends a numerical suffix (e.g., "_2", "_3") to ensure uniqueness.
+
+async def aio_iter_csv_rows(file_name, columns = None, batch_size = 1000):
+    """Async version of `iter_csv_rows` that yields rows one at a time
 
     Args:
-        folder_path (str): The absolute or relative path to the folder
-                           containing the files to be renamed.
+        file_name, columns (optional): Passed to `iter_csv_rows`.
+        batch_size (int, optional): Passed to `aio_iterate`. Defaults to
+            1000.
 
-    Returns:
-        bool: True if the operation completes (or attempts to complete) for all
-              files, False if the initial listing of files in the folder_path
-              fails (e.g., path does not exist or is not a directory).
-              Note: Individual file renaming errors within the loop are caught
-              and allow the function to continue with other files, but the
-              function will still return True in such cases.
+    Yields:
+        list[str]: The values of each row in the order of columns
 
     Raises:
-        None: All errors handled internally
+        OSError: If the file could not be opened or read
+        KeyError: If a column asked for is not in the headers
+        csv.Error: If the file is malformed
     """
 
-    #initializes the list of files
-    files = []
+    async for row in aio_iterate(iter_csv_rows(file_name, columns), batch_size):
+        yield row
+
+
 
-    #Attempts to get the list of files from the folder path. If a list of files
-    #throws an error then the function returns false to signal failure
-    try:
-        files = os.listdir(folder_path)
-    except Exception as e:
-        return False
 
-    #loops through the entire list of files
-    for file in files:
+async def aio_list_items(folder_path, cache_file = None):
+    """Async version of `list_items`
 
-        #generates the current path of the item in files
-        old_path = os.path.join(folder_path, file)
+    Args:
+        folder_path, cache_file (optional): Passed to `list_items`.
 
-        #checks if the item is a file
-        if os.path.isfile(old_path):
+    Returns:
+        None: Prints the items of the folder to the console
 
-            #takes out any blank spaces on the ends of the file name
-            new_name = file.strip()
+    Raises:
+        asyncio.CancelledError: If the task is cancelled
+    """
 
-            #replaces all of the blankspaces to underscores
-            if ' ' in new_name:
-                new_name = new_name.replace(' ', '_')
+    await aio_call(list_items, folder_path, cache_file)
 
-            #checks if the new name is seperate from the old name
-            if new_name != file:
 
-                #generates a new path for file
-                new_path = os.path.join(folder_path, new_name)
 
-                #counts the amount of attempts to generate a new file
-                attempt = 1
 
-                #runs until a non-existent name is generated
-                while True:
+async def aio_group_items(folder_path, cache_file = None, detect_content = None,
+                          category_rules = None):
+    """Async version of `group_items`
 
-                    #saves the name of the extension
-                    ext = os.path.splitext(new_path)[1]
+    Args:
+        folder_path, cache_file, detect_content, category_rules (optional):
+            Passed to `group_items`.
 
-                    if attempt < 2:
+    Returns:
+        dict[str, list[str]] or None: The items of the folder by category,
+            or None if the folder could not be grouped
 
-                        #if it is the first attempt renaming a file
-                        try:
-                            #attempts to rename the file
-                            os.rename(old_path, new_path)
-                            break
+    Raises:
+        asyncio.CancelledError: If the task is cancelled
+    """
 
-                        except FileExistsError:
-                            #if the file name already exists increases the
-                            #amount of attempts
-                            attempt += 1
+    return await aio_call(group_items, folder_path, cache_file, detect_content,
+                          category_rules)
 
-                            #splices the path of the attempted name
-                            new_path = os.path.splitext(new_path)[0]
 
-                            #inserts the "_2" tag at the end of the file
-                            new_path += "_2"
 
-                            #appends the extension bag to the file name
-                            new_path += ext
 
-                        except Exception as e:
-                            #does not attempt to try any more operations
-                            #on the file if the name of the file can not 
-                            #be changed
-                            break
-                    else:
-                        #on repeat attempts of renaming 
-                        try:
-                            os.rename(old_path, new_path)
-                            #if file renaming succeeds
-                            break
-                        except FileExistsError:
-                            #if name on the file still does not work
+async def aio_rename_files(folder_path, rules = None, recursive = False,
+                           max_depth = None, exclude = None):
+    """Async version of `rename_files`. The renames are planned and made in
+    one call, so once started they all finish even if the task is
+    cancelled, which keeps chains of renames from being cut in half.
 
-                            #splices the extension from the new file path
-                            new_path = os.path.splitext(new_path)[0]
+    Args:
+        folder_path, rules, recursive, max_depth, exclude (optional): Passed
+            to `rename_files`.
 
-                            #generates the old addon for the file path
-                            old_addon = f"_{attempt}"
+    Returns:
+        bool: False if the folder could not be listed, as with
+            `rename_files`
 
-                            #takes the old addon off of the spliced file path
-                            new_path = new_path[:(len(new_path)-len(old_addon))]
+    Raises:
+        asyncio.CancelledError: If the task is cancelled
+    """
 
-                            #increments the total amount of attempts
-                            attempt += 1
+    return await aio_call(rename_files, folder_path, rules, recursive,
+                          max_depth, exclude)
 
-                            #appends the addon to path of the file
-                            new_path += f"_{attempt}"
 
-                            #adds the extension back to the file
-                            new_path += ext
 
-    #returns true to signal operation success
-    return True
 
+async def aio_get_csv_dictionary(file_name, columns = None):
+    """Async version of `get_csv_dictionary`
 
+    Args:
+        file_name, columns (optional): Passed to `get_csv_dictionary`.
 
+    Returns:
+        dict[str, list[str]]: The columns of the CSV file
 
-def valid_read_file(file_name):
+    Raises:
+        asyncio.CancelledError: If the task is cancelled
     """
-    Validates if a file can be opened for reading with UTF-8 encoding.
 
-    This function attempts to open the specified file in read-only mode ('r')
-    using 'utf-8' encoding. It does not read the file's content but checks
-    for its existence, readability, and that it can be initiated for reading
-    with UTF-8 encoding. All potential exceptions during this process are
-    handled internally, and the function will return False in such cases.
+    return await aio_call(get_csv_dictionary, file_name, columns)
+
+
+
+
+async def aio_dictionary_to_csv(data_dict, file_name, headers,
+                                batch_size = CSV_BATCH_SIZE, level = None):
+    """Async version of `dictionary_to_csv`
 
     Args:
-        file_name (str): The path to the file to be validated.
+        data_dict, file_name, headers, batch_size, level (optional): Passed
+            to `dictionary_to_csv`.
 
     Returns:
-        bool: True if the file can be successfully opened for reading.
-              False if any error occurs during the attempt to open the file.
+        bool: True on success, False if any error occurs.
 
     Raises:
-        None: This function handles all exceptions internally and does not
-              raise any exceptions to the caller.
+        asyncio.CancelledError: If the task is cancelled
     """
 
-    #Attempts to open the file for reading
-    try:
-        #Only tries to open the file
-        with open(file_name, "r", encoding="utf-8") as f:
-            pass
-        #Returns true if the file be read
-        return True
-    except Exception as e:
-        #Returns false if any errors on the file can be read
-        return False
+    return await aio_call(dictionary_to_csv, data_dict, file_name, headers,
+                          batch_size, level)
 
 
 
-def file_segement_lines(file_name):
-    """
-    Reads a file line by line, strips leading/trailing whitespace from each line,
-    and returns a list containing only non-empty lines.
 
-    The function attempts to open and read the specified file using UTF-8 encoding.
-    If any error occurs during file opening or reading (e.g., file not found,
-    permission issues, encoding errors), the function will handle the error
-    internally and return the list of lines collected up to the point of the
-    error, or an empty list if the error occurred before any lines were read.
+async def aio_assign_folders(folder_path, recursive = False, max_depth = None,
+                             follow_symlinks = False, exclude = None,
+                             journal_file = None, detect_content = None,
+                             category_rules = None, limit = 4,
+                             batch_size = 1000):
+    """Async version of `parallel_assign_folders`. The folder is walked a
+    batch at a time through `aio_iterate`, and each batch is moved like a
+    batch of `iter_apply_plan`. Every blocking call of the sort (walking,
+    detecting content, creating folders, writing the journal and moving
+    files) runs in the shared pool of `get_aio_executor`, and at most limit
+    of them at once, so a sort never starts threads of its own and never
+    starves other requests however large the folder is. Moves into the same
+    bucket are made in order.
+
+    Cancelling the task stops the sort once the batch being moved is done.
+    With a journal_file the sort can then be resumed by calling the function
+    again with the same journal.
 
     Args:
-        file_name (str): The path to the file to be read.
+        folder_path (str): The full path to the main folder containing the
+                           source files and the destination subfolders
+        recursive, max_depth, follow_symlinks, exclude, detect_content,
+                           category_rules (optional): Passed to
+                           `iter_move_plan`.
+        journal_file (str, optional): Passed to `iter_apply_plan`.
+                           Defaults to None.
+        limit (int, optional): The amount of blocking calls this sort runs
+                           in the shared pool at once. Defaults to 4.
+        batch_size (int, optional): The amount of moves made per batch.
+                           Defaults to 1000.
 
     Returns:
-        list[str]: A list of strings, where each string is a non-empty line
-                   from the file with leading/trailing whitespace removed.
-                   If an error occurs, this list may be empty or partially
-                   populated with lines read before the error.
+        list[dict] or None: The result of every move, as described in
+            `apply_move`, or None if folder_path could not be walked
 
     Raises:
-        None: This function handles all exceptions internally and does not
-              raise any exceptions to the caller.
+        asyncio.CancelledError: If the task is cancelled
     """
 
-    #initializes the list for each string
-    segmented_lines = []
+    #only the items directly in the folder are sorted unless recursive
+    if not recursive:
+        max_depth = 0
+
+    category_rules = category_rules or DEFAULT_CATEGORY_RULES
+
+    #the calls of this sort that may run in the shared pool at once
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def call(function, *args):
+        #runs a blocking call of the sort in one of its limit places
+        async with semaphore:
+            return await aio_call(function, *args)
+
+    async def detect(records):
+        #categorizes the files of a batch of records by their content
+        checked = [index for index, (path, category, size) in enumerate(records)
+                   if is_content_checked(category, detect_content)]
+        detected = await asyncio.gather(*(call(detect_content_type,
+                                               records[index][0])
+                                          for index in checked))
+        for index, content in zip(checked, detected):
+            path, category, size = records[index]
+            records[index] = (path, get_content_category(category, content),
+                              size)
+
+    async def move_bucket(moves):
+        #moves the files of one bucket one after another
+        return [(index, await call(apply_move, move, journal))
+                for index, move in moves]
+
+    def record_results(results):
+        #records the outcome of every move of a batch in the journal
+        for result in results:
+            if result["status"] == "moved":
+                journal.write("done", result["source"], result["dest"],
+                              result["method"])
+            else:
+                journal.write("failed", result["source"], result["dest"])
+        journal.sync()
+
+    async def move_batch(records):
+        #plans, prepares and makes the moves of a batch of records
+        if detect_content:
+            await detect(records)
+        batch = [move for move in (get_move(folder_path, path, category, size,
+                                            category_rules)
+                                   for path, category, size in records)
+                 if move is not None]
+
+        outcomes, movable = await call(prepare_move_batch, batch, journal,
+                                       created)
+
+        #the moves into each bucket, along with their position in the batch
+        buckets = {}
+        positions = (index for index in range(len(batch))
+                     if index not in outcomes)
+        for index, move in zip(positions, movable):
+            buckets.setdefault(os.path.dirname(move[1]), []).append(
+                (index, move))
+
+        moving = asyncio.ensure_future(asyncio.gather(
+            *(move_bucket(moves) for moves in buckets.values())))
+
+        try:
+            await asyncio.shield(moving)
+        finally:
+            #a cancelled sort still waits for the moves already started and
+            #records them before it stops
+            moved = dict(itertools.chain.from_iterable(await moving))
+            if journal:
+                await call(record_results,
+                           [moved[index] for index in sorted(moved)])
+
+        outcomes.update(moved)
+        return [outcomes[index] for index in range(len(batch))]
+
+    #destination folders that have already been created
+    created = set()
+
+    results = []
+    records = []
+    journal = None
 
-    #Attempts to open the file and read line by line
     try:
-        #If any errors are generated then the empty list is returned
-        with open(file_name, "r", encoding="utf-8") as f:
+        #repairs and opens the journal, if there is one
+        if journal_file:
+            await call(recover_journal, journal_file)
+            journal = await call(MoveJournal, journal_file)
 
-            #Iterates through all lines in the file
-            for line in f:
-                
-                #removes the empty space off the ends of a line
-                new_string = line.strip()
+        walk = walk_items(folder_path, max_depth, follow_symlinks, exclude,
+                          category_rules = category_rules)
 
-                #ensures that only strings with actual information are added
-                if len(new_string) > 0:
-                    segmented_lines.append(new_string)
+        async for record in aio_iterate(walk, batch_size):
+            records.append(record)
+            if len(records) >= batch_size:
+                results.extend(await move_batch(records))
+                records = []
+
+        if records:
+            results.extend(await move_batch(records))
+
+        return results
 
     except Exception as e:
-        #If any errors in file processing occured the string list will return
-        #as it was before any errors occured
-        pass
+        record_error("move", e)
+        return None
 
-    #returns the list of all of the lines in the file
-    return segmented_lines
+    finally:
+        if journal:
+            await call(journal.close)
 
 
 
 
-def string_list_to_file(string_list, file_name):
+def read_manifest(file_name, action = "sort"):
+    """Reads the jobs of a batch from a manifest file, which is either a JSON
+    list of jobs (objects with a 'folder' and the optional keys described in
+    `run_job`) or a text file with one folder per line, where blank lines
+    and lines starting with '#' are skipped
+
+    Args:
+        file_name (str): The path to the manifest
+        action (str, optional): The action of the folders of a text manifest
+            and of JSON jobs without one. Defaults to "sort".
+
+    Returns:
+        list[dict]: The jobs
+
+    Raises:
+        OSError: If the manifest could not be read
+        ValueError: If a JSON manifest is not a list of jobs with a folder
     """
-    Writes a list of strings to a file, with each string on a new line.
 
-    This function attempts to open the specified file in write mode ('w') with
-    UTF-8 encoding. If the file already exists, its contents will be overwritten.
-    Each string from the input list is written to the file, followed by a
-    newline character.
+    with open(file_name, "r", encoding = "utf-8") as f:
+        text = f.read()
+
+    if file_name.lower().endswith(".json"):
+        jobs = json.loads(text)
+        if not isinstance(jobs, list) or not all(
+                isinstance(job, dict) and "folder" in job for job in jobs):
+            raise ValueError(f"{file_name} is not a list of jobs")
+        return [{"action": action, **job} for job in jobs]
+
+    return [{"folder": line.strip(), "action": action}
+            for line in text.splitlines()
+            if line.strip() and not line.strip().startswith("#")]
+
+
+
+
+def run_job(job):
+    """Runs one job of a batch: sorting, renaming or listing a folder. Meant
+    to run in a process of the pool of `run_jobs`.
 
     Args:
-        string_list (list[str]): A list of strings to be written to the file.
-        file_name (str): The path to the file where the strings will be written.
-                         If the file does not exist, it will be created.
-                         If it exists, it will be overwritten.
+        job (dict): The job, with the keys 'folder', 'action' ('sort',
+            'rename' or 'list') and optionally 'recursive', 'max_depth',
+            'follow_symlinks', 'exclude', 'journal_file', 'detect_content',
+            'duplicates' and 'category_rules' (a list of rules as described
+            in `CategoryRules`), which are passed to `sort_folder`,
+            `plan_renames` or `get_groups`.
 
     Returns:
-        bool: True if all strings are successfully written to the file.
-              False if any error occurs during the file opening or writing process.
+        dict: The job with the keys 'status' ('done' or 'failed'), 'error',
+            'seconds' and the outcome of its action: 'moved', 'skipped',
+            'failed' (the results of the failed moves) and 'buckets' for
+            sorting, 'renamed' and 'planned' for renaming, and 'items' and
+            'categories' (the amount of items of each) for listing
 
     Raises:
-        None: This function handles all exceptions internally (e.g., IOError,
-              PermissionError) and does not raise any exceptions to the caller.
-              It returns False upon encountering an error.
+        None: Errors are recorded in the result
     """
 
-    #Attempts to open the file for writing and clearing all of its contents
+    result = dict(job, status = "done", error = None)
+    folder_path = job["folder"]
+    action = job.get("action", "sort")
+
+    start = time.perf_counter()
+
     try:
-        with open(file_name, "w", encoding="utf-8") as f:
+        #the rules of a manifest are compiled in the process of the job
+        category_rules = job.get("category_rules")
+        if category_rules is not None and not isinstance(category_rules,
+                                                         CategoryRules):
+            category_rules = CategoryRules(category_rules)
+
+        if action == "sort":
+            report = sort_folder(folder_path, job.get("recursive", False),
+                                 job.get("max_depth"),
+                                 job.get("follow_symlinks", False),
+                                 job.get("exclude"), job.get("journal_file"),
+                                 job.get("detect_content"),
+                                 job.get("duplicates"),
+                                 category_rules = category_rules)
+            result.update(moved = report.moved, skipped = report.skipped,
+                          failed = report.failed, buckets = report.buckets)
+
+        elif action == "rename":
+            check_folder_path(folder_path)
+            renames = plan_renames(folder_path, None,
+                                   job.get("recursive", False),
+                                   job.get("max_depth"), job.get("exclude"))
+            result.update(planned = len(renames),
+                          renamed = apply_renames(renames))
+
+        elif action == "list":
+            groups = get_groups(folder_path,
+                                detect_content = job.get("detect_content"),
+                                category_rules = category_rules)
+            result.update(items = sum(len(items) for items in groups.values()),
+                          categories = {category: len(items) for category,
+                                        items in groups.items()})
 
-            #Adds each line from the string list to the file
-            for line in string_list:
-                f.write(line + "\n")
+        else:
+            raise ValueError(f"Unknown action {action!r}")
 
     except Exception as e:
-        #returns false for operation failure
-        return False
-
-    #returns true for operation success
-    return True
+        record_error(action, e)
+        result.update(status = "failed", error = f"{type(e).__name__}: {e}")
 
+    result["seconds"] = time.perf_counter() - start
+    return result
 
 
 
-def get_csv_dictionary(file_name):
-    """
-    Reads a CSV file and returns its contents as a dictionary of lists,
-    where keys are column headers and values are lists of column data.
 
-    This function attempts to open and read the specified CSV file using
-    UTF-8 encoding. It uses `csv.DictReader` to process the CSV data.
-    If the CSV file is empty or headers cannot be determined, an empty
-    dictionary might be returned. If a row is missing a value for a
-    particular header, an empty string "" is used as a placeholder.
+def run_jobs(jobs, max_workers = None, per_device = 1, device_limits = None):
+    """Runs the jobs of a batch across a pool of processes, limiting how many
+    jobs run at once on each device (st_dev), so folders on the same disk are
+    not sorted all at once and make it seek back and forth, while folders on
+    different disks are sorted side by side. Jobs on the same folder run one
+    after another in the order given. The outcome of every job is gathered
+    into a single report.
 
     Args:
-        file_name (str): The path to the CSV file to be read.
+        jobs (iterable[dict]): The jobs, as described in `run_job`
+        max_workers (int, optional): The amount of processes. Defaults to
+            None for the amount of processors.
+        per_device (int, optional): The amount of jobs that run at once on
+            each device. Defaults to 1.
+        device_limits (dict[str, int], optional): The amount of jobs that
+            run at once on the device of each path (e.g., a mount point),
+            instead of per_device. Defaults to None.
 
     Returns:
-        dict[str, list[str]]: A dictionary where each key is a column header
-                              (str) from the CSV file, and its corresponding
-                              value is a list of strings representing the data
-                              in that column. If an error occurs during file
-                              processing (e.g., file not found, permission
-                              denied, malformed CSV), an empty dictionary or a
-                              partially populated dictionary (if the error
-                              occurs mid-processing) might be returned.
+        dict: The report, with the keys 'jobs' (the result of every job in
+            the order given, as described in `run_job`), 'devices' (the
+            amount of jobs on each device) and 'totals' (the amount of
+            'jobs', 'failed' jobs, files 'moved' and 'renamed', 'items'
+            listed and the 'seconds' the batch took)
 
     Raises:
-        None: This function handles all exceptions internally (e.g.,
-              FileNotFoundError, PermissionError, csv.Error, general Exception)
-              and does not raise any exceptions to the caller. It returns the
-              `columns` dictionary in its current state upon encountering an error.
+        None: Errors are recorded in the results of the jobs
     """
 
-    #initializes the list of columns from the csv file
-    columns = {}
+    start = time.perf_counter()
 
-    #attempts to open the csv file for reading
-    try:
-        #sets the encoding for the file
-        with open(file_name, "r", encoding="utf-8") as f:
+    #the device of each limit
+    limits = {}
+    for path, limit in (device_limits or {}).items():
+        try:
+            limits[os.stat(path).st_dev] = max(1, limit)
+        except OSError as e:
+            record_error("listing", e)
+
+    #the result of every job by its position
+    results = {}
 
-            #sets a reader for the csv file
-            reader = csv.DictReader(f)
+    #the jobs waiting on each device, in order, by their position
+    queues = {}
 
-            #gets the headers from the csv file
-            headers = reader.fieldnames
+    for index, job in enumerate(jobs):
+        job = dict(job)
+        try:
+            device = os.stat(job["folder"]).st_dev
+        except OSError as e:
+            #jobs on folders that can not be reached fail straight away
+            results[index] = dict(job, status = "failed", seconds = 0.0,
+                                  error = f"{type(e).__name__}: {e}")
+            continue
+        job["device"] = device
+        queues.setdefault(device, collections.deque()).append((index, job))
+
+    devices = {str(device): len(queue) for device, queue in queues.items()}
+
+    #the jobs running on each device and the folders they run on
+    running = collections.Counter()
+    busy = set()
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers) as executor:
+
+        #the running job of each future
+        futures = {}
+
+        while queues or futures:
+
+            #starts the first waiting job of every device below its limit,
+            #taking turns between devices
+            started = True
+            while started:
+                started = False
+                for device in list(queues):
+                    queue = queues[device]
+                    if running[device] >= limits.get(device, max(1, per_device)):
+                        continue
+
+                    #a job waits while an earlier job runs on its folder
+                    for position, (index, job) in enumerate(queue):
+                        if job["folder"] not in busy:
+                            del queue[position]
+                            break
+                    else:
+                        continue
 
-            #sets each categories in columns dictionary to empty lists
-            for header in headers:
-                columns[header] = []
+                    futures[executor.submit(run_job, job)] = (index, job)
+                    running[device] += 1
+                    busy.add(job["folder"])
+                    started = True
 
-            #iterates over each row from the reader
-            for row in reader:
+                    if not queue:
+                        del queues[device]
 
-                #iterates over each header from the headers list
-                for header in headers:
+            if not futures:
+                break
 
-                    #adds each string from the location (header, row#) in the csv
-                    columns[header].append(row.get(header, ""))
+            done, pending = concurrent.futures.wait(
+                futures, return_when = concurrent.futures.FIRST_COMPLETED)
 
-    except Exception as e:
-        #passes over if any errors occur in file handling
-        pass
+            for future in done:
+                index, job = futures.pop(future)
+                running[job["device"]] -= 1
+                busy.discard(job["folder"])
 
-    #returns the full dictionary of all of the columns
-    return columns
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    #the process running the job died
+                    record_error(job.get("action", "sort"), e)
+                    results[index] = dict(job, status = "failed", seconds = 0.0,
+                                          error = f"{type(e).__name__}: {e}")
 
+    ordered = [results[index] for index in sorted(results)]
 
+    totals = {"jobs": len(ordered),
+              "failed": sum(result["status"] == "failed" for result in ordered),
+              "moved": sum(result.get("moved", 0) for result in ordered),
+              "renamed": sum(result.get("renamed", 0) for result in ordered),
+              "items": sum(result.get("items", 0) for result in ordered),
+              "seconds": time.perf_counter() - start}
 
+    return {"jobs": ordered, "devices": devices, "totals": totals}
 
-def dictionary_to_csv(data_dict, file_name, headers):
-    """Writes a dictionary of lists to a CSV file.
 
-    Overwrites `file_name` if it exists. Uses `headers[0]` from `data_dict`
-    to determine row count. Only columns in `headers` are written.
+
+
+def main(arguments = None):
+    """The command line entry point, which sorts, renames or lists every
+    folder given and every folder of a manifest with `run_jobs`, and prints
+    or saves the report
+
+    Usage:
+        python FileOperator.py sort FOLDER [FOLDER ...] [--recursive]
+        python FileOperator.py rename --manifest folders.txt --per-device 2
+        python FileOperator.py list FOLDER --report report.json
+        python FileOperator.py sort FOLDER --rules rules.json --follow-symlinks
 
     Args:
-        data_dict (dict[str, list]): Dictionary with column names as keys
-                                     and lists of column data as values.
-        file_name (str): Path to the output CSV file.
-        headers (list[str]): Ordered list of column headers for the CSV.
+        arguments (list[str], optional): The command line arguments. Defaults
+            to None for sys.argv.
 
     Returns:
-        bool: True on success, False if any error occurs.
-
-    Raises:
-        None: Handles all exceptions internally.
+        int: The exit status, 1 if any job failed, otherwise 0
     """
-    #Attempts to open a file for complete overwriting via a dictionary
-    #If this can not be done then false is returned for operation failure.
-    try:
-        #opens the file with the name of file_name for a complete overwrite
-        with open(file_name, "w", encoding="utf-8", newline = '') as f:
 
-            #sets the file writer to have the headers of the dictionary data_dict
-            file_writer = csv.DictWriter(f, fieldnames = headers)
-
-            #writes the headers to the csv
-            file_writer.writeheader()
+    parser = argparse.ArgumentParser(
+        prog = "FileOperator.py",
+        description = "Sorts, renames or lists many folders at once.")
+    parser.add_argument("action", choices = ["sort", "rename", "list"])
+    parser.add_argument("folders", nargs = "*",
+                        help = "the folders to work on")
+    parser.add_argument("--manifest", action = "append", default = [],
+                        help = "a JSON list of jobs or a text file of folders, "
+                               "one per line")
+    parser.add_argument("--recursive", action = "store_true",
+                        help = "include the files of every subfolder")
+    parser.add_argument("--max-depth", type = int, default = None)
+    parser.add_argument("--follow-symlinks", action = "store_true",
+                        help = "sort the files of linked folders as well")
+    parser.add_argument("--exclude", action = "append", default = None,
+                        help = "a glob pattern of items to skip")
+    parser.add_argument("--detect-content", choices = ["missing", "all"])
+    parser.add_argument("--duplicates", choices = ["hardlink", "delete"],
+                        help = "remove duplicate files after sorting")
+    parser.add_argument("--rules",
+                        help = "a JSON list of category rules, see CategoryRules")
+    parser.add_argument("--workers", type = int, default = None,
+                        help = "the amount of processes")
+    parser.add_argument("--per-device", type = int, default = 1,
+                        help = "the amount of jobs at once on each device")
+    parser.add_argument("--device-limit", action = "append", default = [],
+                        metavar = "PATH=N",
+                        help = "the amount of jobs at once on the device of PATH")
+    parser.add_argument("--report", help = "write the JSON report to this file")
+    options = parser.parse_args(arguments)
+
+    #the category rules are checked before any job is started
+    category_rules = None
+    if options.rules:
+        try:
+            with open(options.rules, "r", encoding = "utf-8") as f:
+                category_rules = json.load(f)
+            CategoryRules(category_rules)
+        except (OSError, ValueError, TypeError, re.error) as e:
+            parser.error(f"the category rules could not be read: {e}")
+
+    #the options every job of the command line shares
+    shared = {"action": options.action, "recursive": options.recursive,
+              "max_depth": options.max_depth,
+              "follow_symlinks": options.follow_symlinks,
+              "exclude": options.exclude,
+              "detect_content": options.detect_content,
+              "duplicates": options.duplicates,
+              "category_rules": category_rules}
+
+    jobs = [dict(shared, folder = folder) for folder in options.folders]
+    try:
+        for manifest in options.manifest:
+            jobs.extend(dict(shared, **job)
+                        for job in read_manifest(manifest, options.action))
+    except (OSError, ValueError) as e:
+        parser.error(f"the manifest could not be read: {e}")
 
-            #iterates over reach row in the dictionary
-            for index in range(len(data_dict[headers[0]])):
+    if not jobs:
+        parser.error("no folders were given")
 
-                #creates a dictionary for each grid space in the row
-                row_dict = {}
+    device_limits = {}
+    for limit in options.device_limit:
+        path, separator, amount = limit.rpartition("=")
+        if not separator or not amount.isdigit():
+            parser.error(f"invalid device limit {limit!r}")
+        device_limits[path] = int(amount)
 
-                #loops over each grid space in the row
-                for column in data_dict:
+    report = run_jobs(jobs, options.workers, options.per_device, device_limits)
 
-                    #fills in every grid space in the row assinging each space
-                    #to its proper column
-                    row_dict[column] = data_dict[column][index]
+    text = json.dumps(report, indent = 2, default = str)
+    if options.report:
+        with open(options.report, "w", encoding = "utf-8") as f:
+            f.write(text + "\n")
 
-                #writes each row to the csv
-                file_writer.writerow(row_dict)
+        totals = report["totals"]
+        print(f"{totals['jobs']} jobs, {totals['failed']} failed, "
+              f"{totals['moved']} moved, {totals['renamed']} renamed, "
+              f"{totals['items']} items listed in {totals['seconds']:.2f}s")
+    else:
+        print(text)
 
-        #returns true to signal operation success
-        return True
+    return 1 if report["totals"]["failed"] else 0
 
-    except Exception as e:
 
-        #if complete file overwriting failes then false is returned to signal
-        #operation failure
-        return False
 
 
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1641 @@
+#FileOperatorBenchmark.py
+"""
+Benchmarks for the File Operations Handler (FileOperator.py)
+
+Measures the time and the amount of file system calls made by the functions
+in FileOperator.py on generated folders
+
+Usage:
+    python FileOperatorBenchmark.py [item count] [file size in MiB] [csv rows] [names]
+    python FileOperatorBenchmark.py suite [scales, e.g. 1k,10k,100k,1m] [report.json]
+    python FileOperatorBenchmark.py compare [baseline.json] [report.json]
+"""
+
+__author__ = "Maximus Barraza (Github: X86-Point5)"
+__version__ = "1.0.0"
+__date__ = "2025-05-14"
+
+#used for operating system interactions such as creating the generated folders
+import os
+
+#used for removing the generated folders
+import shutil
+
+#used for writing the generated csv files and the legacy csv output
+import csv
+
+#used for passing the item count from the command line
+import sys
+
+#used for creating the generated folders in a temporary location
+import tempfile
+
+#used for timing the benchmarked functions
+import time
+
+#used for hashing files in the legacy duplicate finder
+import hashlib
+
+#used for running the watched folder benchmark in the background
+import threading
+
+#used for sending the console output of benchmarked functions to the null
+#device
+import contextlib
+
+#used for measuring the peak memory of the benchmarked functions
+import tracemalloc
+
+#used for the seeded generators of the csv files and the suite fixtures
+import random
+
+#used for counting colliding names in the generated trees
+import collections
+
+#used for running every case of the suite in a process of its own
+import multiprocessing
+
+#used for writing and comparing the suite reports
+import json
+
+#used for describing the machine in the suite reports
+import platform
+
+#the module being benchmarked
+import FileOperator
+
+
+
+#extensions given to the generated files
+EXTENSIONS = [".txt", ".pdf", ".csv", ".h", ".JPG", ""]
+
+#the relative amount of files with each extension in the generated trees
+TREE_EXTENSIONS = {".txt": 30, ".jpg": 20, ".pdf": 15, ".csv": 10, ".py": 10,
+                   ".tar.gz": 5, ".h": 5, "": 5}
+
+#the sizes of the fixtures of each scale of the suite: the amount of items in
+#the generated trees, the size of the text file in MiB and the amount of
+#csv rows
+SUITE_SCALES = {"1k": {"items": 1000, "file_mb": 1, "rows": 1000},
+                "10k": {"items": 10000, "file_mb": 16, "rows": 10000},
+                "100k": {"items": 100000, "file_mb": 128, "rows": 100000},
+                "1m": {"items": 1000000, "file_mb": 1024, "rows": 1000000}}
+
+#the cases of the suite, named after the function they run
+SUITE_CASES = ["group_items", "walk_items", "assign_folders", "rename_files",
+               "file_segement_lines", "get_csv_dictionary",
+               "get_csv_dictionary_parallel", "get_csv_columns",
+               "dictionary_to_csv"]
+
+
+
+
+class CountedEntry:
+    """Wraps an `os.DirEntry` so the system calls its `stat` method makes are
+    counted, which replacing the functions of the os module does not reach.
+    An entry keeps the result of its first `stat` call, and only makes a
+    call of its own for following a symbolic link, so only those calls are
+    counted. `is_dir`, `is_file` and `is_symlink` are answered from the
+    listing on most file systems and are not counted.
+    """
+
+    def __init__(self, entry, counts):
+        #the wrapped entry
+        self.entry = entry
+
+        #the counts of the `SyscallCounter` the entry belongs to
+        self.counts = counts
+
+        #whether stat has been called without and with following a link
+        self.called = set()
+
+        self.name = entry.name
+        self.path = entry.path
+
+    def stat(self, *, follow_symlinks = True):
+        followed = follow_symlinks and self.entry.is_symlink()
+        if followed not in self.called:
+            self.called.add(followed)
+            self.counts["DirEntry.stat"] += 1
+        return self.entry.stat(follow_symlinks = follow_symlinks)
+
+    def __getattr__(self, name):
+        #every other method is the entry's own
+        return getattr(self.entry, name)
+
+    def __fspath__(self):
+        return self.path
+
+
+
+
+class CountedScandir:
+    """Wraps the iterator of `os.scandir` so each entry it yields is a
+    `CountedEntry`"""
+
+    def __init__(self, iterator, counts):
+        self.iterator = iterator
+        self.counts = counts
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return CountedEntry(next(self.iterator), self.counts)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.iterator.close()
+
+
+
+
+class SyscallCounter:
+    """Counts the calls made to the listing, stat and rename functions of the
+    os module while it is active. `os.path.isfile`, `os.path.isdir` and
+    `os.path.exists` all call `os.stat` so their system calls are counted
+    as well. With entries the stat calls of the entries of `os.scandir` are
+    counted too (see `CountedEntry`), at the cost of wrapping every entry.
+
+    Usage:
+        with SyscallCounter() as counter:
+            ...
+        print(counter.counts)
+    """
+
+    #names of the os functions that get counted
+    FUNCTIONS = ["stat", "lstat", "listdir", "scandir", "rename", "replace"]
+
+    def __init__(self, entries = False):
+        #the amount of calls made to each function
+        self.counts = {}
+
+        #whether the stat calls of scandir entries are counted
+        self.entries = entries
+
+        #the original functions replaced while counting
+        self.originals = {}
+
+    def __enter__(self):
+
+        #replaces each function with a wrapper that counts its calls
+        for name in self.FUNCTIONS:
+            self.counts[name] = 0
+            self.originals[name] = getattr(os, name)
+            setattr(os, name, self.wrap(name, self.originals[name]))
+
+        #the entries of each listing are wrapped as well
+        if self.entries:
+            self.counts["DirEntry.stat"] = 0
+            scandir = os.scandir
+            os.scandir = lambda *args: CountedScandir(scandir(*args), self.counts)
+
+        return self
+
+    def __exit__(self, *exc_info):
+
+        #restores the original functions
+        for name in self.originals:
+            setattr(os, name, self.originals[name])
+
+    def wrap(self, name, function):
+        #wrapper that increases the count for name before calling function
+        def counted(*args, **kwargs):
+            self.counts[name] += 1
+            return function(*args, **kwargs)
+
+        return counted
+
+    def total(self):
+        #the amount of calls made to every counted function
+        return sum(self.counts.values())
+
+
+
+
+def make_folder(item_count):
+    """Creates a temporary folder filled with empty files of mixed extensions
+    and a few subfolders
+
+    Args:
+        item_count(int): The amount of items to create
+
+    Returns:
+        str: The path to the created folder
+    """
+
+    #the folder the items are created in
+    folder_path = tempfile.mkdtemp(prefix = "FileOperatorBenchmark_")
+
+    for index in range(item_count):
+
+        #every tenth item is a folder
+        if index % 10 == 9:
+            os.mkdir(os.path.join(folder_path, f"folder_{index}"))
+
+        else:
+            #creates an empty file with one of the extensions
+            extension = EXTENSIONS[index % len(EXTENSIONS)]
+            with open(os.path.join(folder_path, f"file_{index}{extension}"), "w"):
+                pass
+
+    return folder_path
+
+
+
+
+def legacy_group_items(folder_path):
+    """The listdir and get_item_type implementation of `group_items` that
+    the scandir engine replaced, kept for comparison
+
+    Args:
+        folder_path(str): The path of the folder
+
+    Returns:
+        dict[str, list[str]]: The items grouped by category
+    """
+
+    sorted_types = {}
+
+    #one listing followed by a join and up to two stats for every item
+    for item_name in os.listdir(folder_path):
+        item_type, extension = FileOperator.get_item_type(folder_path, item_name)
+        category = FileOperator.get_item_category(item_type, extension)
+        sorted_types.setdefault(category, []).append(item_name)
+
+    return sorted_types
+
+
+
+
+def measure(function, *args, entries = False):
+    """Runs a function once while counting its calls to the os module
+
+    Args:
+        function(callable): The function to benchmark
+        *args: The arguments passed to the function
+        entries(bool, optional): Whether the stat calls of scandir entries
+            are counted, passed to `SyscallCounter`. Defaults to False.
+
+    Returns:
+        tuple[float, int, object]: The seconds taken, the amount of counted
+            calls and the value returned by the function
+    """
+
+    with SyscallCounter(entries) as counter:
+        start = time.perf_counter()
+        result = function(*args)
+        elapsed = time.perf_counter() - start
+
+    return (elapsed, counter.total(), result)
+
+
+
+
+def benchmark_group_items(item_count):
+    """Compares the listdir path of grouping items to the scandir engine
+
+    Args:
+        item_count(int): The amount of items in the generated folder
+
+    Returns:
+        None: Prints the results to the console
+    """
+
+    folder_path = make_folder(item_count)
+
+    try:
+        print(f"\n\t----- group_items on {item_count} items -----")
+
+        #runs both implementations over the same folder
+        for name, function in (("listdir + get_item_type", legacy_group_items),
+                               ("scandir engine", FileOperator.group_items)):
+
+            elapsed, calls, result = measure(function, folder_path)
+            print(f"\t{name:<26}{elapsed:>10.4f}s{calls:>10} calls")
+
+    finally:
+        #removes the generated folder
+        shutil.rmtree(folder_path, ignore_errors = True)
+
+
+
+
+def benchmark_scan_cache(item_count):
+    """Compares grouping the items of a folder without a cache to grouping
+    them through a cold and a warm `ScanCache`, and prints how many scans
+    of the unchanged folder it takes for the cache to pay for its cold scan
+
+    Args:
+        item_count(int): The amount of items in the generated folder
+
+    Returns:
+        None: Prints the results to the console
+    """
+
+    folder_path = make_folder(item_count)
+    cache_file = os.path.join(tempfile.mkdtemp(prefix = "FileOperatorBenchmark_"),
+                              "folders.cache")
+
+    #dates the folder back so the cache does not treat it as just modified
+    modified = time.time() - 60
+    os.utime(folder_path, (modified, modified))
+
+    try:
+        print(f"\n\t----- group_items on {item_count} items with a cache -----")
+
+        #the seconds each way of grouping took
+        timings = {}
+
+        for name, args in (("no cache", (folder_path,)),
+                           ("cold cache", (folder_path, cache_file)),
+                           ("warm cache", (folder_path, cache_file))):
+
+            elapsed, calls, result = measure(FileOperator.group_items, *args)
+            timings[name] = elapsed
+            print(f"\t{name:<26}{elapsed:>10.4f}s{calls:>10} calls")
+
+        #the extra time of the cold scan is won back by every warm scan
+        saved = timings["no cache"] - timings["warm cache"]
+        if saved > 0:
+            scans = 1 + max(0, timings["cold cache"] - timings["no cache"]) / saved
+            print(f"\t{'break-even':<26}{scans:>10.1f} scans")
+        else:
+            print(f"\t{'break-even':<26}{'never':>11}")
+
+    finally:
+        shutil.rmtree(folder_path, ignore_errors = True)
+        shutil.rmtree(os.path.dirname(cache_file), ignore_errors = True)
+
+
+
+
+def make_content_folder(item_count):
+    """Creates a temporary folder of files without extensions whose content
+    starts with the signature of a pdf, png, zip or text file
+
+    Args:
+        item_count(int): The amount of files to create
+
+    Returns:
+        str: The path to the created folder
+    """
+
+    folder_path = tempfile.mkdtemp(prefix = "FileOperatorBenchmark_")
+
+    #the start of each kind of file, padded to a few KiB
+    contents = [b"%PDF-1.7\n", b"\x89PNG\r\n\x1a\n", b"PK\x03\x04",
+                b"plain text\n"]
+
+    for index in range(item_count):
+        with open(os.path.join(folder_path, f"file_{index}"), "wb") as f:
+            f.write(contents[index % len(contents)] + b"x" * 4096)
+
+    return folder_path
+
+
+
+
+def benchmark_content_detection(item_count):
+    """Compares recognizing the content of files without extensions in one
+    thread, in a pool of threads, and again from the cache
+
+    Args:
+        item_count(int): The amount of files in the generated folder
+
+    Returns:
+        None: Prints the results to the console
+    """
+
+    folder_path = make_content_folder(item_count)
+    records = [(os.path.join(folder_path, name), "No Extension", 0)
+               for name in os.listdir(folder_path)]
+
+    try:
+        print(f"\n\t----- detecting the content of {item_count} files -----")
+
+        for name, workers in (("1 thread", 1), ("16 threads", 16),
+                              ("16 threads (cached)", 16)):
+
+            #every run but the cached one starts from an empty cache
+            if "cached" not in name:
+                FileOperator.content_cache.clear()
+
+            start = time.perf_counter()
+            for record in FileOperator.detect_item_categories(
+                    records, max_workers = workers):
+                pass
+            elapsed = time.perf_counter() - start
+            print(f"\t{name:<26}{elapsed:>10.4f}s"
+                  f"{item_count / elapsed:>12.0f} files/s")
+
+    finally:
+        shutil.rmtree(folder_path, ignore_errors = True)
+
+
+
+
+def make_similar_folder(file_count, size_kb = 256):
+    """Creates a temporary folder of files of the same size that only differ
+    in their first bytes, where every tenth file is a copy of the file
+    before it
+
+    Args:
+        file_count(int): The amount of files to create
+        size_kb(int, optional): The size of each file in KiB. Defaults to 256.
+
+    Returns:
+        str: The path to the created folder
+    """
+
+    folder_path = tempfile.mkdtemp(prefix = "FileOperatorBenchmark_")
+
+    #the content every file shares after its first bytes
+    payload = b"x" * (size_kb * 1024 - 16)
+
+    for index in range(file_count):
+        header = f"{index - (index % 10 == 9):016d}".encode("ascii")
+        with open(os.path.join(folder_path, f"file_{index}.bin"), "wb") as f:
+            f.write(header + payload)
+
+    return folder_path
+
+
+
+
+def legacy_find_duplicates(folder_path):
+    """Finds duplicate files by hashing every file whole in one process, kept
+    for comparison with the staged duplicate finder
+
+    Args:
+        folder_path(str): The path of the folder
+
+    Returns:
+        list[list[str]]: Every set of duplicate files
+    """
+
+    by_content = {}
+    for name in os.listdir(folder_path):
+        path = os.path.join(folder_path, name)
+        with open(path, "rb") as f:
+            digest = hashlib.blake2b(f.read()).digest()
+        by_content.setdefault(digest, []).append(path)
+
+    return [paths for paths in by_content.values() if len(paths) > 1]
+
+
+
+
+def benchmark_find_duplicates(file_count):
+    """Compares hashing every file whole to the staged duplicate finder, which
+    only hashes the edges of files sharing a size and only hashes the files
+    whose edges collide whole
+
+    Args:
+        file_count(int): The amount of files in the generated folder
+
+    Returns:
+        None: Prints the results to the console
+    """
+
+    folder_path = make_similar_folder(file_count)
+
+    try:
+        print(f"\n\t----- finding duplicates among {file_count} files -----")
+
+        for name, function in (("hash every file", legacy_find_duplicates),
+                               ("size, edges, content", FileOperator.find_duplicates)):
+
+            start = time.perf_counter()
+            result = function(folder_path)
+            elapsed = time.perf_counter() - start
+            print(f"\t{name:<26}{elapsed:>10.4f}s{len(result):>10} sets")
+
+    finally:
+        shutil.rmtree(folder_path, ignore_errors = True)
+
+
+
+
+def legacy_list_items_by_type(folder_path):
+    """The `list_items_by_type` implementation that printed every line of
+    every item separately, kept for comparison
+
+    Args:
+        folder_path(str): The path of the folder
+
+    Returns:
+        None: Prints to the console
+    """
+
+    print(f"\n\t----- Contents of {folder_path} With Type ------")
+    for item_name, item_type, extension in FileOperator.scan_items(folder_path):
+        print(f"\t{item_name}")
+        print(f"\tType: {item_type}")
+        print(f"\tExtension: {extension}")
+        print()
+    print(f"\n\t-----         End of {folder_path}        ------")
+
+
+
+
+def benchmark_core_api(item_count):
+    """Compares the console output of the interactive listing functions to
+    the structured results of the core functions they wrap. The output is
+    written to the null device, so only the cost of formatting and writing
+    it is measured and not the speed of a terminal.
+
+    Args:
+        item_count(int): The amount of items in the generated folder
+
+    Returns:
+        None: Prints the results to the console
+    """
+
+    folder_path = make_folder(item_count)
+
+    try:
+        print(f"\n\t----- listing {item_count} items with and without output -----")
+
+        with open(os.devnull, "w") as null:
+            for name, function in (("print per line", legacy_list_items_by_type),
+                                   ("list_items_by_type", FileOperator.list_items_by_type),
+                                   ("get_items", FileOperator.get_items),
+                                   ("output_items_by_group", FileOperator.output_items_by_group),
+                                   ("get_groups", FileOperator.get_groups)):
+
+                with contextlib.redirect_stdout(null):
+                    start = time.perf_counter()
+                    function(folder_path)
+                    elapsed = time.perf_counter() - start
+
+                print(f"\t{name:<26}{elapsed:>10.4f}s")
+
+    finally:
+        shutil.rmtree(folder_path, ignore_errors = True)
+
+
+
+
+def benchmark_metrics(item_count):
+    """Compares grouping and sorting a folder with metrics disabled, which is
+    the default, to doing the same with metrics enabled
+
+    Args:
+        item_count(int): The amount of items in each generated folder
+
+    Returns:
+        None: Prints the results to the console
+    """
+
+    print(f"\n\t----- sorting {item_count} items with and without metrics -----")
+
+    for name, enabled in (("metrics disabled", False),
+                          ("metrics enabled", True)):
+
+        folder_path = make_folder(item_count)
+
+        try:
+            if enabled:
+                FileOperator.enable_metrics()
+
+            start = time.perf_counter()
+            FileOperator.group_items(folder_path)
+            FileOperator.sort_folder(folder_path)
+            elapsed = time.perf_counter() - start
+
+            #the system calls counted while metrics were enabled
+            recorded = FileOperator.disable_metrics()
+            calls = 0
+            if recorded is not None:
+                calls = recorded.snapshot()["counters"].get("syscalls", 0)
+            print(f"\t{name:<26}{elapsed:>10.4f}s{calls:>10} syscalls counted")
+
+        finally:
+            FileOperator.disable_metrics()
+            shutil.rmtree(folder_path, ignore_errors = True)
+
+
+
+
+def legacy_classify_names(names):
+    """The per-item category and bucket assignment used before
+    `CategoryRules`, which works both out again for every name
+
+    Args:
+        names(iterable[tuple[str, str]]): The file names to classify along
+            with their extension, as found by `classify_entry`
+
+    Returns:
+        int: The amount of names classified
+    """
+
+    count = 0
+    for name, extension in names:
+        category = FileOperator.get_item_category("File", extension)
+        FileOperator.get_bucket_name(category)
+        count += 1
+
+    return count
+
+
+
+
+def compiled_classify_names(names, category_rules):
+    """Classifies names with a compiled `CategoryRules`
+
+    Args:
+        names(iterable[tuple[str, str]]): The file names to classify along
+            with their extension
+        category_rules(CategoryRules): The compiled rules
+
+    Returns:
+        int: The amount of names classified
+    """
+
+    get_category = category_rules.get_category
+    get_bucket = category_rules.get_bucket
+
+    count = 0
+    for name, extension in names:
+        get_bucket(get_category(name, "File", extension))
+        count += 1
+
+    return count
+
+
+
+
+def benchmark_category_rules(name_count):
+    """Compares working out the category and bucket of every name again to
+    looking them up in a compiled `CategoryRules`, both without rules and
+    with a table of extension, multi-part extension and glob rules
+
+    Args:
+        name_count(int): The amount of names classified
+
+    Returns:
+        None: Prints the results to the console
+    """
+
+    #a fixed set of names reused in order, so memory stays flat, split the
+    #same way the walk splits them so only the assignment is measured
+    extensions = [".txt", ".csv", ".JPG", ".jpeg", ".png", ".pdf", ".py",
+                  ".h", ".c", ".tar.gz", ".tar.bz2", ".log.1", ".docx", ""]
+    names = [f"file_{index}{extensions[index % len(extensions)]}"
+             for index in range(10000)]
+    names = [(name, os.path.splitext(name)[1].lower()) for name in names]
+
+    rules = FileOperator.CategoryRules([
+        {"category": "Images", "extensions": [".jpg", ".jpeg", ".png"]},
+        {"category": "Documents", "extensions": [".pdf", ".docx", ".txt"]},
+        {"category": "Code", "extensions": [".py", ".c", ".h"]},
+        {"category": "Archives", "extensions": [".tar.gz", ".tar.bz2"]},
+        {"category": "Logs", "glob": "*.log.[0-9]"},
+    ])
+
+    def stream():
+        #yields name_count names from the fixed set
+        for start in range(0, name_count, len(names)):
+            yield from names[:name_count - start]
+
+    print(f"\n\t----- classifying {name_count} names -----")
+
+    for label, function, args in (
+            ("per item", legacy_classify_names, ()),
+            ("compiled, no rules", compiled_classify_names,
+             (FileOperator.CategoryRules(),)),
+            ("compiled, rule table", compiled_classify_names, (rules,))):
+
+        start = time.perf_counter()
+        count = function(stream(), *args)
+        elapsed = time.perf_counter() - start
+        print(f"\t{label:<26}{elapsed:>10.4f}s"
+              f"{count / elapsed / 1e6:>10.2f}M names/s")
+
+
+
+
+def legacy_rename_files(folder_path):
+    """The retry loop `rename_files` used to resolve clashing names, kept for
+    comparison. The clash is detected with a stat before each attempt since
+    os.rename replaces existing files on POSIX instead of failing.
+
+    Args:
+        folder_path(str): The path of the folder
+
+    Returns:
+        None
+    """
+
+    for file in os.listdir(folder_path):
+        old_path = os.path.join(folder_path, file)
+        if not os.path.isfile(old_path):
+            continue
+
+        new_name = file.strip().replace(' ', '_')
+        if new_name == file:
+            continue
+
+        #tries "_2", "_3", ... one attempt at a time
+        stem, ext = os.path.splitext(new_name)
+        new_path = os.path.join(folder_path, new_name)
+        attempt = 1
+        while os.path.exists(new_path):
+            attempt += 1
+            new_path = os.path.join(folder_path, f"{stem}_{attempt}{ext}")
+
+        os.rename(old_path, new_path)
+
+
+
+
+def make_duplicate_folder(item_count):
+    """Creates a temporary folder of files that all clean up to the same name
+    ('report_.pdf') by surrounding "report .pdf" with different amounts of
+    spaces
+
+    Args:
+        item_count(int): The amount of files to create
+
+    Returns:
+        str: The path to the created folder
+    """
+
+    folder_path = tempfile.mkdtemp(prefix = "FileOperatorBenchmark_")
+
+    #every pair of leading and trailing space counts gives a unique name
+    width = int(item_count ** 0.5) + 1
+    for index in range(item_count):
+        name = " " * (index // width) + "report .pdf" + " " * (index % width)
+        with open(os.path.join(folder_path, name), "w"):
+            pass
+
+    return folder_path
+
+
+
+
+def benchmark_rename_files(item_count):
+    """Compares the retry loop of renaming clashing files to the name index
+
+    Args:
+        item_count(int): The amount of clashing files in the generated folder
+
+    Returns:
+        None: Prints the results to the console
+    """
+
+    print(f"\n\t----- rename_files on {item_count} clashing names -----")
+
+    #each implementation gets a fresh folder since renaming changes it
+    for name, function in (("retry loop", legacy_rename_files),
+                           ("name index", FileOperator.rename_files)):
+
+        folder_path = make_duplicate_folder(item_count)
+
+        try:
+            elapsed, calls, result = measure(function, folder_path)
+            print(f"\t{name:<26}{elapsed:>10.4f}s{calls:>10} calls")
+
+        finally:
+            shutil.rmtree(folder_path, ignore_errors = True)
+
+
+
+
+def make_text_file(size_mb):
+    """Creates a temporary text file of log-like lines with a blank line every
+    so often
+
+    Args:
+        size_mb(int): The size of the file in MiB
+
+    Returns:
+        str: The path to the created file
+    """
+
+    handle, file_name = tempfile.mkstemp(prefix = "FileOperatorBenchmark_",
+                                         suffix = ".txt")
+
+    #a block of lines written over and over until the file is large enough
+    block = "".join(f"  2025-05-14 12:00:{index % 60:02d} INFO request {index} "
+                    f"handled in {index % 997} ms  \n" + ("\n" if index % 7 == 0 else "")
+                    for index in range(10000)).encode("utf-8")
+
+    with os.fdopen(handle, "wb") as f:
+        for _ in range(max(1, size_mb * 1024 * 1024 // len(block))):
+            f.write(block)
+
+    return file_name
+
+
+
+
+def measure_lines(function):
+    """Runs a line reading function twice, once for its speed and once under
+    tracemalloc for the peak memory it allocates
+
+    Args:
+        function(callable): A function taking no arguments that reads the
+            lines of a file and returns how many it read
+
+    Returns:
+        tuple[float, int, int]: The seconds taken, the peak bytes allocated
+            and the amount of lines read
+    """
+
+    start = time.perf_counter()
+    lines = function()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return (elapsed, peak, lines)
+
+
+
+
+def benchmark_file_lines(size_mb):
+    """Compares reading every line of a file into a list to streaming the lines
+    through a buffer or a memory mapping
+
+    Args:
+        size_mb(int): The size of the generated file in MiB
+
+    Returns:
+        None: Prints the results to the console
+    """
+
+    file_name = make_text_file(size_mb)
+
+    try:
+        print(f"\n\t----- reading lines of a {size_mb} MiB file -----")
+
+        def count(lines):
+            #consumes the lines without keeping them
+            total = 0
+            for line in lines:
+                total += 1
+            return total
+
+        for name, function in (
+                ("file_segement_lines", lambda: len(
+                    FileOperator.file_segement_lines(file_name))),
+                ("iter_file_lines", lambda: count(
+                    FileOperator.iter_file_lines(file_name))),
+                ("iter_file_lines (mmap)", lambda: count(
+                    FileOperator.iter_file_lines(file_name, use_mmap = True)))):
+
+            elapsed, peak, lines = measure_lines(function)
+            print(f"\t{name:<26}{elapsed:>10.4f}s"
+                  f"{size_mb / elapsed:>10.1f} MiB/s"
+                  f"{peak / 1024 / 1024:>10.1f} MiB peak")
+
+    finally:
+        os.unlink(file_name)
+
+
+
+def make_csv_file(row_count, column_count = 10, seed = 0):
+    """Creates a temporary CSV file of integers, floats, repeated labels and
+    free text with quoted commas and newlines, the same for the same
+    arguments
+
+    Args:
+        row_count(int): The amount of rows
+        column_count(int, optional): The amount of columns. Defaults to 10.
+        seed(int, optional): The seed of the generator. Defaults to 0.
+
+    Returns:
+        str: The path to the created file
+    """
+
+    generator = random.Random(seed)
+    labels = ["red", "green", "blue", "cyan", "magenta", "yellow"]
+
+    handle, file_name = tempfile.mkstemp(prefix = "FileOperatorBenchmark_",
+                                         suffix = ".csv")
+
+    with os.fdopen(handle, "w", newline = "", encoding = "utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow([f"column_{index}" for index in range(column_count)])
+
+        for start in range(0, row_count, 10000):
+            rows = []
+            for row in range(start, min(start + 10000, row_count)):
+                values = []
+                for index in range(column_count):
+                    kind = index % 4
+                    if kind == 0:
+                        values.append(row)
+                    elif kind == 1:
+                        values.append(round(generator.random() * 1000, 3))
+                    elif kind == 2:
+                        values.append(labels[generator.randrange(len(labels))])
+                    elif generator.random() < 0.01:
+                        values.append(f"note {row}, with a comma\nand a newline")
+                    else:
+                        values.append(f"note {row}")
+                rows.append(values)
+            writer.writerows(rows)
+
+    return file_name
+
+
+
+
+def benchmark_csv_parallel(row_count, column_count = 10):
+    """Compares reading a CSV file with `get_csv_dictionary` to reading it
+    with `get_csv_dictionary_parallel`, and times finding the record
+    boundaries on their own since they are found by a single process
+
+    Args:
+        row_count(int): The amount of rows in the generated file
+        column_count(int, optional): The amount of columns. Defaults to 10.
+
+    Returns:
+        None: Prints the results to the console
+    """
+
+    file_name = make_csv_file(row_count, column_count)
+
+    try:
+        #about four ranges for every process
+        workers = os.cpu_count() or 1
+        chunk_size = max(os.path.getsize(file_name) // (workers * 4), 1024 * 1024)
+
+        print(f"\n\t----- reading {row_count} x {column_count} csv rows with "
+              f"{workers} processes -----")
+
+        for name, function in (("get_csv_dictionary",
+                                lambda: FileOperator.get_csv_dictionary(file_name)),
+                               ("record boundaries",
+                                lambda: list(FileOperator.iter_csv_record_ranges(
+                                    file_name, chunk_size))),
+                               ("get_csv_dictionary_parallel",
+                                lambda: FileOperator.get_csv_dictionary_parallel(
+                                    file_name, workers = workers,
+                                    chunk_size = chunk_size))):
+
+            start = time.perf_counter()
+            function()
+            elapsed = time.perf_counter() - start
+            print(f"\t{name:<30}{elapsed:>10.4f}s"
+                  f"{row_count / elapsed:>12.0f} rows/s")
+
+    finally:
+        os.unlink(file_name)
+
+
+
+
+def legacy_dictionary_to_csv(data_dict, file_name, headers):
+    """The row dictionary implementation of `dictionary_to_csv` that the
+    batched writer replaced, kept for comparison
+
+    Args:
+        data_dict(dict[str, list]): The columns to write
+        file_name(str): The path to the output file
+        headers(list[str]): The headers of the columns
+
+    Returns:
+        None
+    """
+
+    with open(file_name, "w", encoding="utf-8", newline = '') as f:
+        file_writer = csv.DictWriter(f, fieldnames = headers)
+        file_writer.writeheader()
+
+        #a dictionary is built and re-mapped by key for every row
+        for index in range(len(data_dict[headers[0]])):
+            row_dict = {}
+            for column in data_dict:
+                row_dict[column] = data_dict[column][index]
+            file_writer.writerow(row_dict)
+
+
+
+
+def benchmark_dictionary_to_csv(row_count, column_count = 20):
+    """Compares writing a table with a dictionary per row to writing zipped
+    rows in batches
+
+    Args:
+        row_count(int): The amount of rows in the generated table
+        column_count(int, optional): The amount of columns. Defaults to 20.
+
+    Returns:
+        None: Prints the results to the console
+    """
+
+    #a table of short strings and numbers
+    headers = [f"column_{index}" for index in range(column_count)]
+    data_dict = {header: [f"{index}_{row}" if index % 2 else row
+                          for row in range(row_count)]
+                 for index, header in enumerate(headers)}
+
+    handle, file_name = tempfile.mkstemp(prefix = "FileOperatorBenchmark_",
+                                         suffix = ".csv")
+    os.close(handle)
+
+    try:
+        print(f"\n\t----- dictionary_to_csv on {row_count} x {column_count} -----")
+
+        for name, function in (("row dictionaries", legacy_dictionary_to_csv),
+                               ("batched rows", FileOperator.dictionary_to_csv)):
+
+            start = time.perf_counter()
+            function(data_dict, file_name, headers)
+            elapsed = time.perf_counter() - start
+            print(f"\t{name:<26}{elapsed:>10.4f}s"
+                  f"{row_count / elapsed:>12.0f} rows/s")
+
+    finally:
+        os.unlink(file_name)
+
+
+
+
+def benchmark_compression(size_mb):
+    """Compares the write speed, read speed and size of a text file written
+    with each compressed format at a few compression levels. The generated
+    file repeats one block of lines, so the formats that look further back
+    (xz, zstd) compress it far better than they would a real log.
+
+    Args:
+        size_mb(int): The size of the uncompressed file in MiB
+
+    Returns:
+        None: Prints the results to the console
+    """
+
+    source = make_text_file(size_mb)
+    lines = FileOperator.file_segement_lines(source)
+    os.unlink(source)
+
+    #the formats and levels compared, None being an uncompressed file
+    formats = [(None, None), ("gzip", 1), ("gzip", 6), ("gzip", 9),
+               ("bz2", 9), ("xz", 0), ("xz", 6), ("zstd", 3), ("zstd", 19)]
+
+    folder_path = tempfile.mkdtemp(prefix = "FileOperatorBenchmark_")
+
+    try:
+        print(f"\n\t----- compressing a {size_mb} MiB text file -----")
+
+        for compression, level in formats:
+
+            name = f"{compression} {level}" if compression else "uncompressed"
+            file_name = os.path.join(folder_path, "lines.txt")
+
+            try:
+                start = time.perf_counter()
+                size, line_count = FileOperator.write_lines(
+                    lines, file_name, compression = compression, level = level)
+                write_time = time.perf_counter() - start
+
+            except ImportError:
+                #zstd is only benchmarked when a zstd module is installed
+                print(f"\t{name:<26}{'not installed':>14}")
+                continue
+
+            start = time.perf_counter()
+            for line in FileOperator.iter_file_lines(file_name):
+                pass
+            read_time = time.perf_counter() - start
+
+            print(f"\t{name:<26}{size_mb / write_time:>10.1f} MiB/s write"
+                  f"{size_mb / read_time:>10.1f} MiB/s read"
+                  f"{size / os.path.getsize(file_name):>10.1f}x smaller")
+
+    finally:
+        shutil.rmtree(folder_path, ignore_errors = True)
+
+
+
+
+def benchmark_watch_latency(file_count):
+    """Measures the time from a file arriving in a watched folder to it being
+    sorted into its bucket by `watch_folder`, for a burst of files, with
+    inotify and with the polling fallback
+
+    Args:
+        file_count(int): The amount of files arriving in the burst
+
+    Returns:
+        None: Prints the results to the console
+    """
+
+    print(f"\n\t----- watch_folder latency for a burst of {file_count} files -----")
+
+    extensions = [".txt", ".csv", ".jpg", ".pdf", ".py"]
+
+    for name, inotify in (("inotify", True), ("polling", False)):
+
+        folder_path = tempfile.mkdtemp(prefix = "FileOperatorBenchmark_")
+
+        #when each file arrived and when it was sorted
+        arrived = {}
+        sorted_at = {}
+        batches = []
+
+        def on_batch(results):
+            now = time.perf_counter()
+            batches.append(len(results))
+            for result in results:
+                sorted_at[result["source"]] = now
+
+        try:
+            with FileOperator.open_watcher(folder_path, 0.1, inotify) as watcher:
+                if inotify and not isinstance(watcher, FileOperator.InotifyWatcher):
+                    print(f"\t{name:<26}not available")
+                    continue
+
+            stop_event = threading.Event()
+            thread = threading.Thread(
+                target = FileOperator.watch_folder, args = (folder_path,),
+                kwargs = {"debounce": 0.1, "poll_interval": 0.1,
+                          "inotify": inotify, "on_batch": on_batch, "stop_event": stop_event})
+            thread.start()
+
+            #gives the watcher time to start watching
+            time.sleep(0.5)
+
+            for i in range(file_count):
+                path = os.path.join(folder_path, f"file_{i}{extensions[i % 5]}")
+                with open(path, "w") as f:
+                    f.write("benchmark")
+                arrived[path] = time.perf_counter()
+
+            #waits for every file to be sorted, for at most a minute
+            deadline = time.perf_counter() + 60
+            while len(sorted_at) < file_count and time.perf_counter() < deadline:
+                time.sleep(0.01)
+
+            stop_event.set()
+            thread.join()
+
+            latencies = sorted(sorted_at[path] - arrived[path]
+                               for path in arrived if path in sorted_at)
+            if not latencies:
+                print(f"\t{name:<26}no files sorted")
+                continue
+
+            median = latencies[len(latencies) // 2]
+            p99 = latencies[min(len(latencies) - 1, len(latencies) * 99 // 100)]
+            print(f"\t{name:<26}median {median:>8.4f}s  p99 {p99:>8.4f}s  "
+                  f"max {latencies[-1]:>8.4f}s  {len(latencies)} sorted in "
+                  f"{len(batches)} batches")
+
+        finally:
+            shutil.rmtree(folder_path, ignore_errors = True)
+
+
+
+
+def make_tree(item_count, fan_out = 10, max_depth = 2, extension_weights = None,
+              duplicate_rate = 0.0, seed = 0):
+    """Creates a temporary folder tree of empty files that is the same for
+    the same arguments. Files are spread over folders that each hold up to
+    fan_out subfolders, max_depth levels deep.
+
+    Args:
+        item_count(int): The amount of files to create
+        fan_out(int, optional): The amount of subfolders of every folder.
+            Defaults to 10.
+        max_depth(int, optional): How many levels of subfolders are created,
+            0 for a flat folder. Defaults to 2.
+        extension_weights(dict[str, int], optional): The relative amount of
+            files with each extension. Defaults to None for
+            `TREE_EXTENSIONS`.
+        duplicate_rate(float, optional): The share of files whose name
+            cleans up to the name of another file ('report 3.pdf' surrounded
+            by spaces), and so collides when renamed or sorted. Defaults to
+            0.0.
+        seed(int, optional): The seed of the generator. Defaults to 0.
+
+    Returns:
+        str: The path to the created folder
+    """
+
+    generator = random.Random(seed)
+    weights = extension_weights or TREE_EXTENSIONS
+    extensions = list(weights)
+
+    folder_path = tempfile.mkdtemp(prefix = "FileOperatorBenchmark_")
+
+    #every folder of the tree, created breadth first
+    folders = [folder_path]
+    level = [folder_path]
+    for depth in range(max_depth):
+        level = [os.path.join(parent, f"folder_{index}")
+                 for parent in level for index in range(fan_out)]
+        folders.extend(level)
+    for folder in folders[1:]:
+        os.mkdir(folder)
+
+    #the amount of names already given to each colliding name in a folder
+    taken = collections.Counter()
+
+    #the extension of every file, drawn all at once
+    drawn = generator.choices(extensions, weights = list(weights.values()),
+                              k = item_count)
+
+    for index, extension in enumerate(drawn):
+
+        folder = folders[generator.randrange(len(folders))]
+
+        if generator.random() < duplicate_rate:
+            #names that differ only by their spaces clean up to the same name
+            stem = f"report {generator.randrange(10)}"
+            spaces = taken[(folder, stem, extension)]
+            taken[(folder, stem, extension)] += 1
+            name = " " * (spaces // 2) + stem + " " * ((spaces + 1) // 2)
+        else:
+            name = f"file_{index}"
+
+        with open(os.path.join(folder, name + extension), "w"):
+            pass
+
+    return folder_path
+
+
+
+
+def setup_case(case, settings, seed):
+    """Generates the fixture of a case of the suite
+
+    Args:
+        case(str): The name of the case, one of `SUITE_CASES`
+        settings(dict): The 'items', 'file_mb' and 'rows' of the scale
+        seed(int): The seed of the generators
+
+    Returns:
+        tuple[callable, int, str, list[str]]: The function running the case,
+            the amount of work it does, the unit of that amount and the
+            paths to remove afterwards
+    """
+
+    items = settings["items"]
+    rows = settings["rows"]
+
+    if case == "group_items":
+        folder_path = make_tree(items, max_depth = 0, seed = seed)
+        return (lambda: FileOperator.group_items(folder_path), items, "items",
+                [folder_path])
+
+    if case == "walk_items":
+        folder_path = make_tree(items, seed = seed)
+        return (lambda: collections.deque(FileOperator.walk_items(folder_path),
+                                          maxlen = 0),
+                items, "items", [folder_path])
+
+    if case == "assign_folders":
+        folder_path = make_tree(items, seed = seed)
+        def run():
+            with open(os.devnull, "w") as null:
+                with contextlib.redirect_stdout(null):
+                    FileOperator.assign_folders(folder_path, recursive = True)
+        return (run, items, "items", [folder_path])
+
+    if case == "rename_files":
+        folder_path = make_tree(items, duplicate_rate = 0.1, seed = seed)
+        return (lambda: FileOperator.rename_files(folder_path, recursive = True),
+                items, "items", [folder_path])
+
+    if case == "file_segement_lines":
+        file_name = make_text_file(settings["file_mb"])
+        return (lambda: FileOperator.file_segement_lines(file_name),
+                os.path.getsize(file_name), "bytes", [file_name])
+
+    if case in ("get_csv_dictionary", "get_csv_dictionary_parallel",
+                "get_csv_columns"):
+        file_name = make_csv_file(rows, seed = seed)
+        function = getattr(FileOperator, case)
+        return (lambda: function(file_name), rows, "rows", [file_name])
+
+    if case == "dictionary_to_csv":
+        headers = [f"column_{index}" for index in range(10)]
+        data_dict = {header: [f"{index}_{row}" if index % 2 else row
+                              for row in range(rows)]
+                     for index, header in enumerate(headers)}
+        handle, file_name = tempfile.mkstemp(prefix = "FileOperatorBenchmark_",
+                                             suffix = ".csv")
+        os.close(handle)
+        return (lambda: FileOperator.dictionary_to_csv(data_dict, file_name,
+                                                       headers),
+                rows, "rows", [file_name])
+
+    raise ValueError(f"Unknown case {case!r}")
+
+
+
+
+def remove_paths(paths):
+    """Removes the generated files and folders of a case
+
+    Args:
+        paths(list[str]): The paths to remove
+
+    Returns:
+        None
+    """
+
+    for path in paths:
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors = True)
+        elif os.path.exists(path):
+            os.unlink(path)
+
+
+
+
+def get_peak_rss():
+    """Reads the peak resident memory of this process
+
+    Returns:
+        int: The peak in KiB, or None where it is not available (Windows)
+    """
+
+    #the peak is in KiB on Linux and in bytes on macOS
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak //= 1024
+    return peak
+
+
+
+
+def run_case(connection, case, scale, seed, repeats = 3):
+    """Runs one case of the suite at one scale and sends its result through
+    connection, keeping the fastest of several runs on fresh fixtures. Meant
+    to run in a process of its own, so the peak memory of the process is the
+    peak memory of the case. Every fixture is made before the memory is first
+    read, so the memory the case adds over its fixtures is reported as well.
+    The system calls of every run are counted, including the stat calls of
+    scandir entries, and the fewest and the most of any run are reported.
+
+    Args:
+        connection(multiprocessing.connection.Connection): Where the result
+            is sent
+        case(str): The name of the case
+        scale(str): The name of the scale, one of `SUITE_SCALES`
+        seed(int): The seed of the generators
+        repeats(int, optional): The amount of runs. Defaults to 3.
+
+    Returns:
+        None: Sends the result, or the error that stopped the case
+    """
+
+    cleanup = []
+
+    try:
+        #every run gets a fixture of its own, since runs change them
+        fixtures = []
+        for _ in range(repeats):
+            fixtures.append(setup_case(case, SUITE_SCALES[scale], seed))
+            cleanup.extend(fixtures[-1][3])
+
+        baseline = get_peak_rss()
+
+        elapsed = None
+        calls = []
+        for function, amount, unit, paths in fixtures:
+
+            #the value returned is dropped at once, so it is not kept while
+            #the next run makes its own
+            seconds, count = measure(function, entries = True)[:2]
+            if elapsed is None or seconds < elapsed:
+                elapsed = seconds
+            calls.append(count)
+
+            remove_paths(paths)
+
+        peak = get_peak_rss()
+
+        connection.send({"case": case, "scale": scale, "seconds": elapsed,
+                         "amount": amount, "unit": unit,
+                         "throughput": amount / elapsed if elapsed else None,
+                         "peak_rss_kb": peak,
+                         "rss_delta_kb": (peak - baseline
+                                          if peak is not None else None),
+                         "syscalls": max(calls),
+                         "syscalls_min": min(calls),
+                         "error": None})
+
+    except Exception as e:
+        connection.send({"case": case, "scale": scale,
+                         "error": f"{type(e).__name__}: {e}"})
+
+    finally:
+        remove_paths(cleanup)
+        connection.close()
+
+
+
+
+def run_suite(scales = ("1k", "10k"), cases = None, output_file = None,
+              seed = 0, repeats = 3):
+    """Runs every case of the suite at every scale, each in a fresh process,
+    and reports the seconds taken, the throughput, the peak resident memory,
+    the memory added over the fixtures and the counted system calls of each
+    as JSON
+
+    Args:
+        scales(iterable[str], optional): The names of the scales, from
+            `SUITE_SCALES`. Defaults to ("1k", "10k").
+        cases(iterable[str], optional): The names of the cases. Defaults to
+            None for every case in `SUITE_CASES`.
+        output_file(str, optional): The path the JSON report is written to.
+            Defaults to None for writing it to the console.
+        seed(int, optional): The seed of the generators, so two runs with
+            the same seed measure the same fixtures. Defaults to 0.
+        repeats(int, optional): Passed to `run_case`. Defaults to 3.
+
+    Returns:
+        dict: The report, with the keys 'environment' and 'results'
+    """
+
+    #a fresh interpreter per case, so no case inherits another's memory
+    context = multiprocessing.get_context("spawn")
+
+    results = []
+
+    for scale in scales:
+        for case in cases or SUITE_CASES:
+
+            receiver, sender = context.Pipe(duplex = False)
+            process = context.Process(target = run_case,
+                                      args = (sender, case, scale, seed,
+                                              repeats))
+            process.start()
+            sender.close()
+
+            try:
+                result = receiver.recv()
+            except EOFError:
+                result = {"case": case, "scale": scale,
+                          "error": f"exit code {process.exitcode}"}
+            process.join()
+
+            results.append(result)
+            print(f"\t{case:<28}{scale:>6}  " + (
+                  result["error"] if result["error"] else
+                  f"{result['seconds']:>10.4f}s{result['throughput']:>14.0f} "
+                  f"{result['unit']}/s"), file = sys.stderr)
+
+    report = {"environment": {"python": platform.python_version(),
+                              "platform": platform.platform(),
+                              "cpu_count": os.cpu_count(),
+                              "seed": seed,
+                              "repeats": repeats,
+                              "time": time.time()},
+              "results": results}
+
+    text = json.dumps(report, indent = 2)
+    if output_file:
+        with open(output_file, "w", encoding = "utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    return report
+
+
+
+
+def compare_results(baseline_file, current_file, tolerance = 0.1,
+                    memory_floor_kb = 1024):
+    """Compares two reports of `run_suite` case by case and prints the change
+    in throughput, the memory added over the fixtures and the system calls
+    of each
+
+    Args:
+        baseline_file(str): The path to the earlier report
+        current_file(str): The path to the later report
+        tolerance(float, optional): The share throughput can drop, or memory
+            or system calls can grow, before a case counts as a regression.
+            Defaults to 0.1.
+        memory_floor_kb(int, optional): The KiB memory has to grow by as well
+            before it counts as a regression, so the noise of cases that add
+            little memory is not flagged. Defaults to 1024.
+
+    Returns:
+        list[tuple[str, str]]: The (case, scale) of every regression
+    """
+
+    with open(baseline_file, encoding = "utf-8") as f:
+        baseline = {(result["case"], result["scale"]): result
+                    for result in json.load(f)["results"]}
+    with open(current_file, encoding = "utf-8") as f:
+        current = json.load(f)["results"]
+
+    regressions = []
+
+    print(f"\n\t{'case':<28}{'scale':>6}{'throughput':>12}{'memory':>10}"
+          f"{'syscalls':>10}")
+
+    for result in current:
+        key = (result["case"], result["scale"])
+        before = baseline.get(key)
+        if before is None or before["error"] or result["error"]:
+            continue
+
+        def change(name):
+            #the relative change of a value, None when it is missing
+            if not before.get(name) or result.get(name) is None:
+                return None
+            return result[name] / before[name] - 1
+
+        speed = change("throughput")
+        memory = change("rss_delta_kb")
+        calls = change("syscalls")
+
+        #the memory has to grow by a share and by an amount
+        grown = (memory is not None and memory > tolerance and
+                 result["rss_delta_kb"] - before["rss_delta_kb"] > memory_floor_kb)
+
+        regressed = ((speed is not None and speed < -tolerance) or grown or
+                     (calls is not None and calls > tolerance))
+        if regressed:
+            regressions.append(key)
+
+        columns = "".join(f"{value:>+10.1%}  " if value is not None
+                          else f"{'-':>10}  " for value in (speed, memory, calls))
+        print(f"\t{key[0]:<28}{key[1]:>6}  {columns}"
+              f"{'REGRESSION' if regressed else ''}")
+
+    return regressions
+
+
+
+
+if __name__ == "__main__":
+
+    #runs the suite at the comma separated scales, writing its report to
+    #the given file or the console
+    if len(sys.argv) > 1 and sys.argv[1] == "suite":
+        scales = sys.argv[2].split(",") if len(sys.argv) > 2 else ["1k", "10k"]
+        output_file = sys.argv[3] if len(sys.argv) > 3 else None
+        run_suite(scales, output_file = output_file)
+
+    #compares two reports, failing when any case regressed
+    elif len(sys.argv) > 1 and sys.argv[1] == "compare":
+        sys.exit(1 if compare_results(sys.argv[2], sys.argv[3]) else 0)
+
+    else:
+
+        #the amount of items to generate, defaulting to ten thousand
+        count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+        benchmark_group_items(count)
+
+        benchmark_scan_cache(count)
+
+        #the amount of names classified, use 10000000 for 10M names
+        name_count = int(sys.argv[4]) if len(sys.argv) > 4 else 1000000
+
+        benchmark_category_rules(name_count)
+
+        benchmark_core_api(count)
+
+        benchmark_metrics(count)
+
+        #files arrive one at a time so the burst is smaller
+        benchmark_watch_latency(min(count, 5000))
+
+        benchmark_content_detection(count)
+
+        #every generated file is 256 KiB so fewer files are compared
+        benchmark_find_duplicates(min(count, 1000))
+
+        #the retry loop is quadratic so it is benchmarked on fewer files
+        benchmark_rename_files(min(count, 2000))
+
+        #the size of the generated text file in MiB, use 1024 for a 1 GiB file
+        size_mb = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+
+        benchmark_file_lines(size_mb)
+
+        #the slower formats are benchmarked on a smaller file
+        benchmark_compression(min(size_mb, 16))
+
+        #the amount of rows in the generated table, use 1000000 for 1M x 20
+        row_count = int(sys.argv[3]) if len(sys.argv) > 3 else 100000
+
+        benchmark_dictionary_to_csv(row_count)
+
+        benchmark_csv_parallel(row_count)
@@ -0,0 +1,730 @@
+#used for the functions under test
+import FileOperator
+
+#used for checking the errors raised
+import pytest
+
+#used for building folder trees to test against
+import os
+
+#used for running the aio_ functions
+import asyncio
+
+#used for watching the threads the aio_ functions run on
+import threading
+
+#used for reducing the results of process_file_lines
+import operator
+
+#used for in memory file objects
+import io
+
+#used for checking reports can be written as JSON
+import json
+
+
+
+
+def write_file(path, text):
+    #creates a file and the folders it is in
+    os.makedirs(os.path.dirname(path), exist_ok = True)
+    with open(path, "w", encoding = "utf-8") as f:
+        f.write(text)
+
+
+def read_tree(folder_path):
+    #maps the path of every file under a folder to its content
+    tree = {}
+    for root, folders, files in os.walk(folder_path):
+        for name in files:
+            path = os.path.join(root, name)
+            with open(path, "r", encoding = "utf-8") as f:
+                tree[os.path.relpath(path, folder_path)] = f.read()
+    return tree
+
+
+
+
+def test_scan_items_classifies_a_folder_in_one_pass(tmp_path):
+    folder = str(tmp_path)
+    write_file(os.path.join(folder, "a.TXT"), "a")
+    write_file(os.path.join(folder, "b"), "b")
+    os.mkdir(os.path.join(folder, "sub"))
+
+    assert sorted(FileOperator.scan_items(folder)) == [
+        ("a.TXT", "File", ".txt"), ("b", "File", ""), ("sub", "Folder", None)]
+    assert FileOperator.group_items(folder) == {".txt": ["a.TXT"],
+                                                "No Extension": ["b"],
+                                                "Folder": ["sub"]}
+
+    #a folder that does not exist can not be grouped
+    assert FileOperator.group_items(os.path.join(folder, "missing")) is None
+
+
+def test_walk_items_yields_every_file_of_the_tree(tmp_path):
+    folder = str(tmp_path)
+    for name in ("a.txt", os.path.join("sub", "b.pdf"),
+                 os.path.join("sub", "deep", "c"),
+                 os.path.join("sub", "skip.tmp")):
+        write_file(os.path.join(folder, name), "x")
+
+    assert sorted(FileOperator.walk_items(folder, exclude = ["*.tmp"])) == [
+        (os.path.join(folder, "a.txt"), ".txt", 1),
+        (os.path.join(folder, "sub", "b.pdf"), ".pdf", 1),
+        (os.path.join(folder, "sub", "deep", "c"), "No Extension", 1)]
+
+    #only the items directly in the folder are walked at depth 0
+    assert list(FileOperator.walk_items(folder, max_depth = 0)) == [
+        (os.path.join(folder, "a.txt"), ".txt", 1)]
+
+
+def test_move_files_reports_every_move(tmp_path):
+    folder = str(tmp_path)
+    for name in ("a.txt", "b.txt", "c.pdf"):
+        write_file(os.path.join(folder, name), name)
+    os.mkdir(os.path.join(folder, "TXT"))
+    moves = [(os.path.join(folder, name), os.path.join(folder, "TXT", name),
+              5, ".txt") for name in ("a.txt", "b.txt", "missing.txt")]
+
+    results = FileOperator.move_files(moves, max_workers = 2,
+                                      max_in_flight_bytes = 5)
+    assert [result["status"] for result in results] == ["moved", "moved",
+                                                        "failed"]
+    assert results[2]["error"].startswith("FileNotFoundError")
+
+    #the rest of the folder is sorted concurrently
+    results = FileOperator.parallel_assign_folders(folder)
+    assert [result["status"] for result in results] == ["moved"]
+    assert read_tree(folder) == {os.path.join("TXT", "a.txt"): "a.txt",
+                                 os.path.join("TXT", "b.txt"): "b.txt",
+                                 os.path.join("PDF", "c.pdf"): "c.pdf"}
+
+
+@pytest.mark.parametrize("plan_name", ["plan.json", "plan.csv"])
+def test_move_plan_round_trips_and_applies(tmp_path, plan_name):
+    folder = str(tmp_path / "src")
+    plan_file = str(tmp_path / plan_name)
+    write_file(os.path.join(folder, "a.txt"), "a")
+    write_file(os.path.join(folder, "b.jpg"), "b")
+
+    #planning does not touch the folder
+    plan = FileOperator.plan_moves(folder)
+    assert read_tree(folder) == {"a.txt": "a", "b.jpg": "b"}
+    assert sorted(plan) == [
+        (os.path.join(folder, "a.txt"), os.path.join(folder, "TXT", "a.txt"),
+         1, ".txt"),
+        (os.path.join(folder, "b.jpg"), os.path.join(folder, "JPG", "b.jpg"),
+         1, ".jpg")]
+
+    assert FileOperator.save_plan(plan, plan_file)
+    loaded = FileOperator.load_plan(plan_file)
+    assert loaded == plan
+    assert FileOperator.diff_plans(plan, loaded) == {"added": [], "removed": [],
+                                                     "changed": []}
+    assert FileOperator.diff_plans(plan[:1], plan)["added"] == plan[1:]
+
+    results = FileOperator.apply_plan(loaded)
+    assert [result["status"] for result in results] == ["moved", "moved"]
+    assert read_tree(folder) == {os.path.join("TXT", "a.txt"): "a",
+                                 os.path.join("JPG", "b.jpg"): "b"}
+
+
+def test_recover_journal_keeps_a_different_file_at_dest(tmp_path):
+    folder = str(tmp_path / "src")
+    first = os.path.join(folder, "sub1", "a.txt")
+    second = os.path.join(folder, "sub2", "a.txt")
+    dest = os.path.join(folder, "TXT", "a.txt")
+    journal_file = str(tmp_path / "moves.journal")
+
+    #two different files with the same size and modification time
+    write_file(first, "hello")
+    write_file(second, "world")
+    os.utime(first, (1000000000, 1000000000))
+    os.utime(second, (1000000000, 1000000000))
+
+    #the run is killed after the first move, before its outcome is recorded
+    with FileOperator.MoveJournal(journal_file) as journal:
+        journal.write("intent", first, dest)
+        journal.write("intent", second, dest)
+    os.makedirs(os.path.dirname(dest))
+    os.rename(first, dest)
+
+    summary = FileOperator.recover_journal(journal_file)
+
+    assert summary == {"rolled_back": 0, "recorded": 1, "finished": 0,
+                       "pending": 0}
+    assert read_tree(folder) == {os.path.join("sub2", "a.txt"): "world",
+                                 os.path.join("TXT", "a.txt"): "hello"}
+    assert [record["op"] for record in FileOperator.read_journal(journal_file)
+            ][2:] == ["done", "failed"]
+
+
+def test_recover_journal_rolls_back_a_partial_copy(tmp_path):
+    source = str(tmp_path / "a.txt")
+    dest = str(tmp_path / "TXT" / "a.txt")
+    journal_file = str(tmp_path / "moves.journal")
+
+    #the run is killed partway through copying the file across devices
+    write_file(source, "hello")
+    write_file(dest + FileOperator.PARTIAL_SUFFIX, "hel")
+    with FileOperator.MoveJournal(journal_file) as journal:
+        journal.write("intent", source, dest)
+
+    summary = FileOperator.recover_journal(journal_file)
+
+    assert summary == {"rolled_back": 1, "recorded": 0, "finished": 0,
+                       "pending": 1}
+    assert read_tree(str(tmp_path / "TXT")) == {}
+    with open(source, "r", encoding = "utf-8") as f:
+        assert f.read() == "hello"
+
+
+def test_recover_journal_finishes_a_recorded_copy(tmp_path):
+    source = str(tmp_path / "a.txt")
+    dest = str(tmp_path / "TXT" / "a.txt")
+    journal_file = str(tmp_path / "moves.journal")
+
+    #the run is killed after the copy is recorded, before the source is
+    #removed
+    write_file(source, "hello")
+    write_file(dest, "hello")
+    with FileOperator.MoveJournal(journal_file) as journal:
+        journal.write("intent", source, dest)
+        journal.write("copied", source, dest)
+
+    summary = FileOperator.recover_journal(journal_file)
+
+    assert summary["finished"] == 1
+    assert not os.path.exists(source)
+    assert read_tree(str(tmp_path / "TXT")) == {"a.txt": "hello"}
+
+
+def test_undo_journal_restores_the_original_tree(tmp_path):
+    folder = str(tmp_path / "src")
+    journal_file = str(tmp_path / "moves.journal")
+    write_file(os.path.join(folder, "a.txt"), "a")
+    write_file(os.path.join(folder, "b.jpg"), "b")
+    write_file(os.path.join(folder, "sub", "c.txt"), "c")
+    original = read_tree(folder)
+
+    plan = FileOperator.plan_moves(folder, recursive = True)
+    results = FileOperator.apply_plan(plan, journal_file = journal_file)
+    assert [result["status"] for result in results] == ["moved"] * 3
+    assert read_tree(folder) != original
+
+    results = FileOperator.undo_journal(journal_file)
+
+    assert [result["status"] for result in results] == ["moved"] * 3
+    assert read_tree(folder) == original
+
+
+def test_get_free_name_resumes_from_the_last_suffix():
+    taken = {"a.txt", "a_2.txt"}
+    counters = {}
+    assert FileOperator.get_free_name("a.txt", taken, counters) == "a_3.txt"
+    taken.add("a_3.txt")
+    assert FileOperator.get_free_name("a.txt", taken, counters) == "a_4.txt"
+    assert FileOperator.get_free_name("b.txt", taken, counters) == "b.txt"
+
+
+def test_rename_files_numbers_clashing_names(tmp_path):
+    folder = str(tmp_path)
+    for name in ("my file.txt", " my file.txt", "my_file.txt"):
+        write_file(os.path.join(folder, name), name)
+
+    assert FileOperator.rename_files(folder)
+    tree = read_tree(folder)
+    assert tree["my_file.txt"] == "my_file.txt"
+
+    #the clashing names are numbered in the order the folder lists them
+    assert sorted(tree) == ["my_file.txt", "my_file_2.txt", "my_file_3.txt"]
+    assert sorted(tree.values()) == [" my file.txt", "my file.txt",
+                                     "my_file.txt"]
+
+
+def test_apply_renames_chains_cycles_and_collisions(tmp_path):
+    folder = str(tmp_path)
+    for name in ("a.txt", "b.txt", "c.txt", "d.txt", "e.txt"):
+        write_file(os.path.join(folder, name), name)
+
+    def path(name):
+        return os.path.join(folder, name)
+
+    renames = [
+        #a chain, whose first new name is only free once the second is made
+        (path("a.txt"), path("b.txt")), (path("b.txt"), path("f.txt")),
+        #a cycle
+        (path("c.txt"), path("d.txt")), (path("d.txt"), path("c.txt")),
+        #a collision with the new name of another file, which is kept
+        (path("e.txt"), path("f.txt")),
+    ]
+
+    assert FileOperator.apply_renames(renames) == 4
+    assert read_tree(folder) == {"b.txt": "a.txt", "f.txt": "b.txt",
+                                 "d.txt": "c.txt", "c.txt": "d.txt",
+                                 "e.txt": "e.txt"}
+
+
+def test_plan_renames_resolves_clashing_names(tmp_path):
+    folder = str(tmp_path)
+    for name in ("x.txt", "y.txt", "same.txt"):
+        write_file(os.path.join(folder, name), name)
+
+    #every file wants the same name, which one of them already has
+    renames = FileOperator.plan_renames(folder,
+                                        lambda entry, counter: "same.txt")
+
+    assert renames == [(os.path.join(folder, "x.txt"),
+                        os.path.join(folder, "same_2.txt")),
+                       (os.path.join(folder, "y.txt"),
+                        os.path.join(folder, "same_3.txt"))]
+    assert FileOperator.apply_renames(renames) == 2
+    assert read_tree(folder) == {"same.txt": "same.txt", "same_2.txt": "x.txt",
+                                 "same_3.txt": "y.txt"}
+
+
+def test_plan_renames_skips_files_whose_rules_fail(tmp_path):
+    folder = str(tmp_path)
+    for name in ("a.txt", "b.txt", "c.txt"):
+        write_file(os.path.join(folder, name), name)
+
+    def rules(entry, counter):
+        #the file of the second entry has gone before it is stat'ed
+        if entry.name == "b.txt":
+            raise FileNotFoundError(entry.path)
+        return f"new_{entry.name}"
+
+    assert FileOperator.plan_renames(folder, rules) == \
+        [(os.path.join(folder, "a.txt"), os.path.join(folder, "new_a.txt")),
+         (os.path.join(folder, "c.txt"), os.path.join(folder, "new_c.txt"))]
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n", "\r"])
+def test_iter_file_lines_mapped_matches_buffered(tmp_path, newline):
+    file_name = str(tmp_path / "lines.txt")
+    lines = ["  first  ", "", "sécond", "   ", "third\tline", "last"]
+    with open(file_name, "w", encoding = "utf-8", newline = "") as f:
+        f.write(newline.join(lines))
+
+    buffered = list(FileOperator.iter_file_lines(file_name))
+    assert buffered == ["first", "sécond", "third\tline", "last"]
+    assert list(FileOperator.iter_file_lines(file_name, use_mmap = True)) == buffered
+
+
+def count_lines(lines):
+    #counts the lines of a range, in the processes of process_file_lines
+    return sum(1 for line in lines)
+
+
+def test_process_file_lines_small_files(tmp_path):
+    empty = str(tmp_path / "empty.txt")
+    single = str(tmp_path / "single.txt")
+    write_file(empty, "")
+    write_file(single, "one line\n")
+
+    assert FileOperator.process_file_lines(empty, count_lines,
+                                           operator.add) is None
+    assert FileOperator.process_file_lines(empty, count_lines, operator.add,
+                                           0) == 0
+    assert FileOperator.process_file_lines(empty, count_lines) == []
+    assert FileOperator.process_file_lines(single, count_lines,
+                                           operator.add) == 1
+    assert FileOperator.process_file_lines(single, count_lines) == [1]
+
+
+def test_write_lines_replaces_a_file_atomically(tmp_path):
+    file_name = str(tmp_path / "lines.txt")
+    write_file(file_name, "old\n")
+    os.chmod(file_name, 0o640)
+
+    assert FileOperator.write_lines((str(index) for index in range(3)),
+                                    file_name, buffer_size = 2) == (6, 3)
+    assert read_tree(str(tmp_path)) == {"lines.txt": "0\n1\n2\n"}
+    assert os.stat(file_name).st_mode & 0o777 == 0o640
+
+    assert FileOperator.write_lines(["3"], file_name, append = True) == (2, 1)
+    assert read_tree(str(tmp_path)) == {"lines.txt": "0\n1\n2\n3\n"}
+
+    #a failed write leaves the old file and no temporary file behind
+    with pytest.raises(TypeError):
+        FileOperator.write_lines(["new", 4], file_name)
+    assert read_tree(str(tmp_path)) == {"lines.txt": "0\n1\n2\n3\n"}
+
+    assert FileOperator.string_list_to_file(["a", "b"], file_name)
+    assert read_tree(str(tmp_path)) == {"lines.txt": "a\nb\n"}
+
+
+def test_iter_csv_rows_keeps_only_the_columns_asked_for(tmp_path):
+    file_name = str(tmp_path / "table.csv")
+    write_file(file_name, 'a,b,c\n1,2,3\n\n4,"5,\n5"\n7,8,9\n')
+
+    assert list(FileOperator.iter_csv_rows(file_name)) == [
+        ["1", "2", "3"], ["4", "5,\n5", ""], ["7", "8", "9"]]
+    assert list(FileOperator.iter_csv_rows(file_name, ["c", "a"],
+                                           batch_size = 2)) == [
+        [["3", "1"], ["", "4"]], [["9", "7"]]]
+    assert FileOperator.get_csv_dictionary(file_name, ["b"]) == {
+        "b": ["2", "5,\n5", "8"]}
+
+    with pytest.raises(KeyError):
+        next(FileOperator.iter_csv_rows(file_name, ["d"]))
+
+
+def test_csv_columns_round_trip(tmp_path):
+    original = str(tmp_path / "original.csv")
+    copy = str(tmp_path / "copy.csv")
+    rows = FileOperator.CSV_BATCH_SIZE + 500
+
+    #the floats that make a column of integers neither type only come after
+    #the first batch
+    data = {
+        "ints": [str(i - 100) for i in range(rows)],
+        "floats": [repr(i / 4) for i in range(rows)],
+        "mixed": [str(i) for i in range(FileOperator.CSV_BATCH_SIZE)] +
+                 ["1.5"] * (rows - FileOperator.CSV_BATCH_SIZE),
+        "zeros": [str(i % 10).zfill(3) for i in range(rows)],
+        "empty": ["" if i % 7 else str(i) for i in range(rows)],
+    }
+    headers = list(data)
+    assert FileOperator.dictionary_to_csv(data, original, headers)
+
+    schema = FileOperator.infer_csv_schema(original)
+    assert schema == {"ints": "int", "floats": "float", "mixed": "str",
+                      "zeros": "category", "empty": "str"}
+
+    columns = FileOperator.get_csv_columns(original)
+    assert FileOperator.dictionary_to_csv(columns, copy, headers)
+
+    with open(original, "rb") as f, open(copy, "rb") as g:
+        assert f.read() == g.read()
+
+
+def test_csv_dictionary_parallel_matches_the_serial_reader(tmp_path):
+    file_name = str(tmp_path / "table.csv")
+
+    #quotes inside of unquoted fields, quoted newlines and a quoted header
+    lines = ['id,"size\nin inches",note']
+    for row in range(2000):
+        if row % 7 == 0:
+            lines.append(f'{row},{row % 30}" screen,"two\nlines, ""quoted"""')
+        elif row % 3 == 0:
+            lines.append(f'{row},{row % 30}" screen,plain')
+        else:
+            lines.append(f'{row},"{row}"inches,"a"b"c')
+    write_file(file_name, "\n".join(lines) + "\n")
+
+    serial = FileOperator.get_csv_dictionary(file_name)
+    assert len(serial["id"]) == 2000
+    assert FileOperator.get_csv_dictionary_parallel(file_name, workers = 2,
+                                                    chunk_size = 1000) == serial
+
+    #the records after an unclosed quote can not be split, so the file is
+    #read in order
+    with open(file_name, "a", encoding = "utf-8") as f:
+        f.write('2000,"unclosed\n2001,12,x\n')
+    assert FileOperator.get_csv_dictionary_parallel(file_name, workers = 2,
+                                                    chunk_size = 1000) == \
+        FileOperator.get_csv_dictionary(file_name)
+
+
+def test_csv_record_ranges_split_at_record_boundaries(tmp_path):
+    file_name = str(tmp_path / "table.csv")
+    write_file(file_name, 'a,b\n1,"x\ny"\n2,3" wide\n3,"z"\n')
+
+    header, ranges = FileOperator.get_csv_record_ranges(file_name, 1)
+    assert header == b"a,b\n"
+    with open(file_name, "rb") as f:
+        data = f.read()
+    assert [data[start:end] for start, end in ranges] == \
+        [b'1,"x\ny"\n', b'2,3" wide\n', b'3,"z"\n']
+
+
+def test_dictionary_to_csv_writes_columns_as_rows(tmp_path):
+    file_name = str(tmp_path / "table.csv")
+    data_dict = {"a": [1, 2, 3], "b": (value for value in "xyz"),
+                 "ignored": [0]}
+
+    assert FileOperator.dictionary_to_csv(data_dict, file_name, ["b", "a", "c"],
+                                          batch_size = 2)
+    assert FileOperator.get_csv_dictionary(file_name) == {
+        "b": ["x", "y", "z"], "a": ["1", "2", "3"], "c": ["", "", ""]}
+
+
+def test_dictionary_to_csv_refuses_columns_of_different_lengths(tmp_path):
+    file_name = str(tmp_path / "table.csv")
+    assert not FileOperator.dictionary_to_csv({"x": [1, 2, 3], "y": ["a"]},
+                                              file_name, ["x", "y"])
+    assert not os.path.exists(file_name)
+
+    #a generator that ends early is only found once it ends
+    assert not FileOperator.dictionary_to_csv(
+        {"x": [1, 2, 3], "y": (value for value in "a")}, file_name, ["x", "y"])
+
+
+def test_open_file_leaves_file_objects_open():
+    for compression in (None, "gzip", "bz2", "xz"):
+        buffer = io.BytesIO()
+        with FileOperator.open_file(buffer, "w", compression) as f:
+            f.write("first\nsecond\n")
+        assert not buffer.closed
+
+        buffer.seek(0)
+        with FileOperator.open_file(buffer, "r", compression) as f:
+            assert f.read() == "first\nsecond\n"
+        assert not buffer.closed
+
+
+def test_scan_cache_serves_unchanged_folders(tmp_path, monkeypatch):
+    folder = str(tmp_path / "src")
+    cache_file = str(tmp_path / "folders.cache")
+    for name in ("b.txt", "a.JPG", "notes", "sub/c.txt"):
+        write_file(os.path.join(folder, name), "x")
+
+    #dates the folder back so the cache does not treat it as just modified
+    os.utime(folder, (1000000000, 1000000000))
+
+    items = sorted(FileOperator.scan_items(folder))
+    assert FileOperator.scan_items(folder, cache_file) == items
+
+    #a folder that has not changed is not listed again
+    scandir = os.scandir
+    monkeypatch.setattr(os, "scandir", None)
+    assert FileOperator.scan_items(folder, cache_file) == items
+    monkeypatch.setattr(os, "scandir", scandir)
+
+    #a folder that has changed is
+    write_file(os.path.join(folder, "d.pdf"), "x")
+    os.utime(folder, (1000000060, 1000000060))
+    assert FileOperator.scan_items(folder, cache_file) == sorted(
+        items + [("d.pdf", "File", ".pdf")])
+
+
+def test_content_detection_recognizes_files_without_extensions(tmp_path):
+    folder = str(tmp_path)
+    with open(os.path.join(folder, "report"), "wb") as f:
+        f.write(b"%PDF-1.7\n" + bytes(100))
+    with open(os.path.join(folder, "photo.txt"), "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n" + bytes(100))
+    write_file(os.path.join(folder, "notes"), "plain text")
+
+    assert FileOperator.match_content(b"%PDF-1.4") == ".pdf"
+    assert FileOperator.match_content(b"\x00\x01\x02") is None
+    assert FileOperator.detect_content_type(os.path.join(folder, "report")) == ".pdf"
+
+    #only files without a known extension are read when content is missing
+    assert FileOperator.group_items(folder, detect_content = "missing") == {
+        ".pdf": ["report"], ".txt": ["notes", "photo.txt"]}
+    assert FileOperator.group_items(folder, detect_content = "all") == {
+        ".pdf": ["report"], ".png": ["photo.txt"], ".txt": ["notes"]}
+
+
+def test_remove_duplicates_reports_errors_as_text(tmp_path):
+    original = str(tmp_path / "a.txt")
+    copy = str(tmp_path / "b.txt")
+    missing = str(tmp_path / "c.txt")
+    write_file(original, "same")
+    write_file(copy, "same")
+
+    results = FileOperator.remove_duplicates([(original, copy, missing)],
+                                             "delete")
+
+    assert [result["status"] for result in results] == ["deleted", "failed"]
+    assert results[1]["error"].startswith("FileNotFoundError: ")
+    assert json.loads(json.dumps(results)) == results
+
+
+def test_aio_assign_folders_stays_within_its_limit(tmp_path, monkeypatch):
+    folder = str(tmp_path / "src")
+    for index in range(200):
+        write_file(os.path.join(folder, f"{index}.{('txt', 'jpg')[index % 2]}"),
+                   "x")
+
+    #the moves running at once and the threads they ran on
+    running = [0, 0]
+    threads = set()
+    lock = threading.Lock()
+    apply_move = FileOperator.apply_move
+
+    def counting_apply_move(move, journal = None):
+        with lock:
+            running[0] += 1
+            running[1] = max(running)
+            threads.add(threading.current_thread().name)
+        try:
+            return apply_move(move, journal)
+        finally:
+            with lock:
+                running[0] -= 1
+
+    monkeypatch.setattr(FileOperator, "apply_move", counting_apply_move)
+
+    results = asyncio.run(FileOperator.aio_assign_folders(
+        folder, journal_file = str(tmp_path / "moves.journal"), limit = 2,
+        batch_size = 50))
+
+    assert [result["status"] for result in results] == ["moved"] * 200
+    assert sorted(os.listdir(folder)) == ["JPG", "TXT"]
+    assert running[1] <= 2
+    assert all(name.startswith("FileOperator-aio") for name in threads)
+
+
+def test_sort_folder_errors_name_the_right_path(tmp_path):
+    folder = str(tmp_path / "src")
+    missing = str(tmp_path / "missing")
+    write_file(os.path.join(folder, "a.txt"), "a")
+
+    #a journal that can not be opened is not reported as the folder missing
+    journal_file = os.path.join(missing, "moves.journal")
+    with pytest.raises(FileOperator.JournalError) as error:
+        FileOperator.sort_folder(folder, journal_file = journal_file)
+    assert error.value.filename == journal_file
+
+    with pytest.raises(FileOperator.FolderNotFoundError) as error:
+        FileOperator.sort_folder(missing)
+    assert error.value.filename == missing
+
+
+def test_watch_folder_recovers_its_journal_once(tmp_path, monkeypatch):
+    folder = str(tmp_path / "src")
+    journal_file = str(tmp_path / "moves.journal")
+    write_file(os.path.join(folder, "0.txt"), "x")
+
+    #the times the journal was repaired
+    recovered = []
+    recover_journal = FileOperator.recover_journal
+    monkeypatch.setattr(FileOperator, "recover_journal",
+                        lambda file_name: recovered.append(file_name) or
+                        recover_journal(file_name))
+
+    batches = []
+    moved = threading.Event()
+    stop_event = threading.Event()
+
+    def on_batch(results):
+        batches.append(results)
+        moved.set()
+
+    watcher = threading.Thread(target = FileOperator.watch_folder,
+                               args = (folder,),
+                               kwargs = {"debounce": 0.05, "poll_interval": 0.05,
+                                         "journal_file": journal_file,
+                                         "on_batch": on_batch,
+                                         "stop_event": stop_event})
+    watcher.start()
+    try:
+        for index in range(3):
+            assert moved.wait(10)
+            moved.clear()
+            write_file(os.path.join(folder, f"{index + 1}.jpg"), "x")
+        assert moved.wait(10)
+    finally:
+        stop_event.set()
+        watcher.join()
+
+    assert len(batches) == 4
+    assert recovered == [journal_file]
+    assert [record["op"] for record in FileOperator.read_journal(journal_file)
+            ].count("done") == 4
+    assert sorted(os.listdir(folder)) == ["JPG", "TXT"]
+
+
+def test_plan_file_moves_leaves_out_the_journal_and_temporary_files(tmp_path):
+    folder = str(tmp_path)
+    journal_file = os.path.join(folder, "moves.journal")
+    names = ["a.txt", "moves.journal", ".report.csv.k2x_9q0z.tmp",
+             ".fo-rename-12-0.tmp", "b.txt.fo-partial", "c.txt.fo-link"]
+    for name in names:
+        write_file(os.path.join(folder, name), "x")
+
+    plan = FileOperator.plan_file_moves(folder, names,
+                                        exclude = [journal_file])
+    assert [os.path.basename(source) for source, *rest in plan] == ["a.txt"]
+
+
+def test_category_rules_decide_categories_and_buckets(tmp_path):
+    folder = str(tmp_path)
+    for name in ("arch.tar.gz", "other.gz", "old.log", "a.TXT"):
+        write_file(os.path.join(folder, name), name)
+    rules = FileOperator.CategoryRules([
+        {"category": "Archives", "bucket": "ARCH", "extensions": ".tar.gz"},
+        {"category": "Logs", "glob": "*.LOG"}])
+
+    assert rules.get_category("x.tar.gz", "File", ".gz") == "Archives"
+    assert rules.get_category("x.gz", "File", ".gz") == ".gz"
+    assert rules.get_bucket("Archives") == "ARCH"
+    assert rules.get_bucket(".txt") == FileOperator.get_bucket_name(".txt")
+
+    FileOperator.sort_folder(folder, category_rules = rules)
+    assert sorted(read_tree(folder)) == [os.path.join("ARCH", "arch.tar.gz"),
+                                         os.path.join("GZ", "other.gz"),
+                                         os.path.join("Logs", "old.log"),
+                                         os.path.join("TXT", "a.TXT")]
+
+    with pytest.raises(ValueError):
+        FileOperator.CategoryRules([{"extensions": ".txt"}])
+
+
+def test_metrics_record_the_phases_of_an_operation(tmp_path):
+    folder = str(tmp_path / "src")
+    sink_file = str(tmp_path / "metrics.jsonl")
+    write_file(os.path.join(folder, "a.txt"), "a")
+    write_file(os.path.join(folder, "b.jpg"), "b")
+
+    FileOperator.enable_metrics([FileOperator.JsonLinesSink(sink_file)])
+    try:
+        FileOperator.sort_folder(folder)
+        FileOperator.record_error("move", FileNotFoundError("gone"))
+    finally:
+        metrics = FileOperator.disable_metrics()
+    assert FileOperator.disable_metrics() is None
+
+    snapshot = metrics.snapshot()
+    assert snapshot["phases"]["move"]["count"] == 2
+    assert snapshot["phases"]["mkdir"]["count"] == 2
+    assert snapshot["errors"] == {"move": {"FileNotFoundError": 1}}
+
+    #the final snapshot is passed to the sink
+    with open(sink_file, encoding = "utf-8") as f:
+        lines = [json.loads(line) for line in f]
+    assert lines[-1]["errors"] == snapshot["errors"]
+
+
+def test_run_job_passes_its_rules_and_links_option(tmp_path, monkeypatch):
+    folder = str(tmp_path / "src")
+    write_file(os.path.join(folder, "a.jpg"), "a")
+    write_file(os.path.join(folder, "b.log"), "b")
+    rules = [{"category": "Logs", "bucket": "LOGS", "extensions": ".log"}]
+
+    result = FileOperator.run_job({"folder": folder, "action": "sort",
+                                   "category_rules": rules})
+    assert result["status"] == "done"
+    assert read_tree(folder) == {os.path.join("JPG", "a.jpg"): "a",
+                                 os.path.join("LOGS", "b.log"): "b"}
+
+    #the option reaches sort_folder
+    calls = []
+    monkeypatch.setattr(FileOperator, "sort_folder",
+                        lambda *args, **kwargs: calls.append((args, kwargs)) or
+                        FileOperator.SortReport())
+    FileOperator.run_job({"folder": folder, "follow_symlinks": True})
+    assert calls[0][0][3] is True
+
+
+def test_main_reads_category_rules(tmp_path):
+    folder = str(tmp_path / "src")
+    rules_file = str(tmp_path / "rules.json")
+    report_file = str(tmp_path / "report.json")
+    write_file(os.path.join(folder, "b.log"), "b")
+    write_file(rules_file, json.dumps([{"category": "Logs", "bucket": "LOGS",
+                                        "extensions": [".log"]}]))
+
+    assert FileOperator.main(["sort", folder, "--rules", rules_file,
+                              "--follow-symlinks", "--workers", "1",
+                              "--report", report_file]) == 0
+    assert read_tree(folder) == {os.path.join("LOGS", "b.log"): "b"}
+    with open(report_file, encoding = "utf-8") as f:
+        assert json.load(f)["jobs"][0]["follow_symlinks"] is True
+
+    write_file(rules_file, json.dumps([{"extensions": [".log"]}]))
+    with pytest.raises(SystemExit):
+        FileOperator.main(["sort", folder, "--rules", rules_file])